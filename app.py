@@ -1,11 +1,15 @@
-from utils import PAYOFF_MATRIX, STARTING_POPULATION, Action, Player, Population, Strategy, PayoffMatrix
+from utils import PAYOFF_MATRIX, STARTING_POPULATION, Action, Player, Population, Strategy, PayoffMatrix, PersistentMatchupCache, CountPopulation, SimulationStats, SimulationWorker
 from catalogue import EXAMPLE_SPECIES
+from utils.chart_data import CountSeries
 from collections.abc import Iterable
 import streamlit as st
 import pandas as pd
 import threading
 
 
+TALLY_CACHE_PATH = ".cache/tallies.sqlite"
+
+
 
 SPECIES: dict[str, Strategy] = EXAMPLE_SPECIES  # Change this if you want to use a different set of species
 
@@ -53,12 +57,14 @@ advanced = st.checkbox("Advanced")
 col1, col2, col3 = st.columns(3)
 starting_population = col1.number_input("Starting population per species", value=STARTING_POPULATION, min_value=1, max_value=100, step=1, disabled=True)
 
-rounds = col2.number_input("Rounds per battle", value=50, min_value=1, max_value=1000, step=5, disabled=not advanced)
+rounds = col2.number_input("Rounds per battle", value=50, min_value=1, max_value=10_000, step=5, disabled=not advanced)
 overall_food = col3.number_input("Overall food available", value=100, min_value=0, max_value=2_000, step=25)
 matchup_rate = col1.number_input("Matchup rate", value=1.0, min_value=0.0, max_value=1.0, step=0.01, disabled=not advanced)
 mutation_rate = col2.number_input("Mutation rate", value=0.01, min_value=0.0, max_value=1.0, step=0.01)
 can_mutate_parent = col3.checkbox("Can mutate parent", value=False)
 can_mutate_into_extinct = col3.checkbox("Can mutate into extinct species", value=True, disabled=True)  # TODO: Implement this feature
+profile = col2.checkbox("Profile generations", value=False, disabled=not advanced, help="Record where the time goes when running generations, shown at the bottom of the page.")
+count_based = col1.checkbox("Count-based engine", value=False, disabled=not advanced, help="Store the number of players per species and age instead of every single player. Scales to millions of players. Takes effect on reset.")
 
 st.write("Adjust overall food mid-game to introduce famines or periods of plenty.")
 st.write("Adjust mutation rate to increase the probability that offspring uses a different strategy than its parent.")
@@ -69,15 +75,28 @@ st.write("\n")
 
 
 
+# Battle results are stored as outcome tallies rather than scores, so the
+# cache stays valid across payoff matrix changes and simulation resets. It's
+# also kept on disk, so new sessions start with the battles played before
+if "matchup_cache" not in st.session_state:
+    st.session_state.matchup_cache = PersistentMatchupCache(TALLY_CACHE_PATH)
+
+
 def generate_new_population(
         starting_population: int = starting_population, 
         species: Iterable[Strategy] = SPECIES.values()
-) -> Population:
+) -> Population | CountPopulation:
+    if count_based:
+        return CountPopulation.from_counts(
+            {strategy: starting_population for strategy in species},
+            matchup_cache=st.session_state.matchup_cache,
+        )
     players = []
     for strategy in species:
         for _ in range(starting_population):
             players.append(Player(strategy))
-    return Population([players])
+    # Only the counts of past generations are shown, so there's no need to keep their players
+    return Population([players], matchup_cache=st.session_state.matchup_cache, retained_generations=1)
 
 
 if len(species) == 0:
@@ -85,75 +104,137 @@ if len(species) == 0:
     st.stop()
 
 
-if "generation" not in st.session_state:
-    st.session_state.generation = 0
+# Lock is used to avoid threading issues with "weird errors" (like a KeyError 
+# when the key clearly existed) when clicking the button too quickly, and to
+# read the population while the background worker is doing a generation
+if 'lock' not in st.session_state:
+    st.session_state.lock = threading.Lock()
+
+
+def new_worker(population: Population | CountPopulation) -> SimulationWorker:
+    return SimulationWorker(population, lock=st.session_state.lock)
 
-if st.session_state.generation == 0:
+
+if "population" not in st.session_state:
     st.session_state.population = generate_new_population(species=[SPECIES[strategy] for strategy in species])
+    st.session_state.worker = new_worker(st.session_state.population)
 
+worker: SimulationWorker = st.session_state.worker
 
-col1, col2, col3 = st.columns(3)
-run1 = col1.button("Run 1 generation")
-run5 = col2.button("Run 5 generations")
-reset = col3.button("Reset simulation")
+# Until the first generation, the population follows the selected species
+if st.session_state.population.generation == 0 and not worker.is_running:
+    st.session_state.population = generate_new_population(species=[SPECIES[strategy] for strategy in species])
+    worker = st.session_state.worker = new_worker(st.session_state.population)
 
-# Lock is used to avoid threading issues with "weird errors" (like a KeyError 
-# when the key clearly existed) when clicking the button too quickly
-if 'lock' not in st.session_state:
-    st.session_state.lock = threading.Lock()
 
+if "stats" not in st.session_state:
+    st.session_state.stats = SimulationStats()
 
-if run1:
-    with st.session_state.lock:
-        st.session_state.generation += 1
-        st.session_state.population.do_generation(
-            matchup_rate=matchup_rate, 
-            mutation_probability=mutation_rate, 
-            payoff_matrix=PAYOFF_MATRIX,
-            mutation_strategies=[SPECIES[strategy] for strategy in species],
-            rounds=rounds, 
-            overall_food=overall_food,
-            can_mutate_parent=can_mutate_parent,
-        )
+# Only instrument the simulation when asked to, since timing every decision has a cost
+if isinstance(st.session_state.population, Population):
+    st.session_state.population.stats = st.session_state.stats if profile else None
 
-if run5:
-    for _ in range(5):
-        with st.session_state.lock:
-            st.session_state.generation += 1
-            st.session_state.population.do_generation(
-                matchup_rate=matchup_rate, 
-                mutation_probability=mutation_rate, 
-                payoff_matrix=PAYOFF_MATRIX,
-                mutation_strategies=[SPECIES[strategy] for strategy in species],
-                rounds=rounds, 
-                overall_food=overall_food,
-                can_mutate_parent=can_mutate_parent,
-            )
-
-
-if reset:
-    with st.session_state.lock:
-        st.session_state.generation = 0
-        st.session_state.population = generate_new_population(species=[SPECIES[strategy] for strategy in species])
 
+# Changes to the parameters apply from the next generation, also while running
+worker.generation_kwargs = dict(
+    matchup_rate=matchup_rate, 
+    mutation_probability=mutation_rate, 
+    payoff_matrix=PAYOFF_MATRIX,
+    mutation_strategies=[SPECIES[strategy] for strategy in species],
+    rounds=rounds, 
+    overall_food=overall_food,
+    can_mutate_parent=can_mutate_parent,
+)
 
-st.write(f"Generation: {st.session_state.generation}")
-st.write(f"Total population: {st.session_state.population.population_size}")
-st.write(f"Population average age: {st.session_state.population.population_average_age:.2f}")
 
+def run_one_generation() -> None:
+    with st.session_state.lock:
+        st.session_state.population.do_generation(**worker.generation_kwargs)
 
-st.markdown("<h4 style='text-align: center;'>Current population counts</h4>", unsafe_allow_html=True)
-st.bar_chart(st.session_state.population.get_population_counts(), x_label="Species", y_label="Count")
 
-# Stacked area chart of population counts
-if st.session_state.generation > 0:
-    st.markdown("<h4 style='text-align: center;'>Development of population</h4>", unsafe_allow_html=True)
-    # TODO: Add possibility of nicer coloring, e.g. color=["#0f4cd1", "#a8324a", "#32a852"][:(len(species))]
-    st.area_chart([st.session_state.population.get_population_counts(gen) for gen in range(1, st.session_state.generation)], x_label="Generation", y_label="Count") 
+def reset_simulation() -> None:
+    st.session_state.worker.cancel()
+    with st.session_state.lock:
+        st.session_state.population = generate_new_population(species=[SPECIES[strategy] for strategy in species])
+        st.session_state.worker = new_worker(st.session_state.population)
 
 
+col1, col2, col3 = st.columns(3)
+generations_to_run = col1.number_input("Generations to run", value=0, min_value=0, step=10, help="0 keeps running until stopped.")
+col2.button("Run 1 generation", on_click=run_one_generation, disabled=worker.is_running)
+col3.button("Reset simulation", on_click=reset_simulation)
+col1.button("Start", on_click=worker.start, args=(generations_to_run or None,), disabled=worker.is_running)
+if worker.is_paused:
+    col2.button("Resume", on_click=worker.resume)
+else:
+    col2.button("Pause", on_click=worker.pause, disabled=not worker.is_running)
+col3.button("Stop", on_click=worker.cancel, disabled=not worker.is_running)
+
+if worker.error is not None:
+    st.error(f"The simulation stopped because of an error: {worker.error!r}")
+
+
+# Redraw every half second while the worker is running
+@st.fragment(run_every=0.5 if worker.is_running else None)
+def show_population() -> None:
+    if st.session_state.polling and not st.session_state.worker.is_running:
+        # The worker finished on its own, so refresh the buttons and stop polling
+        st.session_state.polling = False
+        st.rerun()
 
-# Add a top 3 table of the species with the highest population
-st.subheader("Top 3 species")
-top_3 = st.session_state.population.get_top_species(3)
-st.table(pd.DataFrame(list(top_3.items()), columns=["Strategy", "Current population"]).set_index("Strategy"))
\ No newline at end of file
+    with st.session_state.lock:
+        population = st.session_state.population
+        # The chart data is only extended by the generations done since the last redraw
+        if st.session_state.get("count_series_population") is not population:
+            st.session_state.count_series = CountSeries(population.get_population_counts())
+            st.session_state.count_series_population = population
+        st.session_state.count_series.update(population)
+
+        generation = population.generation
+        population_size = population.population_size
+        average_age = population.population_average_age
+        counts = population.get_population_counts()
+        top_3 = population.get_top_species(3)
+
+    st.write(f"Generation: {generation}")
+    st.write(f"Total population: {population_size}")
+    st.write(f"Population average age: {average_age:.2f}")
+
+    st.markdown("<h4 style='text-align: center;'>Current population counts</h4>", unsafe_allow_html=True)
+    st.bar_chart(counts, x_label="Species", y_label="Count")
+
+    # Stacked area chart of population counts
+    if generation > 0:
+        st.markdown("<h4 style='text-align: center;'>Development of population</h4>", unsafe_allow_html=True)
+        # TODO: Add possibility of nicer coloring, e.g. color=["#0f4cd1", "#a8324a", "#32a852"][:(len(species))]
+        st.area_chart(st.session_state.count_series.to_frame(), x_label="Generation", y_label="Count") 
+
+    # Add a top 3 table of the species with the highest population
+    st.subheader("Top 3 species")
+    st.table(pd.DataFrame(list(top_3.items()), columns=["Strategy", "Current population"]).set_index("Strategy"))
+
+
+st.session_state.polling = worker.is_running
+show_population()
+
+
+if profile:
+    with st.expander("Performance", expanded=True):
+        stats = st.session_state.stats
+        st.write(
+            f"{stats.generations} generations, {stats.battles} battles and {stats.rounds} rounds simulated while profiling"
+            f" ({stats.scored_rounds} rounds scored, including those computed without being played)."
+        )
+        st.table(pd.DataFrame(
+            list(stats.phase_seconds.items()),
+            columns=["Phase", "Wall time (s)"],
+        ).set_index("Phase"))
+        st.table(pd.DataFrame(
+            [
+                (name, strategy_stats.decide_calls, strategy_stats.decide_seconds, strategy_stats.seconds_per_call * 1e6)
+                for name, strategy_stats in sorted(stats.strategies.items(), key=lambda x: x[1].decide_seconds, reverse=True)
+            ],
+            columns=["Strategy", "decide() calls", "decide() time (s)", "Time per call (µs)"],
+        ).set_index("Strategy"))
+        if st.button("Reset profiling statistics"):
+            stats.reset()
@@ -0,0 +1,199 @@
+"""
+Microbenchmarks for the simulation's hot paths: battles between every pair
+of `EXAMPLE_SPECIES` (both as routed by `battle` and played round by round
+with `Player.get_battle_history`), `History.get_score`, `PayoffMatrix.get_reward`,
+`Population.do_generation`, reproduction and `Population.get_population_counts`.
+
+Run it from the repository root with
+
+    python -m benchmarks.bench --update      # Record a baseline
+    python -m benchmarks.bench               # Compare against it
+
+The second command exits with status 1 if any case got slower than
+`--threshold` times its baseline time. Baselines are machine specific,
+so they aren't checked in.
+"""
+from __future__ import annotations
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+from pathlib import Path
+import argparse
+import itertools as it
+import json
+import platform
+import random
+import sys
+import timeit
+
+from utils import Action, History, PayoffMatrix, Player, Population, battle, round_probabilistically
+from utils.reproduction import reproduce
+from catalogue import EXAMPLE_SPECIES
+
+
+DEFAULT_BASELINE = Path(__file__).with_name("baseline.json")
+
+
+
+@dataclass
+class Case:
+    name: str
+    function: Callable[[], object]
+
+
+
+def battle_cases(rounds_values: tuple[int, ...] = (10, 100, 1_000)) -> Iterator[Case]:
+    """
+    One case per ordered pair of example species and number of rounds. Since
+    `battle` scores many pairs without playing every round (see `utils.routing`),
+    a second case times the round-by-round loop with `Player.get_battle_history`.
+    """
+    for rounds in rounds_values:
+        for name1, name2 in it.product(EXAMPLE_SPECIES, repeat=2):
+            player1, player2 = Player(EXAMPLE_SPECIES[name1]), Player(EXAMPLE_SPECIES[name2])
+            yield Case(
+                f"battle/{name1}-vs-{name2}/rounds={rounds}",
+                lambda player1=player1, player2=player2, rounds=rounds: battle(player1, player2, rounds=rounds),
+            )
+            yield Case(
+                f"get_battle_history/{name1}-vs-{name2}/rounds={rounds}",
+                lambda player1=player1, player2=player2, rounds=rounds: player1.get_battle_history(player2, rounds=rounds),
+            )
+
+
+def scoring_cases() -> Iterator[Case]:
+    payoff_matrix = PayoffMatrix(3, 0, 5, 1)
+    yield Case("payoff_matrix/get_reward", lambda: payoff_matrix.get_reward(Action.DEFECT, Action.COOP))
+
+    # A local RNG, so that collecting the cases doesn't reseed the global one
+    rng = random.Random(0)
+    for rounds in (100, 10_000):
+        history = History()
+        for _ in range(rounds):
+            history.append(rng.choice(list(Action)), rng.choice(list(Action)))
+        yield Case(f"history/get_score/rounds={rounds}", lambda history=history: history.get_score(payoff_matrix))
+
+
+def generation_cases(
+        population_sizes: tuple[int, ...] = (26, 65, 130),
+        matchup_rates: tuple[float, ...] = (0.1, 1.0)
+) -> Iterator[Case]:
+    """Runs one generation of a population with an equal number of each example species."""
+    strategies = list(EXAMPLE_SPECIES.values())
+
+    for population_size, matchup_rate in it.product(population_sizes, matchup_rates):
+        def do_generation(population_size=population_size, matchup_rate=matchup_rate):
+            random.seed(0)
+            players = [Player(strategies[i % len(strategies)]) for i in range(population_size)]
+            Population([players]).do_generation(
+                matchup_rate=matchup_rate,
+                rounds=20,
+                overall_food=population_size,
+                mutation_probability=0.01,
+                mutation_strategies=strategies,
+            )
+        yield Case(f"do_generation/size={population_size}/matchup_rate={matchup_rate}", do_generation)
+
+
+def reproduction_cases(population_sizes: tuple[int, ...] = (1_000, 10_000)) -> Iterator[Case]:
+    """Makes the next generation of players with 2.5 offspring each on average, player by player and batched."""
+    strategies = list(EXAMPLE_SPECIES.values())
+
+    for population_size in population_sizes:
+        players = [Player(strategies[i % len(strategies)], most_recent_score=2.5) for i in range(population_size)]
+        kwargs = dict(mutation_probability=0.01, mutation_strategies=strategies)
+
+        def per_player(players=players, kwargs=kwargs):
+            random.seed(0)
+            return [child for player in players for child in player.get_offspring(round_probabilistically(2.5), **kwargs)]
+
+        def batched(players=players, kwargs=kwargs, population_size=population_size):
+            random.seed(0)
+            return reproduce(players, overall_food=population_size, **kwargs)
+
+        yield Case(f"reproduction/per_player/size={population_size}", per_player)
+        yield Case(f"reproduction/batched/size={population_size}", batched)
+
+
+def population_count_cases(generation_counts: tuple[int, ...] = (10, 100, 1_000)) -> Iterator[Case]:
+    """Counts the species of every generation, like the app does to draw its area chart."""
+    strategies = list(EXAMPLE_SPECIES.values())
+    generation = [Player(strategy) for strategy in strategies for _ in range(5)]
+
+    for generations in generation_counts:
+        population = Population([list(generation) for _ in range(generations)])
+        yield Case(
+            f"get_population_counts/generations={generations}",
+            lambda population=population: [population.get_population_counts(gen) for gen in range(population.generation + 1)],
+        )
+
+
+def all_cases() -> Iterator[Case]:
+    yield from battle_cases()
+    yield from scoring_cases()
+    yield from generation_cases()
+    yield from reproduction_cases()
+    yield from population_count_cases()
+
+
+
+def time_case(case: Case, repeat: int = 5) -> float:
+    """Returns the best time per call of `case.function` in seconds."""
+    timer = timeit.Timer(case.function)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def find_regressions(
+        results: dict[str, float],
+        baseline: dict[str, float],
+        threshold: float
+) -> dict[str, tuple[float, float]]:
+    """
+    Returns the (baseline, new) times of the cases that got more than
+    `threshold` times slower. Cases missing from either side are ignored.
+    """
+    return {
+        name: (baseline[name], time)
+        for name, time in results.items()
+        if name in baseline and time > baseline[name] * threshold
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="JSON file with baseline times")
+    parser.add_argument("--update", action="store_true", help="Write the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=1.25, help="Fail if a case takes more than this times its baseline")
+    parser.add_argument("--filter", default="", help="Only run cases whose name contains this")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of timing repeats per case (the best is kept)")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for case in all_cases():
+        if args.filter in case.name:
+            results[case.name] = time_case(case, repeat=args.repeat)
+            print(f"{case.name:<70} {results[case.name] * 1e6:12.2f} µs")
+
+    if args.update:
+        args.baseline.write_text(json.dumps({
+            "python": sys.version,
+            "machine": platform.platform(),
+            "cases": results,
+        }, indent=2))
+        print(f"Wrote baseline to {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}, run with --update to create one")
+        return 0
+
+    baseline = json.loads(args.baseline.read_text())["cases"]
+    regressions = find_regressions(results, baseline, args.threshold)
+    for name, (old, new) in regressions.items():
+        print(f"REGRESSION {name}: {old * 1e6:.2f} µs -> {new * 1e6:.2f} µs ({new / old:.2f}x)")
+    return 1 if regressions else 0
+
+
+
+if __name__ == "__main__":
+    sys.exit(main())
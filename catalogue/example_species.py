@@ -1,7 +1,7 @@
 """
 A "list" of the different species / strategies.
 """
-from utils import Strategy, Action, History, random_action
+from utils import Strategy, Action, History, StateMachine, MemoryOne, random_action
 import random
 
 
@@ -18,6 +18,15 @@ class TitForTat(Strategy):
     """
     Starts by cooperating, then does whatever the opponent did last
     """
+    deterministic = True
+    # State = the opponent's last move
+    state_machine = StateMachine(
+        actions=(COOP, DEFECT),
+        transitions=((0, 1), (0, 1)),
+    )
+    memory_one = MemoryOne(initial=1, after=(1, 0, 1, 0))
+    memory_depth = 1
+
     def decide(self, history: History) -> Action:
         if len(history) == 0:
             return COOP
@@ -30,8 +39,15 @@ class ThreeChances(Strategy):
     Defects forever if opponent defected 3 or more times in past,
     otherwise cooperates
     """
+    deterministic = True
+    # State = number of times the opponent has defected (up to 3)
+    state_machine = StateMachine(
+        actions=(COOP, COOP, COOP, DEFECT),
+        transitions=((0, 1), (1, 2), (2, 3), (3, 3)),
+    )
+
     def decide(self, history):
-        if history.opponent_moves.count(DEFECT) >= 3:
+        if history.opponent_defections >= 3:
             # defect forever if opponent defected 3 times in past
             return DEFECT
         else:
@@ -42,6 +58,10 @@ class Random(Strategy):
     """
     Randomly selects an action with equal probability each turn
     """
+    deterministic = False
+    memory_one = MemoryOne(initial=0.5, after=(0.5, 0.5, 0.5, 0.5))
+    memory_depth = 0
+
     def decide(self, history):
         return random_action()
     
@@ -52,6 +72,8 @@ class Random2(Strategy):
     E.g. in the 11th turn, if the opponent defected 8 times and cooperated
     2 times in the first 10 turns, the probability of defecting is 8/10 = 80%
     """
+    deterministic = False
+
     def decide(self, history):
         if len(history.opponent_moves) == 0:
             return COOP
@@ -65,6 +87,14 @@ class TitForTwoTats(Strategy):
     """
     Starts by cooperating, then defects if opponent defects twice in a row
     """
+    deterministic = True
+    # State = length of the opponent's current streak of defections (up to 2)
+    state_machine = StateMachine(
+        actions=(COOP, COOP, DEFECT),
+        transitions=((0, 1), (0, 2), (0, 2)),
+    )
+    memory_depth = 2
+
     def decide(self, history):
         if len(history.opponent_moves) < 2:
             return COOP
@@ -78,6 +108,11 @@ class AlwaysDefect(Strategy):
     """
     Always defects, regardless of opponent's actions
     """
+    deterministic = True
+    state_machine = StateMachine(actions=(DEFECT,), transitions=((0, 0),))
+    memory_one = MemoryOne(initial=0, after=(0, 0, 0, 0))
+    memory_depth = 0
+
     def decide(self, history):
         return DEFECT
     
@@ -86,6 +121,11 @@ class AlwaysCoop(Strategy):
     """
     Always cooperates, regardless of opponent's actions
     """
+    deterministic = True
+    state_machine = StateMachine(actions=(COOP,), transitions=((0, 0),))
+    memory_one = MemoryOne(initial=1, after=(1, 1, 1, 1))
+    memory_depth = 0
+
     def decide(self, history):
         return COOP
 
@@ -98,6 +138,14 @@ class Tester(Strategy):
     - Keeps exploiting every other move if opponent cooperates in 2nd move,
     - Otherwise plays Tit for Tat
     """
+    deterministic = True
+    # States: 0-2 are the first three moves (2 if the opponent cooperated in
+    # the 2nd move, 3 if not), 4-5 alternate exploiting, 6-7 are tit for tat
+    state_machine = StateMachine(
+        actions=(DEFECT, COOP, COOP, COOP, DEFECT, COOP, COOP, DEFECT),
+        transitions=((1, 1), (2, 3), (4, 4), (6, 7), (5, 5), (4, 4), (6, 7), (6, 7)),
+    )
+
     def decide(self, history: History) -> Action:
         if len(history) == 0:
             return DEFECT  # defect from the start
@@ -120,6 +168,10 @@ class Joss(Strategy):
     Tit for Tat, except with 10% probability it may
     defect for no reason, trying to be sneaky
     """
+    deterministic = False
+    memory_one = MemoryOne(initial=1, after=(0.9, 0, 0.9, 0))
+    memory_depth = 1
+
     def decide(self, history: History) -> Action:
         if len(history) == 0:
             return COOP  # coop from the start
@@ -136,6 +188,15 @@ class Pavlov(Strategy):
     Starts by cooperating, then coops if it did the same as the
     opponent last move, otherwise defects if they did different moves.
     """
+    deterministic = True
+    # State = whether both players made the same move last round
+    state_machine = StateMachine(
+        actions=(COOP, DEFECT),
+        transitions=((0, 1), (1, 0)),
+    )
+    memory_one = MemoryOne(initial=1, after=(1, 0, 0, 1))
+    memory_depth = 1
+
     def decide(self, history: History) -> Action:
         if len(history) == 0:
             return COOP
@@ -151,12 +212,19 @@ class Majority(Strategy):
     Starts by cooperating, then does what the opponent most frequently
     did in the past.
     """
+    deterministic = True
     def decide(self, history: History) -> Action:
         if len(history) == 0:
             return COOP
 
-        # most frequent among opponent 
-        return max(history.opponent_moves, key=history.opponent_moves.count)
+        # most frequent among opponent (on a tie, whatever they did first)
+        opponent_coops = len(history) - history.opponent_defections
+        if history.opponent_defections > opponent_coops:
+            return DEFECT
+        elif history.opponent_defections < opponent_coops:
+            return COOP
+        else:
+            return history.opponent_moves[0]
 
 
 class GenerousTitForTat(Strategy):
@@ -167,6 +235,10 @@ class GenerousTitForTat(Strategy):
     Tries to escape "viscious cycles of defection" against
     other otherwise nice strategies this way
     """
+    deterministic = False
+    memory_one = MemoryOne(initial=1, after=(1, 0.2, 1, 0.2))
+    memory_depth = 1
+
     def decide(self, history: History) -> Action:
         if len(history) == 0:
             return COOP
@@ -180,11 +252,18 @@ class AngryRevenge(Strategy):
     """
     Coops until the opponent defects once, then always defects
     """
+    deterministic = True
+    # State = whether the opponent has ever defected
+    state_machine = StateMachine(
+        actions=(COOP, DEFECT),
+        transitions=((0, 1), (1, 1)),
+    )
+
     def decide(self, history: History) -> Action:
         if len(history) == 0:
             return COOP
 
-        if history.opponent_moves.count(DEFECT) > 0:
+        if history.opponent_defections > 0:
             # defect forever if opponent defected once
             return DEFECT
         else:
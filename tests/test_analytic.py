@@ -0,0 +1,128 @@
+from utils import Player, Population, PayoffMatrix, MemoryOne, Strategy, Action, get_cyclic_tally, get_bounded_memory_tally, get_expected_tally, battle
+from catalogue import EXAMPLE_SPECIES
+import random
+import pytest
+
+
+MACHINE_SPECIES = [name for name, strategy in EXAMPLE_SPECIES.items() if strategy.state_machine is not None]
+
+
+@pytest.mark.parametrize("rounds", [0, 1, 2, 3, 7, 50, 101])
+@pytest.mark.parametrize("name1", MACHINE_SPECIES)
+@pytest.mark.parametrize("name2", MACHINE_SPECIES)
+def test_cyclic_tally_matches_playing(name1, name2, rounds):
+    player1, player2 = Player(EXAMPLE_SPECIES[name1]), Player(EXAMPLE_SPECIES[name2])
+    expected = player1.get_battle_history(player2, rounds=rounds).get_outcome_tally()
+    tally = get_cyclic_tally(player1.strategy.state_machine, player2.strategy.state_machine, rounds=rounds)
+    assert tally == expected
+
+
+def test_huge_rounds():
+    tit_for_tat, tester = Player(EXAMPLE_SPECIES["TitForTat"]), Player(EXAMPLE_SPECIES["Tester"])
+    tally = get_cyclic_tally(tit_for_tat.strategy.state_machine, tester.strategy.state_machine, rounds=10**9)
+    assert tally.rounds == 10**9
+
+    # The scores only depend on where in the cycle the battle stops
+    payoff_matrix = PayoffMatrix(3, 0, 5, 1)
+    short = battle(tit_for_tat, tester, rounds=1_000, payoff_matrix=payoff_matrix)
+    long = battle(tit_for_tat, tester, rounds=10**9, payoff_matrix=payoff_matrix)
+    assert long == pytest.approx(short, abs=1e-2)
+
+
+def without_state_machine(strategy):
+    """The same strategy, but only declaring its `memory_depth`."""
+    return type(type(strategy).__name__, (type(strategy),), {"state_machine": None, "memory_one": None})()
+
+
+class Echo(Strategy):
+    """Plays what the opponent played 3 rounds ago, and cooperates until then."""
+    deterministic = True
+    memory_depth = 3
+
+    def decide(self, history):
+        return history.opponent_moves[-3] if len(history) >= 3 else Action.COOP
+
+
+BOUNDED_MEMORY_STRATEGIES = [
+    without_state_machine(strategy) for strategy in EXAMPLE_SPECIES.values()
+    if strategy.deterministic and strategy.memory_depth is not None
+] + [Echo()]
+
+
+@pytest.mark.parametrize("rounds", [0, 1, 2, 3, 7, 50, 101])
+@pytest.mark.parametrize("strategy1", BOUNDED_MEMORY_STRATEGIES, ids=lambda strategy: type(strategy).__name__)
+@pytest.mark.parametrize("strategy2", BOUNDED_MEMORY_STRATEGIES, ids=lambda strategy: type(strategy).__name__)
+def test_bounded_memory_tally_matches_playing(strategy1, strategy2, rounds):
+    player1, player2 = Player(strategy1), Player(strategy2)
+    expected = player1.get_battle_history(player2, rounds=rounds).get_outcome_tally()
+    assert get_bounded_memory_tally(player1, player2, rounds=rounds) == expected
+
+
+def test_bounded_memory_stops_calling_decide():
+    calls = 0
+
+    class CountingEcho(Echo):
+        def decide(self, history):
+            nonlocal calls
+            calls += 1
+            return super().decide(history)
+
+    tally = get_bounded_memory_tally(Player(CountingEcho()), Player(without_state_machine(EXAMPLE_SPECIES["Pavlov"])), rounds=10**6)
+    assert tally.rounds == 10**6
+    assert calls <= 4**3 + 3
+
+
+def test_generation_matches_playing_every_round():
+    players = [Player(EXAMPLE_SPECIES[name]) for name in MACHINE_SPECIES + ["Majority"] for _ in range(3)]
+    population = Population([players])
+    population.do_generation(rounds=30, adjust_populations=False)
+
+    for player in players:
+        played = sum(
+            player.get_battle_history(opponent, rounds=30).get_score()[0]
+            for opponent in players if opponent is not player
+        )
+        assert player.most_recent_score == pytest.approx(played / (len(players) - 1))
+
+
+MEMORY_ONE_SPECIES = [name for name, strategy in EXAMPLE_SPECIES.items() if strategy.memory_one is not None]
+
+
+@pytest.mark.parametrize("rounds", [1, 2, 5, 64, 100])
+@pytest.mark.parametrize("name1", MEMORY_ONE_SPECIES)
+@pytest.mark.parametrize("name2", MEMORY_ONE_SPECIES)
+def test_expected_tally_matches_playing(name1, name2, rounds):
+    player1, player2 = Player(EXAMPLE_SPECIES[name1]), Player(EXAMPLE_SPECIES[name2])
+    tally = get_expected_tally(player1.strategy.memory_one, player2.strategy.memory_one, rounds=rounds)
+    assert tally.rounds == pytest.approx(rounds)
+
+    if player1.strategy.deterministic and player2.strategy.deterministic:
+        assert tally == player1.get_battle_history(player2, rounds=rounds).get_outcome_tally()
+
+
+def test_expected_tally_is_the_average():
+    random.seed(2)
+    joss, generous = Player(EXAMPLE_SPECIES["Joss"]), Player(EXAMPLE_SPECIES["GenerousTitForTat"])
+    samples = 2_000
+    scores = [battle(joss, generous, rounds=20) for _ in range(samples)]
+    mean_score = sum(score for score, _ in scores) / samples
+    mean_opponent_score = sum(score for _, score in scores) / samples
+
+    expected = get_expected_tally(joss.strategy.memory_one, generous.strategy.memory_one, rounds=20).get_score()
+    assert expected == pytest.approx((mean_score, mean_opponent_score), abs=0.03)
+
+
+def test_memory_one_validation():
+    with pytest.raises(ValueError):
+        MemoryOne(initial=1.5, after=(1, 0, 1, 0))
+    with pytest.raises(ValueError):
+        MemoryOne(initial=1, after=(1, 0, 1))
+
+
+def test_expected_payoffs_generation_is_deterministic():
+    def scores():
+        population = Population([[Player(EXAMPLE_SPECIES[name]) for name in ["Joss", "GenerousTitForTat", "Random"] for _ in range(3)]])
+        population.do_generation(rounds=20, adjust_populations=False, expected_payoffs=True)
+        return [player.most_recent_score for player in population.get_players()]
+
+    assert scores() == scores()
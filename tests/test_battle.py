@@ -36,3 +36,15 @@ def test_tit_for_tat_vs_tester(payoff_matrix):
     expected_score = ((98*coop_coop_1+coop_defect_1+defect_coop_1) / 100, (98*coop_coop_2 + coop_defect_2 + defect_coop_2) / 100)
 
     assert score == expected_score, f"Unexpectedly, the score wasn't {expected_score} but instead {score} when battling tit for tat vs tester...?"
+
+
+def test_majority_breaks_ties_with_first_move(payoff_matrix):
+    majority = Player(EXAMPLE_SPECIES["Majority"])
+    tester   = Player(EXAMPLE_SPECIES["Tester"])
+
+    history = majority.get_battle_history(tester, rounds=4)
+
+    # Tester defects first, then cooperates, so after two moves it's a tie,
+    # which Majority settles by copying the opponent's first move
+    assert history.opponent_moves == [Action.DEFECT, Action.COOP, Action.COOP, Action.DEFECT]
+    assert history.own_moves == [Action.COOP, Action.DEFECT, Action.DEFECT, Action.COOP]
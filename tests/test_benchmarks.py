@@ -0,0 +1,37 @@
+from benchmarks.bench import find_regressions, main, all_cases
+import json
+import random
+
+
+def test_find_regressions():
+    baseline = {"a": 1.0, "b": 1.0, "c": 1.0}
+    results = {"a": 1.1, "b": 1.5, "d": 100.0}
+
+    assert find_regressions(results, baseline, threshold=1.25) == {"b": (1.0, 1.5)}
+    assert find_regressions(results, baseline, threshold=2) == {}
+
+
+def test_case_names_are_unique():
+    names = [case.name for case in all_cases()]
+    assert len(names) == len(set(names))
+
+
+def test_baseline_round_trip(tmp_path):
+    baseline = tmp_path / "baseline.json"
+    args = ["--baseline", str(baseline), "--filter", "payoff_matrix/get_reward", "--repeat", "1"]
+
+    assert main([*args, "--update"]) == 0
+    assert list(json.loads(baseline.read_text())["cases"]) == ["payoff_matrix/get_reward"]
+
+    # Pretend the baseline was a lot faster
+    data = json.loads(baseline.read_text())
+    data["cases"]["payoff_matrix/get_reward"] /= 1_000
+    baseline.write_text(json.dumps(data))
+    assert main(args) == 1
+
+
+def test_collecting_cases_keeps_the_global_rng():
+    random.seed(1)
+    state = random.getstate()
+    list(all_cases())
+    assert random.getstate() == state
@@ -0,0 +1,46 @@
+from utils import Player, Population
+from catalogue import EXAMPLE_SPECIES
+import pytest
+
+np = pytest.importorskip("numpy")
+from utils.chart_data import CountSeries
+
+
+def test_append_and_grow():
+    series = CountSeries(["A", "B"], capacity=1)
+
+    series.append({"A": 1, "B": 2})
+    series.append({"B": 3})
+    series.append({"C": 4, "A": 5})
+
+    assert len(series) == 3
+    assert series.columns == ["A", "B", "C"]
+    assert series.values.tolist() == [[1, 2, 0], [0, 3, 0], [5, 0, 4]]
+
+
+def test_update_from_population():
+    species = [EXAMPLE_SPECIES[name] for name in ("TitForTat", "AlwaysDefect")]
+    population = Population([[Player(strategy) for strategy in species for _ in range(5)]], retained_generations=1)
+    series = CountSeries()
+
+    assert series.update(population) == 1
+    for _ in range(4):
+        population.do_generation(rounds=5, overall_food=10, mutation_probability=0.5, mutation_strategies=[EXAMPLE_SPECIES["Pavlov"]])
+    assert series.update(population) == 4
+    assert series.update(population) == 0
+
+    expected = [population.get_population_counts(gen) for gen in range(population.generation + 1)]
+    assert [dict(zip(series.columns, row)) for row in series.values.tolist()] == [
+        {name: counts.get(name, 0) for name in series.columns} for counts in expected
+    ]
+
+
+def test_to_frame():
+    pytest.importorskip("pandas")
+    series = CountSeries(["A"])
+    series.append({"A": 7})
+
+    frame = series.to_frame()
+    assert list(frame.columns) == ["A"]
+    assert frame.index.name == "Generation"
+    assert frame["A"].tolist() == [7]
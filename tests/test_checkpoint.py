@@ -0,0 +1,78 @@
+from utils import Player, Population, save_checkpoint, load_checkpoint, Checkpointer
+from catalogue import EXAMPLE_SPECIES
+import random
+import pytest
+
+
+SPECIES = ["TitForTat", "AlwaysDefect", "Joss", "Random"]
+MUTATION_STRATEGIES = [EXAMPLE_SPECIES[name] for name in SPECIES]
+
+
+def new_population(**kwargs):
+    return Population([[Player(EXAMPLE_SPECIES[name]) for name in SPECIES for _ in range(6)]], **kwargs)
+
+
+def do_generation(population):
+    population.do_generation(rounds=10, overall_food=25, mutation_probability=0.1, mutation_strategies=MUTATION_STRATEGIES)
+
+
+def test_resume_exactly(tmp_path):
+    path = tmp_path / "run.ckpt"
+
+    random.seed(3)
+    uninterrupted = new_population(retained_generations=1)
+    for _ in range(3):
+        do_generation(uninterrupted)
+    save_checkpoint(uninterrupted, path)
+    for _ in range(3):
+        do_generation(uninterrupted)
+
+    random.seed(12345)  # Loading restores the RNG state
+    resumed = load_checkpoint(path, EXAMPLE_SPECIES)
+    assert resumed.generation == 3
+    assert resumed.retained_generations == 1
+    for _ in range(3):
+        do_generation(resumed)
+
+    assert resumed.generation == uninterrupted.generation
+    assert resumed.species == uninterrupted.species
+    assert resumed.summaries == uninterrupted.summaries
+    assert [(p.strategy_name, p.age) for p in resumed.players[-1]] == [(p.strategy_name, p.age) for p in uninterrupted.players[-1]]
+    assert not path.with_name("run.ckpt.tmp").exists()
+
+
+def test_checkpoint_round_trip(tmp_path):
+    path = tmp_path / "run.ckpt"
+    population = new_population()
+    population.do_generation(rounds=10, adjust_populations=False)
+
+    save_checkpoint(population, path, save_rng_state=False)
+    loaded = load_checkpoint(path, EXAMPLE_SPECIES)
+
+    assert loaded.get_population_counts() == population.get_population_counts()
+    assert [p.most_recent_score for p in loaded.players[-1]] == [p.most_recent_score for p in population.players[-1]]
+    assert loaded.get_species_mean_scores() == population.get_species_mean_scores()
+
+    with pytest.raises(KeyError):
+        load_checkpoint(path, {"TitForTat": EXAMPLE_SPECIES["TitForTat"]})
+
+    (tmp_path / "garbage").write_bytes(b"not a checkpoint at all")
+    with pytest.raises(ValueError):
+        load_checkpoint(tmp_path / "garbage", EXAMPLE_SPECIES)
+
+
+def test_checkpointer(tmp_path):
+    path = tmp_path / "run.ckpt"
+    checkpointer = Checkpointer(path, every=2)
+    population = new_population()
+
+    do_generation(population)
+    assert not checkpointer(population)
+    assert not path.exists()
+
+    do_generation(population)
+    assert checkpointer(population)
+    assert load_checkpoint(path, EXAMPLE_SPECIES, restore_rng_state=False).generation == 2
+
+    with pytest.raises(ValueError):
+        Checkpointer(path, every=0)
@@ -0,0 +1,99 @@
+from utils import CountPopulation, Population, Player, PayoffMatrix
+from utils.count_population import split_uniformly
+from catalogue import EXAMPLE_SPECIES
+import random
+import pytest
+
+
+@pytest.fixture
+def payoff_matrix():
+    return PayoffMatrix(3, 0, 5, 1)
+
+
+def test_from_counts_and_players():
+    tit4tat, defector = EXAMPLE_SPECIES["TitForTat"], EXAMPLE_SPECIES["AlwaysDefect"]
+    pop = CountPopulation.from_counts({tit4tat: 10, defector: 5})
+
+    assert pop.generation == 0
+    assert pop.population_size == 15
+    assert pop.population_average_age == 0
+    assert pop.get_population_counts() == {"TitForTat": 10, "AlwaysDefect": 5}
+    assert pop.get_top_species(1) == {"TitForTat": 10}
+
+    players = [Player(tit4tat, age=2), Player(tit4tat, age=2), Player(defector, age=0)]
+    pop = CountPopulation.from_players(players)
+    assert pop.cohorts == [{("TitForTat", 2): 2, ("AlwaysDefect", 0): 1}]
+    assert pop.population_average_age == 4 / 3
+
+
+def test_species_scores_match_population(payoff_matrix):
+    species = [EXAMPLE_SPECIES[name] for name in ("TitForTat", "AlwaysDefect", "Tester")]
+    players = [Player(strategy) for strategy in species for _ in range(4)]
+
+    pop = Population([players])
+    pop.do_generation(payoff_matrix=payoff_matrix, rounds=30, adjust_populations=False)
+
+    scores = CountPopulation.from_players(players).get_species_scores(payoff_matrix=payoff_matrix, rounds=30)
+
+    for player in players:
+        assert player.most_recent_score == pytest.approx(scores[player.strategy_name])
+
+
+def test_stochastic_species_scores(payoff_matrix):
+    random_, defector, random2 = (EXAMPLE_SPECIES[name] for name in ("Random", "AlwaysDefect", "Random2"))
+
+    # Memory-one pairs are scored exactly: Random gets 2.25 against itself and 0.5 against AlwaysDefect
+    scores = CountPopulation.from_counts({random_: 500, defector: 500}).get_species_scores(payoff_matrix=payoff_matrix, rounds=10)
+    assert scores["Random"] == pytest.approx((499 * 2.25 + 500 * 0.5) / 999)
+    assert scores["AlwaysDefect"] == pytest.approx((499 * 1 + 500 * 3) / 999)
+
+    # Random2 defects with probability 0.5 after the first round, so over 10 rounds it
+    # defects 45% of the time on average, and Random expects 0.55 * 4 + 0.45 * 0.5
+    random.seed(0)
+    pop = CountPopulation.from_counts({random_: 1, random2: 1}, stochastic_samples=2000)
+    scores = pop.get_species_scores(payoff_matrix=payoff_matrix, rounds=10)
+    assert scores["Random"] == pytest.approx(2.425, abs=0.05)
+    assert scores["Random2"] == pytest.approx(0.55 * 1.5 + 0.45 * 3, abs=0.05)
+
+    # More samples get closer to the expected score
+    def get_error(samples):
+        pop = CountPopulation.from_counts({random_: 1, random2: 1}, stochastic_samples=samples)
+        return abs(pop.get_species_scores(payoff_matrix=payoff_matrix, rounds=10)["Random"] - 2.425)
+
+    assert sum(map(get_error, [2000] * 10)) < sum(map(get_error, [5] * 10))
+
+    with pytest.raises(ValueError):
+        CountPopulation.from_counts({random_: 1}, stochastic_samples=0)
+
+
+def test_deterministic_reproduction(payoff_matrix):
+    cooperator = EXAMPLE_SPECIES["AlwaysCoop"]
+    pop = CountPopulation.from_counts({cooperator: 1_000_000})
+
+    # Everyone scores 3, so each player gets exactly 3 * 1_000_000 / 1_000_000 = 3 offspring
+    pop.do_generation(payoff_matrix=payoff_matrix, overall_food=1_000_000)
+
+    assert pop.generation == 1
+    assert pop.cohorts[-1] == {("AlwaysCoop", 1): 1_000_000, ("AlwaysCoop", 0): 2_000_000}
+    assert pop.population_average_age == 1 / 3
+
+
+def test_mutation():
+    random.seed(1)
+    cooperator, defector = EXAMPLE_SPECIES["AlwaysCoop"], EXAMPLE_SPECIES["AlwaysDefect"]
+    pop = CountPopulation.from_counts({cooperator: 1000})
+
+    pop.do_generation(overall_food=1000, mutation_probability=1, mutation_strategies=[defector])
+
+    assert pop.get_population_counts() == {"AlwaysCoop": 1000, "AlwaysDefect": 2000}
+    assert pop.get_population_counts(0) == {"AlwaysCoop": 1000, "AlwaysDefect": 0}
+
+    pop.do_generation(overall_food=1000, mutation_probability=1, mutation_strategies=[defector], can_mutate_parent=True)
+    assert pop.get_population_counts() == {"AlwaysCoop": 0, "AlwaysDefect": pop.population_size}
+
+
+def test_split_uniformly():
+    sizes = split_uniformly(1000, 4)
+    assert len(sizes) == 4
+    assert sum(sizes) == 1000
+    assert split_uniformly(0, 3) == [0, 0, 0]
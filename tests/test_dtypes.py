@@ -1,4 +1,4 @@
-from utils import Strategy, Action, History, round_probabilistically, PayoffMatrix, Player, flatten
+from utils import Strategy, Action, History, GameRecord, round_probabilistically, PayoffMatrix, Player, flatten
 from collections.abc import MutableSequence
 import pytest
 
@@ -219,3 +219,47 @@ def test_strategy():
     with pytest.raises(TypeError):
         Strategy()
 
+
+def test_history_tallies():
+    history = History(
+        own_moves=[Action.COOP, Action.DEFECT, Action.DEFECT],
+        opponent_moves=[Action.DEFECT, Action.DEFECT, Action.COOP],
+    )
+    assert history.own_defections == 2
+    assert history.opponent_defections == 2
+    assert history.own_streak == 2
+    assert history.opponent_streak == 1
+
+    history.append(Action.DEFECT, Action.COOP)
+    assert history.own_defections == 3
+    assert history.own_streak == 3
+    assert history.opponent_streak == 2
+
+    tally = history.get_outcome_tally()
+    assert (tally.coop_coop, tally.coop_defect, tally.defect_coop, tally.defect_defect) == (0, 1, 2, 1)
+
+    # Inverting swaps the tallies without recounting
+    inverted = ~history
+    assert inverted.own_defections == 2
+    assert inverted.opponent_defections == 3
+    assert inverted.own_streak == 2
+    assert inverted.opponent_streak == 3
+    assert inverted.get_outcome_tally() == tally.swapped()
+
+    assert History().own_streak == 0
+
+
+def test_game_record_views():
+    record = GameRecord()
+    first, second = record.views()
+
+    record.append(Action.COOP, Action.DEFECT)
+    second.append(Action.COOP, Action.DEFECT)  # The second player's perspective
+
+    assert first.own_moves == [Action.COOP, Action.DEFECT]
+    assert first.opponent_moves == [Action.DEFECT, Action.COOP]
+    assert second.own_moves is first.opponent_moves  # Shared, not copied
+    assert second.opponent_defections == 1
+    assert second.get_outcome_tally() == first.get_outcome_tally().swapped()
+    assert ~first == second
+    assert (~first).record is record
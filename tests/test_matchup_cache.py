@@ -0,0 +1,104 @@
+from utils import Player, Population, PayoffMatrix, MatchupCache, PersistentMatchupCache, Strategy, Action, battle
+from catalogue import EXAMPLE_SPECIES
+import random
+import pytest
+
+
+@pytest.fixture
+def payoff_matrix():
+    return PayoffMatrix.from_config("config.ini")
+
+
+def test_cached_score_matches_battle(payoff_matrix):
+    cache = MatchupCache()
+    tit4tat = Player(EXAMPLE_SPECIES["TitForTat"])
+    tester  = Player(EXAMPLE_SPECIES["Tester"])
+
+    expected = battle(tit4tat, tester, rounds=100, payoff_matrix=payoff_matrix)
+
+    assert cache.battle(tit4tat, tester, rounds=100, payoff_matrix=payoff_matrix) == expected
+    assert cache.battle(tit4tat, tester, rounds=100, payoff_matrix=payoff_matrix) == expected
+    assert cache.battle(tester, tit4tat, rounds=100, payoff_matrix=payoff_matrix) == expected[::-1]
+    assert cache.misses == 1
+    assert cache.hits == 2
+
+
+def test_cache_is_independent_of_payoff_matrix():
+    cache = MatchupCache()
+    defector = Player(EXAMPLE_SPECIES["AlwaysDefect"])
+    cooperator = Player(EXAMPLE_SPECIES["AlwaysCoop"])
+
+    assert cache.battle(defector, cooperator, rounds=10, payoff_matrix=PayoffMatrix(3, 0, 5, 1)) == (5, 0)
+    assert cache.battle(defector, cooperator, rounds=10, payoff_matrix=PayoffMatrix(5, -5, 10, -10)) == (10, -5)
+    assert cache.misses == 1
+
+
+@pytest.mark.parametrize("name", [name for name, strategy in EXAMPLE_SPECIES.items() if strategy.deterministic])
+def test_declared_deterministic_species_are_deterministic(name):
+    # Caching a single battle is only safe if the declaration is true
+    player = Player(EXAMPLE_SPECIES[name])
+    for opponent in EXAMPLE_SPECIES.values():
+        if not opponent.deterministic:
+            continue
+        scores = set()
+        for seed in range(5):
+            random.seed(seed)
+            scores.add(battle(player, Player(opponent), rounds=30))
+        assert len(scores) == 1, f"{name} vs {type(opponent).__name__}"
+
+
+def test_stochastic_species_opt_out():
+    cache = MatchupCache()
+    joss = Player(EXAMPLE_SPECIES["Joss"])
+    tit4tat = Player(EXAMPLE_SPECIES["TitForTat"])
+
+    for _ in range(5):
+        cache.battle(joss, tit4tat, rounds=20)
+
+    assert cache.misses == 5
+    assert len(cache) == 0
+
+
+def test_undeclared_strategy_is_never_cached(tmp_path):
+    class Undeclared(Strategy):
+        """Defects at random, without declaring itself stochastic."""
+        def decide(self, history):
+            return Action.DEFECT if random.random() < 0.5 else Action.COOP
+
+    players = Player(Undeclared()), Player(EXAMPLE_SPECIES["TitForTat"])
+
+    def check(cache):
+        for _ in range(5):
+            cache.battle(*players, rounds=20)
+        assert (cache.hits, cache.misses) == (0, 5)
+        assert len(cache) == 0
+
+    check(MatchupCache())
+    with PersistentMatchupCache(tmp_path / "tallies.sqlite") as cache:
+        check(cache)
+
+
+def test_stochastic_samples():
+    cache = MatchupCache(stochastic_samples=3)
+    joss = Player(EXAMPLE_SPECIES["Joss"])
+    tit4tat = Player(EXAMPLE_SPECIES["TitForTat"])
+
+    for _ in range(10):
+        cache.battle(joss, tit4tat, rounds=20)
+
+    assert cache.misses == 3
+    assert cache.hits == 7
+
+    with pytest.raises(ValueError):
+        MatchupCache(stochastic_samples=-1)
+
+
+def test_population_uses_cache():
+    cache = MatchupCache()
+    species = [EXAMPLE_SPECIES[name] for name in ("TitForTat", "AlwaysDefect", "Pavlov")]
+    pop = Population([[Player(strategy) for strategy in species for _ in range(10)]], matchup_cache=cache)
+
+    pop.do_generation(rounds=20, overall_food=30)
+
+    assert cache.misses <= len(species) ** 2
+    assert cache.hits + cache.misses == 30 * 29 // 2
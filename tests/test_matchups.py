@@ -0,0 +1,53 @@
+from utils import Player, Population
+from utils.matchups import sample_pairs, sample_opponents
+from catalogue import EXAMPLE_SPECIES
+from collections import Counter
+import itertools as it
+import random
+import pytest
+
+
+def test_sample_all_pairs():
+    assert list(sample_pairs(6, 1.0)) == list(it.combinations(range(6), 2))
+    assert list(sample_pairs(6, 0.0)) == []
+    # Rates just below 1 give all pairs too, through the skipping code
+    assert list(sample_pairs(6, 1 - 1e-12)) == list(it.combinations(range(6), 2))
+    assert list(sample_pairs(6, 1 - 1e-12, range(2, 4))) == [(2, 3), (2, 4), (2, 5), (3, 4), (3, 5)]
+
+
+def test_sample_pairs_uniformly():
+    random.seed(0)
+    samples = 10_000
+    counts = Counter(pair for _ in range(samples) for pair in sample_pairs(7, 0.2))
+    assert set(counts) == set(it.combinations(range(7), 2))
+    for count in counts.values():
+        assert count / samples == pytest.approx(0.2, abs=0.025)
+
+
+def test_sparse_sampling_is_fast():
+    random.seed(1)
+    # 5 * 10^9 possible pairs, which would take far too long to go through one by one
+    pairs = list(sample_pairs(100_000, 1e-6))
+    assert 3_000 < len(pairs) < 7_000
+    assert all(0 <= i < j < 100_000 for i, j in pairs)
+
+
+def test_sample_opponents():
+    random.seed(2)
+    pairs = list(sample_opponents(10, 3))
+    assert len(pairs) == 30
+    assert all(i != j for i, j in pairs)
+    for player in range(10):
+        assert len({j for i, j in pairs if i == player}) == 3
+
+    with pytest.raises(ValueError):
+        list(sample_opponents(10, 10))
+
+
+def test_generation_with_opponents():
+    random.seed(3)
+    population = Population([[Player(EXAMPLE_SPECIES[name]) for name in ["TitForTat", "AlwaysCoop"] for _ in range(20)]])
+    population.do_generation(rounds=10, opponents=4, adjust_populations=False)
+    # Everyone cooperates, so every battle is worth 3 points, and players battle 8 times on average
+    mean_score = sum(player.most_recent_score for player in population.get_players()) / population.population_size
+    assert mean_score == pytest.approx(3)
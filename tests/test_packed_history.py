@@ -0,0 +1,65 @@
+from utils import Action, History, Player, PackedMoves, PackedGameRecord
+from utils.packed_history import get_packed_outcome_tally, load_history
+from catalogue import EXAMPLE_SPECIES
+import pytest
+
+
+COOP, DEFECT = Action.COOP, Action.DEFECT
+
+
+def test_packed_moves():
+    moves_list = [COOP, DEFECT, DEFECT, COOP, COOP, COOP, DEFECT, COOP, DEFECT, DEFECT]
+    moves = PackedMoves(moves_list)
+
+    assert len(moves) == 10
+    assert len(moves.bits) == 2
+    assert list(moves) == moves_list
+    assert moves == moves_list
+    assert moves[0] is COOP
+    assert moves[-1] is DEFECT
+    assert moves[2:5] == moves_list[2:5]
+    assert moves.count(DEFECT) == 5
+    assert moves.count(COOP) == 5
+
+    with pytest.raises(IndexError):
+        moves[10]
+
+    restored = PackedMoves.from_bytes(moves.to_bytes(), len(moves))
+    assert restored == moves
+
+
+@pytest.mark.parametrize("opponent", ["Tester", "Pavlov", "Majority", "TitForTwoTats"])
+def test_packed_battle_matches_list_battle(opponent):
+    player1, player2 = Player(EXAMPLE_SPECIES["ThreeChances"]), Player(EXAMPLE_SPECIES[opponent])
+
+    expected = player1.get_battle_history(player2, rounds=101)
+    history = player1.get_battle_history(player2, rounds=101, record_type=PackedGameRecord)
+
+    assert isinstance(history.own_moves, PackedMoves)
+    assert history == expected
+    assert history.get_outcome_tally() == expected.get_outcome_tally()
+    assert history.get_outcome_tally() == get_packed_outcome_tally(history.own_moves, history.opponent_moves)
+    assert history.get_score() == expected.get_score()
+
+
+def test_archive_round_trip():
+    history = Player(EXAMPLE_SPECIES["Tester"]).get_battle_history(
+        Player(EXAMPLE_SPECIES["TitForTat"]), rounds=1_000, record_type=PackedGameRecord
+    )
+    data = history.record.to_bytes()
+
+    assert len(data) == 8 + 2 * 125
+
+    loaded = load_history(data)
+    assert loaded == history
+    assert loaded.get_outcome_tally() == history.get_outcome_tally()
+    assert (loaded.own_defections, loaded.opponent_defections) == (history.own_defections, history.opponent_defections)
+    assert (loaded.own_streak, loaded.opponent_streak) == (history.own_streak, history.opponent_streak)
+
+
+def test_packed_history_from_moves():
+    history = History.from_record(PackedGameRecord([COOP, DEFECT, DEFECT], [DEFECT, DEFECT, COOP]), 0)
+
+    assert history.own_streak == 2
+    assert history.opponent_defections == 2
+    assert (~history).own_moves == [DEFECT, DEFECT, COOP]
@@ -0,0 +1,67 @@
+from utils import Player, Population, PayoffMatrix, MatchupCache, SimulationStats
+from utils.parallel import get_parallel_scores, split_rows
+from catalogue import EXAMPLE_SPECIES
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import pytest
+
+
+SPECIES = ["TitForTat", "Joss", "AlwaysDefect", "Random", "Majority"]
+
+
+# Forking a process that already has executor threads is deprecated
+SPAWN = multiprocessing.get_context("spawn")
+
+
+@pytest.fixture
+def players():
+    return [Player(EXAMPLE_SPECIES[name]) for name in SPECIES for _ in range(8)]
+
+
+def test_split_rows():
+    for population_size, chunk_size in [(0, 10), (1, 10), (2, 1), (40, 50), (100, 1_000_000)]:
+        chunks = split_rows(population_size, chunk_size)
+        rows = [row for chunk in chunks for row in chunk]
+        assert rows == list(range(population_size - 1))
+
+
+def test_reproducible_whatever_the_worker_count(players):
+    kwargs = dict(matchup_rate=0.7, payoff_matrix=PayoffMatrix(3, 0, 5, 1), rounds=20, seed=42, chunk_size=100)
+
+    serial = get_parallel_scores(players, None, **kwargs)
+    with ProcessPoolExecutor(max_workers=1, mp_context=SPAWN) as executor:
+        one_worker = get_parallel_scores(players, executor, **kwargs)
+    with ProcessPoolExecutor(max_workers=3, mp_context=SPAWN) as executor:
+        three_workers = get_parallel_scores(players, executor, **kwargs)
+
+    assert serial == one_worker == three_workers
+    assert serial != get_parallel_scores(players, None, **{**kwargs, "seed": 43})
+
+
+def test_deterministic_species_match_serial_scores(players):
+    players = [player for player in players if player.strategy.deterministic]
+    expected = [Player(player.strategy) for player in players]
+    Population([expected]).do_generation(rounds=20, adjust_populations=False)
+
+    pop = Population([players], matchup_cache=MatchupCache())
+    with ProcessPoolExecutor(max_workers=2, mp_context=SPAWN) as executor:
+        pop.do_generation(rounds=20, adjust_populations=False, executor=executor, seed=0)
+
+    for player, expected_player in zip(players, expected):
+        assert player.most_recent_score == pytest.approx(expected_player.most_recent_score)
+
+
+def test_options_reach_the_workers():
+    # Memory-one species, so that expected payoffs don't depend on the RNG
+    players = [Player(EXAMPLE_SPECIES[name]) for name in ["Joss", "Random", "TitForTat", "AlwaysDefect"] for _ in range(4)]
+    expected = [Player(player.strategy) for player in players]
+    Population([expected]).do_generation(rounds=20, adjust_populations=False, expected_payoffs=True)
+
+    stats = SimulationStats()
+    pop = Population([players], stats=stats)
+    with ProcessPoolExecutor(max_workers=2, mp_context=SPAWN) as executor:
+        pop.do_generation(rounds=20, adjust_populations=False, expected_payoffs=True, executor=executor, seed=0)
+
+    for player, expected_player in zip(players, expected):
+        assert player.most_recent_score == pytest.approx(expected_player.most_recent_score)
+    assert stats.battles == len(players) * (len(players) - 1) // 2
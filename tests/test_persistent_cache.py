@@ -0,0 +1,122 @@
+from utils import Player, Population, PayoffMatrix, PersistentMatchupCache, battle
+from utils.persistent_cache import get_strategy_digest
+from catalogue import EXAMPLE_SPECIES
+import importlib.util
+import random
+import sys
+import pytest
+
+
+PAYOFF_MATRIX = PayoffMatrix(3, 0, 5, 1)
+
+
+@pytest.fixture
+def path(tmp_path):
+    return tmp_path / "cache" / "tallies.sqlite"
+
+
+def load_strategy(tmp_path, monkeypatch, action):
+    """(Re)writes the module `flip` with a strategy class `Flip` that always plays `action`, and loads it."""
+    file = tmp_path / "flip.py"
+    file.write_text(
+        "from utils import Strategy, Action\n"
+        "class Flip(Strategy):\n"
+        "    deterministic = True\n"
+        "    def decide(self, history):\n"
+        f"        return Action.{action}\n"
+    )
+    spec = importlib.util.spec_from_file_location("flip", file)
+    module = importlib.util.module_from_spec(spec)
+    monkeypatch.setitem(sys.modules, "flip", module)
+    spec.loader.exec_module(module)
+    return module.Flip
+
+
+def test_restart_is_warm(path):
+    tit4tat = Player(EXAMPLE_SPECIES["TitForTat"])
+    tester = Player(EXAMPLE_SPECIES["Tester"])
+    expected = battle(tit4tat, tester, rounds=100, payoff_matrix=PAYOFF_MATRIX)
+
+    with PersistentMatchupCache(path) as cache:
+        assert cache.battle(tit4tat, tester, rounds=100, payoff_matrix=PAYOFF_MATRIX) == expected
+        assert cache.misses == 1
+
+    with PersistentMatchupCache(path) as cache:
+        assert cache.battle(tit4tat, tester, rounds=100, payoff_matrix=PAYOFF_MATRIX) == expected
+        assert cache.battle(tester, tit4tat, rounds=100, payoff_matrix=PAYOFF_MATRIX) == expected[::-1]
+        assert cache.battle(tit4tat, tester, rounds=10, payoff_matrix=PAYOFF_MATRIX) == battle(tit4tat, tester, rounds=10, payoff_matrix=PAYOFF_MATRIX)
+        assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_population_starts_warm(path):
+    strategies = [EXAMPLE_SPECIES[name] for name in ("TitForTat", "AlwaysDefect", "Tester", "Pavlov")]
+    players = [Player(strategy) for strategy in strategies for _ in range(3)]
+
+    with PersistentMatchupCache(path) as cache:
+        Population([list(players)], matchup_cache=cache).do_generation(rounds=20, overall_food=12, payoff_matrix=PAYOFF_MATRIX)
+        assert cache.misses > 0
+
+    with PersistentMatchupCache(path) as cache:
+        Population([list(players)], matchup_cache=cache).do_generation(rounds=20, overall_food=12, payoff_matrix=PAYOFF_MATRIX)
+        assert cache.misses == 0
+
+
+def test_changed_source_is_a_miss(tmp_path, monkeypatch, path):
+    cooperator = Player(EXAMPLE_SPECIES["AlwaysCoop"])
+
+    old = load_strategy(tmp_path, monkeypatch, "COOP")
+    old_digest = get_strategy_digest(old)
+    with PersistentMatchupCache(path) as cache:
+        assert cache.battle(Player(old()), cooperator, rounds=10, payoff_matrix=PAYOFF_MATRIX) == (3, 3)
+
+    new = load_strategy(tmp_path, monkeypatch, "DEFECT")
+    assert get_strategy_digest(new) not in (None, old_digest)
+    with PersistentMatchupCache(path) as cache:
+        assert cache.battle(Player(new()), cooperator, rounds=10, payoff_matrix=PAYOFF_MATRIX) == (5, 0)
+        assert cache.misses == 1
+
+
+def test_strategy_without_source_is_not_stored(path):
+    # Classes made with `type` have no source to hash
+    Unsourced = type("Unsourced", (type(EXAMPLE_SPECIES["AlwaysCoop"]),), {})
+    assert get_strategy_digest(Unsourced) is None
+    players = Player(Unsourced()), Player(EXAMPLE_SPECIES["AlwaysDefect"])
+
+    for _ in range(2):
+        with PersistentMatchupCache(path) as cache:
+            assert cache.battle(*players, rounds=10, payoff_matrix=PAYOFF_MATRIX) == (0, 5)
+            assert cache.misses == 1
+
+
+def test_stochastic_samples_depend_on_seed(tmp_path):
+    joss, tit4tat = Player(EXAMPLE_SPECIES["Joss"]), Player(EXAMPLE_SPECIES["TitForTat"])
+
+    def get_samples(filename, seed):
+        random.seed(0)
+        with PersistentMatchupCache(tmp_path / filename, stochastic_samples=5, seed=seed) as cache:
+            for _ in range(5):
+                cache.get_tally(joss, tit4tat, rounds=100)
+            # Playing the samples doesn't disturb the global RNG
+            assert random.getstate() == random.Random(0).getstate()
+            for _ in range(15):
+                cache.get_tally(joss, tit4tat, rounds=100)
+            assert cache.misses == 5
+            return cache._tallies[(type(joss.strategy), type(tit4tat.strategy), 100)]
+
+    samples = get_samples("a.sqlite", seed=1)
+    assert get_samples("b.sqlite", seed=1) == samples
+    assert get_samples("c.sqlite", seed=2) != samples
+
+    with PersistentMatchupCache(tmp_path / "a.sqlite", stochastic_samples=3, seed=1) as cache:
+        cache.get_tally(joss, tit4tat, rounds=100)
+        assert (cache.hits, cache.misses) == (1, 0)
+
+
+def test_clear_empties_the_file(path):
+    players = Player(EXAMPLE_SPECIES["AlwaysCoop"]), Player(EXAMPLE_SPECIES["AlwaysDefect"])
+    with PersistentMatchupCache(path) as cache:
+        cache.battle(*players, rounds=10)
+        cache.clear()
+    with PersistentMatchupCache(path) as cache:
+        cache.battle(*players, rounds=10)
+        assert cache.misses == 1
@@ -0,0 +1,76 @@
+from utils import Player, Population, PlayerTable, PlayerHandle
+from catalogue import EXAMPLE_SPECIES
+import random
+import sys
+import pytest
+
+
+TIT_FOR_TAT, ALWAYS_DEFECT = EXAMPLE_SPECIES["TitForTat"], EXAMPLE_SPECIES["AlwaysDefect"]
+
+
+def test_players_have_no_dict():
+    player = Player(TIT_FOR_TAT)
+    assert not hasattr(player, "__dict__")
+    assert player.strategy_name == "TitForTat"
+    player.change_strategy(ALWAYS_DEFECT)
+    assert player.strategy_name == "AlwaysDefect"
+
+
+def test_table_round_trip():
+    players = [Player(TIT_FOR_TAT, age=3, most_recent_score=1.5), Player(ALWAYS_DEFECT, age=1), Player(TIT_FOR_TAT)]
+    table = PlayerTable.from_players(players)
+    assert len(table) == 3
+    assert table.strategies == [TIT_FOR_TAT, ALWAYS_DEFECT]
+    assert list(table.species) == [0, 1, 0]
+    assert [(player.strategy, player.age, player.most_recent_score) for player in table.to_players()] == [
+        (player.strategy, player.age, player.most_recent_score) for player in players
+    ]
+    assert table.get_population_counts() == {"TitForTat": 2, "AlwaysDefect": 1}
+    assert table.get_species_total_ages() == [3, 1]
+    assert table.average_age == pytest.approx(4 / 3)
+
+
+def test_handles():
+    table = PlayerTable.from_players([Player(TIT_FOR_TAT), Player(ALWAYS_DEFECT)])
+    handle = table[-1]
+    assert isinstance(handle, PlayerHandle) and isinstance(handle, Player)
+    assert handle == table[1] and handle != table[0]
+    assert len({table[0], table[0], table[1]}) == 2
+
+    handle.age += 2
+    handle.most_recent_score += 0.5
+    handle.change_strategy(TIT_FOR_TAT)
+    assert (table.ages[1], table.scores[1], table.species[1]) == (2, 0.5, 0)
+    assert handle.strategy_name == "TitForTat"
+
+    with pytest.raises(IndexError):
+        table[2]
+    assert table[:1] == [table[0]]
+
+
+def test_table_is_compact():
+    table = PlayerTable.from_players(Player(TIT_FOR_TAT) for _ in range(10_000))
+    table_bytes = sum(array.buffer_info()[1] * array.itemsize for array in (table.species, table.ages, table.scores))
+    assert table_bytes / len(table) == 20
+    assert table_bytes / len(table) < sys.getsizeof(Player(TIT_FOR_TAT))
+
+
+def test_population_of_tables():
+    def new_generation():
+        return [Player(strategy) for strategy in (TIT_FOR_TAT, ALWAYS_DEFECT) for _ in range(10)]
+
+    for batched_reproduction in (False, True):
+        random.seed(0)
+        regular = Population([new_generation()])
+        for _ in range(3):
+            regular.do_generation(rounds=10, overall_food=10, batched_reproduction=batched_reproduction)
+
+        random.seed(0)
+        tabled = Population([PlayerTable.from_players(new_generation())])
+        for _ in range(3):
+            tabled.do_generation(rounds=10, overall_food=10, batched_reproduction=batched_reproduction)
+
+        assert isinstance(tabled.get_players(), PlayerTable)
+        assert [tabled.get_population_counts(gen) for gen in range(4)] == [regular.get_population_counts(gen) for gen in range(4)]
+        assert [tabled.get_species_mean_scores(gen) for gen in range(3)] == [regular.get_species_mean_scores(gen) for gen in range(3)]
+        assert tabled.population_average_age == regular.population_average_age
@@ -0,0 +1,70 @@
+from utils import Player, Population, PayoffMatrix, flatten
+from catalogue import EXAMPLE_SPECIES
+import random
+import pytest
+
+
+@pytest.fixture
+def population():
+    random.seed(0)
+    species = [EXAMPLE_SPECIES[name] for name in ("TitForTat", "AlwaysDefect", "AlwaysCoop", "Joss")]
+    return Population([[Player(strategy) for strategy in species for _ in range(5)]])
+
+
+def test_population_counts_match_players(population):
+    mutation_strategies = [EXAMPLE_SPECIES["Pavlov"], EXAMPLE_SPECIES["TitForTat"]]
+    for _ in range(5):
+        population.do_generation(rounds=10, overall_food=20, mutation_probability=0.2, mutation_strategies=mutation_strategies)
+
+    all_species = list(dict.fromkeys(player.strategy_name for player in flatten(population.players)))
+    assert population.species == all_species
+
+    for gen in range(population.generation + 1):
+        names = [player.strategy_name for player in population.players[gen]]
+        assert population.get_population_counts(gen) == {name: names.count(name) for name in all_species}
+
+    ages = [player.age for player in population.players[-1]]
+    assert population.population_average_age == pytest.approx(sum(ages) / len(ages))
+
+
+def test_species_means(population):
+    payoff_matrix = PayoffMatrix(3, 0, 5, 1)
+    assert population.get_species_mean_scores() == {}
+    assert population.get_species_mean_ages() == {"TitForTat": 0, "AlwaysDefect": 0, "AlwaysCoop": 0, "Joss": 0}
+
+    population.do_generation(payoff_matrix=payoff_matrix, rounds=10, adjust_populations=False)
+
+    scores = population.get_species_mean_scores()
+    for name in ("TitForTat", "AlwaysDefect", "AlwaysCoop"):
+        players = [player for player in population.players[-1] if player.strategy_name == name]
+        assert scores[name] == pytest.approx(sum(player.most_recent_score for player in players) / len(players))
+    # Defectors exploit cooperators, so they should score better than them
+    assert scores["AlwaysDefect"] > scores["AlwaysCoop"]
+
+
+def test_retained_generations():
+    random.seed(0)
+    species = [EXAMPLE_SPECIES[name] for name in ("TitForTat", "AlwaysDefect")]
+    population = Population([[Player(strategy) for strategy in species for _ in range(5)]], retained_generations=2)
+    unbounded = Population([[Player(strategy) for strategy in species for _ in range(5)]])
+
+    for _ in range(6):
+        state = random.getstate()
+        population.do_generation(rounds=10, overall_food=10)
+        random.setstate(state)
+        unbounded.do_generation(rounds=10, overall_food=10)
+
+    assert population.generation == unbounded.generation == 6
+    assert len(population.players) == 2
+    assert population.get_players() is population.players[-1]
+    assert population.get_players(5) is population.players[0]
+    assert population.get_players(-2) is population.players[0]
+    with pytest.raises(IndexError):
+        population.get_players(4)
+
+    for gen in range(population.generation + 1):
+        assert population.get_population_counts(gen) == unbounded.get_population_counts(gen)
+    assert population.population_average_age == unbounded.population_average_age
+
+    with pytest.raises(ValueError):
+        Population([[Player(species[0])]], retained_generations=0)
@@ -0,0 +1,52 @@
+from utils import Player, Population, MatchupCache, SimulationStats, battle
+from catalogue import EXAMPLE_SPECIES
+import pytest
+
+
+def test_battle_stats():
+    stats = SimulationStats()
+    majority, tit4tat = Player(EXAMPLE_SPECIES["Majority"]), Player(EXAMPLE_SPECIES["TitForTat"])
+
+    profiled = battle(majority, tit4tat, rounds=30, stats=stats)
+
+    assert profiled == battle(majority, tit4tat, rounds=30)
+    assert stats.battles == 1
+    assert stats.rounds == 30
+    assert stats.strategies["Majority"].decide_calls == 30
+    assert stats.strategies["TitForTat"].decide_calls == 30
+    assert stats.strategies["Majority"].decide_seconds > 0
+    assert stats.strategies["Majority"].seconds_per_call == pytest.approx(stats.strategies["Majority"].decide_seconds / 30)
+
+
+def test_generation_stats():
+    stats = SimulationStats()
+    species = [EXAMPLE_SPECIES[name] for name in ("TitForTat", "AlwaysDefect", "Majority")]
+    population = Population([[Player(strategy) for strategy in species for _ in range(4)]], matchup_cache=MatchupCache(), stats=stats)
+
+    population.do_generation(rounds=10, overall_food=12)
+
+    assert stats.generations == 1
+    assert set(stats.phase_seconds) == {"battles", "reproduction"}
+    # Only battles that weren't found in the cache are simulated, i.e. one per pair of species
+    assert stats.battles == population.matchup_cache.misses == 6
+    # TitForTat and AlwaysDefect have state machines, so only the 3 battles
+    # involving Majority are played round by round
+    assert stats.rounds == 3 * 10
+    assert stats.scored_rounds == 6 * 10
+    assert sum(strategy_stats.decide_calls for strategy_stats in stats.strategies.values()) == 2 * 3 * 10
+
+    stats.reset()
+    assert stats == SimulationStats()
+
+
+def test_merge_stats():
+    majority, tit4tat = Player(EXAMPLE_SPECIES["Majority"]), Player(EXAMPLE_SPECIES["TitForTat"])
+    stats, other = SimulationStats(), SimulationStats()
+    battle(majority, tit4tat, rounds=30, stats=stats)
+    battle(majority, majority, rounds=20, stats=other)
+
+    stats.merge(other)
+
+    assert (stats.battles, stats.rounds) == (2, 50)
+    assert stats.strategies["Majority"].decide_calls == 70
+    assert stats.strategies["TitForTat"].decide_calls == 30
@@ -0,0 +1,99 @@
+from utils import Player, Population, PlayerTable
+from utils.reproduction import reproduce, get_offspring_counts
+from catalogue import EXAMPLE_SPECIES
+from collections import Counter
+import random
+import sys
+import pytest
+
+
+TIT_FOR_TAT, ALWAYS_DEFECT, ALWAYS_COOP = (EXAMPLE_SPECIES[name] for name in ["TitForTat", "AlwaysDefect", "AlwaysCoop"])
+
+
+def scored_players(score, count, strategy, age=0):
+    return [Player(strategy, most_recent_score=score, age=age) for _ in range(count)]
+
+
+def test_whole_offspring():
+    # 10 players, scores * food / size = 3 and 0 offspring
+    players = scored_players(3, 5, TIT_FOR_TAT, age=4) + scored_players(0, 5, ALWAYS_DEFECT)
+    new_generation = reproduce(players, overall_food=10)
+    assert Counter(player.strategy_name for player in new_generation) == {"TitForTat": 15}
+    assert Counter(player.age for player in new_generation) == {5: 5, 0: 10}
+
+
+def test_fractional_offspring_and_mutations():
+    random.seed(0)
+    # 1.5 expected offspring each, so 1 or 2 at random
+    players = scored_players(1.5, 2_000, TIT_FOR_TAT, age=1)
+    new_generation = reproduce(
+        players,
+        overall_food=2_000,
+        mutation_strategies=[ALWAYS_DEFECT, ALWAYS_COOP],
+        mutation_probability=0.2,
+    )
+    assert len(new_generation) == pytest.approx(3_000, rel=0.05)
+
+    # Parents never mutate unless `can_mutate_parent` is True
+    parents = [player for player in new_generation if player.age == 2]
+    assert len(parents) == 2_000
+    assert all(player.strategy_name == "TitForTat" for player in parents)
+
+    children = Counter(player.strategy_name for player in new_generation if player.age == 0)
+    total = sum(children.values())
+    assert children["AlwaysDefect"] / total == pytest.approx(0.1, abs=0.03)
+    assert children["AlwaysCoop"] / total == pytest.approx(0.1, abs=0.03)
+
+
+def test_can_mutate_parent():
+    random.seed(1)
+    players = scored_players(1, 1_000, TIT_FOR_TAT, age=7)
+    new_generation = reproduce(players, overall_food=1_000, mutation_strategies=[ALWAYS_DEFECT], mutation_probability=0.5, can_mutate_parent=True)
+    assert len(new_generation) == 1_000
+    assert all(player.age == 8 for player in new_generation)
+    mutated = sum(player.strategy_name == "AlwaysDefect" for player in new_generation)
+    assert mutated == pytest.approx(500, abs=75)
+
+
+def test_negative_offspring():
+    with pytest.raises(ValueError):
+        reproduce(scored_players(-1, 2, TIT_FOR_TAT), overall_food=10)
+
+
+def test_batched_reproduction_matches_distribution():
+    def mean_size(batched):
+        random.seed(2)
+        sizes = []
+        for _ in range(30):
+            population = Population([[Player(strategy) for strategy in [TIT_FOR_TAT, ALWAYS_DEFECT, ALWAYS_COOP] for _ in range(10)]])
+            population.do_generation(rounds=10, overall_food=20, batched_reproduction=batched, mutation_probability=0.1, mutation_strategies=[ALWAYS_DEFECT])
+            sizes.append(population.population_size)
+        return sum(sizes) / len(sizes)
+
+    assert mean_size(True) == pytest.approx(mean_size(False), rel=0.1)
+
+
+@pytest.mark.parametrize("numpy_installed", [True, False])
+def test_offspring_counts(numpy_installed, monkeypatch):
+    if numpy_installed:
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setitem(sys.modules, "numpy", None)
+    random.seed(3)
+    # 10 players with 0.5, 1.5 and 3 expected offspring
+    scores = [0.5] * 4 + [1.5] * 4 + [3, 3]
+    draws = [get_offspring_counts(scores, overall_food=10) for _ in range(1_000)]
+    assert all(counts[0] in (0, 1) and counts[4] in (1, 2) and counts[-1] == 3 for counts in draws)
+    assert sum(counts[0] + counts[4] for counts in draws) / len(draws) == pytest.approx(2, rel=0.05)
+
+    random.seed(3)
+    assert get_offspring_counts(scores, overall_food=10) == draws[0]
+    assert get_offspring_counts([], overall_food=10) == []
+
+
+def test_reproduce_player_table():
+    random.seed(4)
+    table = PlayerTable.from_players(scored_players(2, 10, TIT_FOR_TAT, age=1) + scored_players(0, 10, ALWAYS_DEFECT))
+    new_generation = reproduce(table, overall_food=20)
+    assert isinstance(new_generation, PlayerTable)
+    assert Counter(player.strategy_name for player in new_generation) == {"TitForTat": 20}
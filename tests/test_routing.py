@@ -0,0 +1,104 @@
+from utils import Player, Strategy, Action, StateMachine, MemoryOne, MatchupCache, SimulationStats, battle
+from utils.routing import BattlePath, choose_battle_path, route_matchups
+from utils.analytic import get_state_machine, get_cyclic_tally
+from catalogue import EXAMPLE_SPECIES
+import itertools as it
+import random
+import pytest
+
+
+def test_catalogue_declarations():
+    for name, strategy in EXAMPLE_SPECIES.items():
+        if strategy.memory_one is not None:
+            assert strategy.memory_depth is not None and strategy.memory_depth <= 1, name
+            assert strategy.memory_one.is_deterministic == strategy.deterministic, name
+        if strategy.state_machine is not None:
+            assert strategy.deterministic, name
+
+
+@pytest.mark.parametrize("name", [name for name, strategy in EXAMPLE_SPECIES.items() if strategy.memory_one is not None and strategy.deterministic])
+def test_memory_one_state_machines(name):
+    machine = EXAMPLE_SPECIES[name].memory_one.to_state_machine()
+    for opponent in EXAMPLE_SPECIES.values():
+        opponent_machine = get_state_machine(opponent)
+        if opponent_machine is None:
+            continue
+        expected = Player(EXAMPLE_SPECIES[name]).get_battle_history(Player(opponent), rounds=25).get_outcome_tally()
+        assert get_cyclic_tally(machine, opponent_machine, rounds=25) == expected
+
+    with pytest.raises(ValueError):
+        EXAMPLE_SPECIES["Joss"].memory_one.to_state_machine()
+
+
+class Undeclared(Strategy):
+    """Tit for Tat that forgives at random, without saying so."""
+    memory_depth = 1
+
+    def decide(self, history):
+        if history.opponent_moves and random.random() < 0.5:
+            return history.opponent_moves[-1]
+        return Action.COOP
+
+
+class BoundedMemory(Strategy):
+    """Tit for Tat without a state machine."""
+    deterministic = True
+    memory_depth = 1
+
+    def decide(self, history):
+        return history.opponent_moves[-1] if history.opponent_moves else Action.COOP
+
+
+def test_choose_battle_path():
+    tit_for_tat, majority, joss, generous = (EXAMPLE_SPECIES[name] for name in ["TitForTat", "Majority", "Joss", "GenerousTitForTat"])
+    cache = MatchupCache()
+
+    assert choose_battle_path(tit_for_tat, tit_for_tat) is BattlePath.CYCLIC
+    assert choose_battle_path(tit_for_tat, tit_for_tat, vectorized=True) is BattlePath.VECTORIZED
+    assert choose_battle_path(tit_for_tat, majority, cache=cache) is BattlePath.CACHED
+    assert choose_battle_path(tit_for_tat, majority) is BattlePath.PLAIN
+    assert choose_battle_path(tit_for_tat, BoundedMemory()) is BattlePath.BOUNDED_MEMORY
+    assert choose_battle_path(BoundedMemory(), EXAMPLE_SPECIES["Tester"]) is BattlePath.PLAIN  # Unbounded memory
+    # Without declarations, a strategy is assumed to be random
+    assert choose_battle_path(tit_for_tat, Undeclared(), cache=cache) is BattlePath.PLAIN
+    assert choose_battle_path(joss, generous) is BattlePath.PLAIN
+    assert choose_battle_path(joss, generous, cache=cache) is BattlePath.PLAIN
+    assert choose_battle_path(joss, generous, cache=MatchupCache(stochastic_samples=3)) is BattlePath.CACHED
+    assert choose_battle_path(joss, generous, expected_payoffs=True, cache=MatchupCache(stochastic_samples=3)) is BattlePath.EXPECTED
+
+
+def test_battle_skips_decide_for_state_machines():
+    class Declared(Strategy):
+        state_machine = StateMachine(actions=(Action.COOP, Action.DEFECT), transitions=((0, 1), (0, 1)))
+
+        def decide(self, history):
+            raise AssertionError("Should have been scored from the state machine")
+
+    player = Player(Declared())
+    assert battle(player, Player(EXAMPLE_SPECIES["Tester"]), rounds=10**6) == battle(
+        Player(EXAMPLE_SPECIES["TitForTat"]), Player(EXAMPLE_SPECIES["Tester"]), rounds=10**6
+    )
+
+
+def test_route_matchups():
+    names = ["TitForTat", "Majority", "Tester", "ThreeChances", "Pavlov"]
+    matchups = [(Player(EXAMPLE_SPECIES[a]), Player(EXAMPLE_SPECIES[b])) for a, b in it.combinations_with_replacement(names, 2)]
+    expected = [player1.get_battle_history(player2, rounds=40).get_score() for player1, player2 in matchups]
+
+    assert route_matchups(matchups, rounds=40) == pytest.approx(expected)
+    cache = MatchupCache()
+    assert route_matchups(matchups, rounds=40, cache=cache) == pytest.approx(expected)
+    assert cache.misses == len(matchups)
+
+
+def test_stats_count_played_rounds():
+    stats = SimulationStats()
+    tit_for_tat, joss = Player(EXAMPLE_SPECIES["TitForTat"]), Player(EXAMPLE_SPECIES["Joss"])
+    matchups = [(tit_for_tat, tit_for_tat), (Player(BoundedMemory()), Player(BoundedMemory())), (joss, joss)]
+
+    route_matchups(matchups, rounds=100, expected_payoffs=True, stats=stats)
+
+    # Only the bounded-memory battle plays rounds, until its window of 1 round repeats
+    assert stats.battles == 3
+    assert stats.scored_rounds == 3 * 100
+    assert 0 < stats.rounds <= 4 + 1
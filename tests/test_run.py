@@ -0,0 +1,82 @@
+from utils import Player, Population, PayoffMatrix, SimulationStats, StopReason, Checkpointer, load_checkpoint
+from catalogue import EXAMPLE_SPECIES
+import random
+import pytest
+
+
+PAYOFF_MATRIX = PayoffMatrix(3, 0, 5, 1)
+
+
+def players(**counts):
+    return [Player(EXAMPLE_SPECIES[name]) for name, count in counts.items() for _ in range(count)]
+
+
+def test_run_generations():
+    random.seed(0)
+    population = Population([players(TitForTat=10, AlwaysDefect=10, Joss=10)])
+    assert population.run(5, rounds=10, overall_food=30, payoff_matrix=PAYOFF_MATRIX) is StopReason.GENERATIONS
+    assert population.generation == 5
+    assert population.run(3, rounds=10, overall_food=30, payoff_matrix=PAYOFF_MATRIX) is StopReason.GENERATIONS
+    assert population.generation == 8
+
+
+def test_run_until_fixed_point():
+    # 10 cooperators scoring 3 each with 10/3 food: everyone gets exactly one offspring
+    population = Population([players(AlwaysCoop=10)])
+    assert population.run(100, rounds=10, overall_food=10 / 3, payoff_matrix=PAYOFF_MATRIX) is StopReason.FIXED_POINT
+    assert population.generation == 0
+
+    # Defectors score 1 each, so 20 food sets the population size to 20 in one generation
+    population = Population([players(AlwaysDefect=10)])
+    assert population.run(100, rounds=10, overall_food=20, payoff_matrix=PAYOFF_MATRIX) is StopReason.FIXED_POINT
+    assert population.generation == 1
+    assert population.population_size == 20
+
+    # With mutations, there is no fixed point
+    population = Population([players(AlwaysDefect=10)])
+    reason = population.run(5, rounds=10, overall_food=10, payoff_matrix=PAYOFF_MATRIX, mutation_probability=0.5, mutation_strategies=[EXAMPLE_SPECIES["AlwaysCoop"]])
+    assert reason is StopReason.GENERATIONS
+
+
+def test_run_until_converged():
+    random.seed(1)
+    population = Population([players(AlwaysCoop=20, AlwaysDefect=20)])
+    reason = population.run(500, epsilon=0.05, window=5, rounds=5, overall_food=15, payoff_matrix=PAYOFF_MATRIX, stop_at_fixed_point=False)
+    assert reason in (StopReason.CONVERGED, StopReason.EXTINCT)
+    assert population.generation < 500
+
+
+def test_run_until_extinct():
+    population = Population([players(AlwaysDefect=10)])
+    assert population.run(10, rounds=5, overall_food=0, payoff_matrix=PAYOFF_MATRIX) is StopReason.EXTINCT
+    assert population.generation == 1
+
+
+def test_run_time_budget():
+    population = Population([players(Majority=10, Joss=10)])
+    assert population.run(time_budget=0, rounds=5) is StopReason.TIME_BUDGET
+    assert population.generation == 0
+
+
+def test_run_arguments():
+    population = Population([players(AlwaysCoop=2)])
+    with pytest.raises(TypeError):
+        population.run(1, not_an_argument=True)
+    with pytest.raises(ValueError):
+        population.run(1, adjust_populations=False)
+
+
+def test_run_callback(tmp_path):
+    random.seed(2)
+    population = Population([players(TitForTat=5, AlwaysDefect=5)])
+    population.run(4, rounds=5, overall_food=10, callback=Checkpointer(tmp_path / "run.ckpt", every=2))
+    assert load_checkpoint(tmp_path / "run.ckpt", EXAMPLE_SPECIES).generation == 4
+
+
+def test_monomorphic_generation_plays_one_battle():
+    stats = SimulationStats()
+    population = Population([players(TitForTat=50)], stats=stats)
+    population.do_generation(rounds=10, overall_food=50 / 3, payoff_matrix=PAYOFF_MATRIX)
+    assert stats.battles == 1
+    assert population.population_size == 50
+    assert all(player.age == 1 for player in population.get_players())
@@ -0,0 +1,104 @@
+from utils import PayoffMatrix, OutcomeTally, get_settings, configure
+from utils.settings import DEFAULT_CONFIG_PATH, ENVIRONMENT_VARIABLE, get_config_path
+from pathlib import Path
+import os
+import subprocess
+import sys
+import pytest
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Generous, since CI machines are slow, but catches eager imports of e.g. numpy or pandas
+IMPORT_TIME_BUDGET = 0.5
+
+
+def write_config(path, coop_coop=3, starting_population=15):
+    path.write_text(
+        "[SimulationParameters]\n"
+        f"StartingPopulation = {starting_population}\n"
+        "[PayoffMatrix]\n"
+        f"CoopCoop = {coop_coop}\nCoopDefect = 0\nDefectCoop = 5\nDefectDefect = 1\n"
+    )
+    return path
+
+
+@pytest.fixture(autouse=True)
+def reset_settings(monkeypatch):
+    monkeypatch.delenv(ENVIRONMENT_VARIABLE, raising=False)
+    configure(None)
+    yield
+    configure(None)
+
+
+def test_default_settings():
+    settings = get_settings()
+    assert settings.payoff_matrix.as_dict() == PayoffMatrix(3, 0, 5, 1).as_dict()
+    assert settings.starting_population == 15
+    assert get_settings() is settings
+
+
+def test_falls_back_to_repository_config(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assert get_config_path() == DEFAULT_CONFIG_PATH
+    assert get_settings().starting_population == 15
+
+
+def test_overrides(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_config(tmp_path / "config.ini", starting_population=20)
+    assert get_settings().starting_population == 20
+
+    monkeypatch.setenv(ENVIRONMENT_VARIABLE, str(write_config(tmp_path / "env.ini", starting_population=30)))
+    configure(None)
+    assert get_settings().starting_population == 30
+
+    configure(write_config(tmp_path / "explicit.ini", coop_coop=4, starting_population=40))
+    assert get_settings().starting_population == 40
+    assert OutcomeTally(coop_coop=1).get_score() == (4, 4)
+
+    configure(None)
+    assert get_settings().starting_population == 30
+
+
+def test_missing_config_file(tmp_path):
+    configure(tmp_path / "missing.ini")
+    with pytest.raises(FileNotFoundError):
+        get_settings()
+
+
+def test_module_constants_are_lazy():
+    import utils
+    assert utils.STARTING_POPULATION == 15
+    assert utils.PAYOFF_MATRIX is get_settings().payoff_matrix
+    with pytest.raises(AttributeError):
+        utils.NOT_A_SETTING
+
+
+def run_python(code, cwd):
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=cwd,
+        env={**{k: v for k, v in os.environ.items() if k != ENVIRONMENT_VARIABLE}, "PYTHONPATH": str(ROOT)},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def test_import_is_fast_and_lazy(tmp_path):
+    # A broken config file in the working directory only fails once it's used
+    (tmp_path / "config.ini").write_text("[PayoffMatrix]\n")
+    result = run_python(
+        "import sys, utils\n"
+        "print(sorted(m for m in ('numpy', 'pandas', 'streamlit', 'concurrent.futures') if m in sys.modules))",
+        cwd=tmp_path,
+    )
+    assert result.stdout.strip() == "[]"
+
+    # `-X importtime` prints the cumulative time of the `utils` import in µs
+    line = [line for line in result.stderr.splitlines() if line.endswith("| utils")][-1]
+    assert int(line.split("|")[1]) / 1e6 < IMPORT_TIME_BUDGET
+
+    with pytest.raises(subprocess.CalledProcessError):
+        run_python("import utils; utils.PAYOFF_MATRIX", cwd=tmp_path)
@@ -0,0 +1,76 @@
+from utils import Player, Graph, StructuredPopulation, MatchupCache, PayoffMatrix
+from catalogue import EXAMPLE_SPECIES
+import random
+import pytest
+
+
+def test_lattice():
+    graph = Graph.lattice(4, 3)
+    assert graph.n_nodes == 12
+    assert graph.n_edges == 24
+    assert all(graph.degree(node) == 4 for node in range(12))
+    # (0, 0) wraps around to (3, 0) and (0, 2)
+    assert set(graph.neighbours(0)) == {1, 3, 4, 8}
+
+    moore = Graph.lattice(4, 4, moore=True)
+    assert all(moore.degree(node) == 8 for node in range(16))
+
+    bounded = Graph.lattice(3, 3, periodic=False)
+    assert bounded.degree(0) == 2 and bounded.degree(4) == 4
+    assert bounded.n_edges == 12
+
+
+def test_from_edges():
+    graph = Graph.from_edges(4, [(0, 1), (1, 0), (1, 2), (2, 2)])
+    assert graph.n_edges == 2
+    assert list(graph.edges()) == [(0, 1), (1, 2)]
+    assert graph.degree(3) == 0
+
+    with pytest.raises(ValueError):
+        Graph.from_edges(2, [(0, 2)])
+    with pytest.raises(ValueError):
+        Graph((0, 1), (5,))
+
+
+def test_structured_population():
+    random.seed(0)
+    graph = Graph.lattice(10, 10)
+    strategies = [EXAMPLE_SPECIES["TitForTat"], EXAMPLE_SPECIES["AlwaysDefect"]]
+    cache = MatchupCache()
+    population = StructuredPopulation.random(graph, strategies, matchup_cache=cache)
+
+    with pytest.raises(ValueError):
+        StructuredPopulation(graph, population.sites[:-1])
+
+    for _ in range(5):
+        population.do_generation(rounds=20, mutation_probability=0.05, mutation_strategies=strategies + [EXAMPLE_SPECIES["Pavlov"]])
+
+    assert population.generation == 5
+    assert population.population_size == 100
+    assert sum(population.get_population_counts().values()) == 100
+    assert set(population.get_population_counts(0)) == {"TitForTat", "AlwaysDefect"}
+    assert population.population_average_age >= 0
+    # Only one battle per pairing of species was played
+    assert cache.misses <= 9
+
+
+def test_cooperators_score_per_neighbour():
+    graph = Graph.lattice(3, 3, periodic=False)
+    population = StructuredPopulation(graph, [Player(EXAMPLE_SPECIES["AlwaysCoop"]) for _ in range(9)])
+    population.do_generation(rounds=10, adjust_populations=False)
+    # Scores are averaged over each player's neighbours, so edges and corners aren't penalized
+    assert all(player.most_recent_score == pytest.approx(3) for player in population.sites)
+
+
+def test_negative_scores():
+    graph = Graph.from_edges(3, [(0, 1), (1, 2)])
+    players = [Player(EXAMPLE_SPECIES[name]) for name in ["AlwaysCoop", "AlwaysDefect", "AlwaysCoop"]]
+    # Cooperators score -1 against the defector, who scores 3
+    payoff_matrix = PayoffMatrix(3, -1, 3, 0)
+    population = StructuredPopulation(graph, players)
+    with pytest.raises(ValueError):
+        population.do_generation(rounds=10, payoff_matrix=payoff_matrix)
+    assert population.generation == 0
+
+    population.do_generation(rounds=10, payoff_matrix=payoff_matrix, adjust_populations=False)
+    assert [player.most_recent_score for player in population.sites] == [-1, 3, -1]
@@ -0,0 +1,102 @@
+from utils import SweepConfig, grid, random_sample, run_replicate, run_sweep, read_results
+from catalogue import EXAMPLE_SPECIES
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import json
+import random
+import pytest
+
+
+BASE = SweepConfig(rounds=10, overall_food=30, starting_population=(("TitForTat", 5), ("AlwaysDefect", 5), ("Joss", 5)))
+
+
+def test_grid():
+    configs = grid(BASE, overall_food=[10, 20, 30], mutation_probability=[0, 0.1])
+    assert len(configs) == 6
+    assert {(config.overall_food, config.mutation_probability) for config in configs} == {
+        (food, rate) for food in [10, 20, 30] for rate in [0, 0.1]
+    }
+    assert all(config.rounds == 10 for config in configs)
+    assert len({config.config_id for config in configs}) == 6
+
+    # Dicts and lists are converted, so configs stay hashable
+    config, = grid(starting_population=[{"TitForTat": 3}], payoff_matrix=[[4, 0, 5, 1]])
+    assert config.starting_population == (("TitForTat", 3),)
+    assert config.payoff_matrix == (4, 0, 5, 1)
+
+
+def test_random_sample():
+    configs = random_sample(20, BASE, seed=1, overall_food=[10, 20], mutation_probability=lambda rng: rng.uniform(0, 0.1))
+    assert len(configs) == 20
+    assert all(config.overall_food in (10, 20) and 0 <= config.mutation_probability <= 0.1 for config in configs)
+    assert configs == random_sample(20, BASE, seed=1, overall_food=[10, 20], mutation_probability=lambda rng: rng.uniform(0, 0.1))
+
+
+def test_run_sweep(tmp_path):
+    path = tmp_path / "sweep.jsonl"
+    configs = grid(BASE, mutation_probability=[0, 0.2])
+    assert run_sweep(configs, path, species=EXAMPLE_SPECIES, replicates=2, generations=4) == 4
+
+    rows = read_results(path)
+    assert len(rows) == 4 * 5
+    assert {(row["config_id"], row["replicate"], row["generation"]) for row in rows} == {
+        (config.config_id, replicate, gen) for config in configs for replicate in range(2) for gen in range(5)
+    }
+    first = next(row for row in rows if row["generation"] == 0)
+    assert first["counts"] == {"TitForTat": 5, "AlwaysDefect": 5, "Joss": 5}
+    assert first["overall_food"] == 30
+
+    # Everything is done already
+    assert run_sweep(configs, path, species=EXAMPLE_SPECIES, replicates=2, generations=4) == 0
+    assert read_results(path) == rows
+
+
+def test_resume_interrupted_sweep(tmp_path):
+    path = tmp_path / "sweep.jsonl"
+    configs = grid(BASE, overall_food=[20, 40])
+    run_sweep(configs, path, species=EXAMPLE_SPECIES, replicates=2, generations=3)
+    expected = sorted(path.read_text().splitlines())
+
+    # Simulate a crash partway through writing the last run
+    lines = path.read_text().splitlines(keepends=True)
+    path.write_text("".join(lines[:-2]) + lines[-2][:10])
+    interrupted = json.loads(lines[-1])
+    assert len(read_results(path)) == len(lines) - 4
+
+    assert run_sweep(configs, path, species=EXAMPLE_SPECIES, replicates=2, generations=3) == 1
+    assert sorted(path.read_text().splitlines()) == expected
+    assert {(row["config_id"], row["replicate"]) for row in read_results(path)} >= {(interrupted["config_id"], interrupted["replicate"])}
+
+
+def test_resume_with_other_sweep_parameters(tmp_path):
+    path = tmp_path / "sweep.jsonl"
+    configs = grid(BASE, overall_food=[20, 40])
+    run_sweep(configs, path, species=EXAMPLE_SPECIES, replicates=1, generations=3, seed=0)
+    contents = path.read_text()
+
+    for kwargs in (dict(generations=10, seed=0), dict(generations=3, seed=1)):
+        with pytest.raises(ValueError):
+            run_sweep(configs, path, species=EXAMPLE_SPECIES, replicates=1, **kwargs)
+    with pytest.raises(ValueError):
+        run_sweep(configs, path, species={"TitForTat": EXAMPLE_SPECIES["TitForTat"]}, replicates=1, generations=3, seed=0)
+    assert path.read_text() == contents
+
+
+def test_run_replicate_restores_random_state():
+    random.seed(123)
+    expected = random.random()
+    random.seed(123)
+    run_replicate(BASE, 0, species=EXAMPLE_SPECIES, generations=2)
+    assert random.random() == expected
+
+
+def test_parallel_sweep_matches_serial(tmp_path):
+    configs = grid(BASE, mutation_probability=[0, 0.2])
+    run_sweep(configs, tmp_path / "serial.jsonl", species=EXAMPLE_SPECIES, replicates=2, generations=3)
+    with ProcessPoolExecutor(2, mp_context=multiprocessing.get_context("spawn")) as executor:
+        run_sweep(configs, tmp_path / "parallel.jsonl", species=EXAMPLE_SPECIES, replicates=2, generations=3, executor=executor)
+
+    def key(row):
+        return row["config_id"], row["replicate"], row["generation"]
+
+    assert sorted(read_results(tmp_path / "serial.jsonl"), key=key) == sorted(read_results(tmp_path / "parallel.jsonl"), key=key)
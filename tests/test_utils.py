@@ -1,4 +1,6 @@
-from utils import History, Action, PayoffMatrix
+from utils import History, Action, PayoffMatrix, binomial
+from utils.simulation_utils import _binomial_fallback
+import random
 import pytest
 
 
@@ -125,3 +127,30 @@ def test_get_score_5(payoff_matrix):
 
     assert score == (expected_a, expected_b), f"Score should be ({expected_a}, {expected_b}), but was {score}."
 
+
+
+@pytest.mark.parametrize("n, p", [(0, 0.5), (10, 0), (10, 1), (20, 0.1), (50, 0.9), (1_000, 0.3), (100_000, 0.01)])
+def test_binomial_fallback(n, p):
+    random.seed(0)
+    samples = [_binomial_fallback(n, p) for _ in range(2_000)]
+    assert all(0 <= sample <= n for sample in samples)
+    mean = sum(samples) / len(samples)
+    variance = sum((sample - mean) ** 2 for sample in samples) / len(samples)
+    assert mean == pytest.approx(n * p, abs=0.1 + 4 * (n * p * (1 - p) / len(samples)) ** 0.5)
+    assert variance == pytest.approx(n * p * (1 - p), rel=0.15, abs=0.1)
+
+
+@pytest.mark.skipif(not hasattr(random, "binomialvariate"), reason="Requires Python 3.12+")
+@pytest.mark.parametrize("n, p", [(1, 0.3), (20, 0.1), (50, 0.9), (1_000, 0.3), (100_000, 0.01)])
+def test_binomial_fallback_matches_binomialvariate(n, p):
+    random.seed(0)
+    expected = [random.binomialvariate(n, p) for _ in range(200)]
+    random.seed(0)
+    assert [_binomial_fallback(n, p) for _ in range(200)] == expected
+
+
+def test_binomial_rejects_invalid_probabilities():
+    with pytest.raises(ValueError):
+        binomial(10, 1.5)
+    with pytest.raises(ValueError):
+        binomial(10, -0.1)
@@ -0,0 +1,67 @@
+from utils import Player, Population, PayoffMatrix, StateMachine, Action, battle
+from catalogue import EXAMPLE_SPECIES
+from dataclasses import astuple
+import itertools as it
+import pytest
+
+np = pytest.importorskip("numpy")
+from utils.vectorized import battle_many, play_state_machines
+
+
+STATE_MACHINE_SPECIES = [name for name, strategy in EXAMPLE_SPECIES.items() if strategy.state_machine is not None]
+
+
+@pytest.fixture
+def payoff_matrix():
+    return PayoffMatrix(3, 0, 5, 1)
+
+
+def test_state_machines_play_like_decide(payoff_matrix):
+    matchups = [
+        (Player(EXAMPLE_SPECIES[name1]), Player(EXAMPLE_SPECIES[name2]))
+        for name1, name2 in it.product(STATE_MACHINE_SPECIES, repeat=2)
+    ]
+
+    for rounds in (1, 2, 3, 4, 57):
+        expected = [battle(player1, player2, rounds=rounds, payoff_matrix=payoff_matrix) for player1, player2 in matchups]
+        assert battle_many(matchups, rounds=rounds, payoff_matrix=payoff_matrix) == expected
+
+
+def test_outcome_tallies():
+    tit4tat = EXAMPLE_SPECIES["TitForTat"].state_machine
+    tester = EXAMPLE_SPECIES["Tester"].state_machine
+
+    tallies = play_state_machines([tit4tat, tester], [tester, tester], rounds=100)
+
+    expected = Player(EXAMPLE_SPECIES["Tester"]).get_battle_history(Player(EXAMPLE_SPECIES["Tester"]), rounds=100).get_outcome_tally()
+
+    assert tallies[0].tolist() == [98, 1, 1, 0]
+    assert tallies[1].tolist() == list(astuple(expected))
+
+
+def test_fallback_for_strategies_without_state_machine(payoff_matrix):
+    majority = Player(EXAMPLE_SPECIES["Majority"])
+    defector = Player(EXAMPLE_SPECIES["AlwaysDefect"])
+
+    scores = battle_many([(majority, defector), (defector, defector)], rounds=10, payoff_matrix=payoff_matrix)
+
+    assert scores == [(9 / 10, 14 / 10), (1.0, 1.0)]
+
+
+def test_vectorized_generation(payoff_matrix):
+    species = [EXAMPLE_SPECIES[name] for name in ("TitForTat", "AlwaysDefect", "Pavlov", "Majority")]
+    players = [Player(strategy) for strategy in species for _ in range(5)]
+    expected = [Player(strategy) for strategy in species for _ in range(5)]
+
+    Population([players]).do_generation(payoff_matrix=payoff_matrix, rounds=20, adjust_populations=False, vectorized=True)
+    Population([expected]).do_generation(payoff_matrix=payoff_matrix, rounds=20, adjust_populations=False)
+
+    for player, expected_player in zip(players, expected):
+        assert player.most_recent_score == pytest.approx(expected_player.most_recent_score)
+
+
+def test_invalid_state_machine():
+    with pytest.raises(ValueError):
+        StateMachine(actions=(Action.COOP,), transitions=((0, 1),))
+    with pytest.raises(ValueError):
+        StateMachine(actions=(Action.COOP, Action.DEFECT), transitions=((0, 1),))
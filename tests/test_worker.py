@@ -0,0 +1,62 @@
+from utils import Player, Population, SimulationWorker
+from catalogue import EXAMPLE_SPECIES
+import time
+import pytest
+
+
+@pytest.fixture
+def population():
+    species = [EXAMPLE_SPECIES[name] for name in ("TitForTat", "AlwaysDefect")]
+    return Population([[Player(strategy) for strategy in species for _ in range(5)]])
+
+
+GENERATION_KWARGS = {"rounds": 5, "overall_food": 10}
+
+
+def test_fixed_number_of_generations(population):
+    worker = SimulationWorker(population, GENERATION_KWARGS)
+    worker.start(3)
+    worker.join(timeout=10)
+
+    assert not worker.is_running
+    assert worker.error is None
+    assert worker.generations_done == 3
+    assert population.generation == 3
+
+    with pytest.raises(ValueError):
+        worker.start(-1)
+
+
+def test_pause_resume_cancel(population):
+    worker = SimulationWorker(population, GENERATION_KWARGS)
+    worker.start()
+    time.sleep(0.05)
+
+    worker.pause()
+    with worker.lock:  # Wait for the current generation to finish
+        pass
+    time.sleep(0.05)
+    assert worker.is_paused
+    paused_at = population.generation
+    time.sleep(0.05)
+    assert population.generation == paused_at
+
+    with pytest.raises(RuntimeError):
+        worker.start()
+
+    worker.resume()
+    time.sleep(0.05)
+    worker.cancel(timeout=10)
+
+    assert not worker.is_running
+    assert population.generation > paused_at
+    assert population.generation == worker.generations_done
+
+
+def test_error_stops_worker(population):
+    worker = SimulationWorker(population, {"not_a_parameter": 1})
+    worker.start()
+    worker.join(timeout=10)
+
+    assert not worker.is_running
+    assert isinstance(worker.error, TypeError)
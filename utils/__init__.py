@@ -3,13 +3,37 @@ from utils.simulation_utils import (
     Strategy, 
     Action, 
     History, 
+    GameRecord,
+    OutcomeTally,
+    StateMachine,
+    MemoryOne,
     Population,
+    GenerationSummary,
+    StopReason,
     Player,
     battle, 
     flatten,
     round_probabilistically, 
+    binomial,
     random_action, 
     PayoffMatrix,
-    PAYOFF_MATRIX, 
-    STARTING_POPULATION
-)
\ No newline at end of file
+)
+from utils.settings import Settings, get_settings, configure
+from utils.matchup_cache import MatchupCache
+from utils.count_population import CountPopulation
+from utils.packed_history import PackedMoves, PackedGameRecord
+from utils.checkpoint import save_checkpoint, load_checkpoint, Checkpointer
+from utils.profiling import SimulationStats, StrategyStats
+from utils.worker import SimulationWorker
+from utils.sweep import SweepConfig, grid, random_sample, run_replicate, run_sweep, read_results
+from utils.analytic import get_cyclic_tally, get_bounded_memory_tally, get_expected_tally
+from utils.structured import Graph, StructuredPopulation
+from utils.player_table import PlayerTable, PlayerHandle
+from utils.persistent_cache import PersistentMatchupCache
+
+
+def __getattr__(name: str):
+    # Read from the config file on first use, see `utils.settings`
+    if name in ("PAYOFF_MATRIX", "STARTING_POPULATION"):
+        return getattr(simulation_utils, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
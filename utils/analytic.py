@@ -0,0 +1,202 @@
+"""
+Scores battles analytically instead of playing them round by round, so the
+cost of a battle doesn't grow with the number of rounds.
+
+- Two strategies with a `state_machine` (see `StateMachine`) have a finite
+  joint state, so their game repeats itself after at most
+  `machine1.n_states * machine2.n_states` rounds. `get_cyclic_tally` plays
+  the game until a joint state repeats, then extrapolates the outcome tally
+  from the cycle, giving exactly the tally that playing every round would.
+
+- Two deterministic strategies with a `memory_depth` of at most `k` have a
+  finite joint state too once `k` rounds have been played: the last `k`
+  rounds. `get_bounded_memory_tally` plays the game with `decide` until that
+  window of rounds repeats, then extrapolates the same way.
+
+- The outcome of a round between two `MemoryOne` strategies only depends on
+  the previous outcome, so the game is a Markov chain over the 4 outcomes.
+  `get_expected_tally` computes the exact expected outcome tally with 4×4
+  matrix products, in O(log(rounds)) time. This turns the noisy score of a
+  single battle involving e.g. `Joss` into its (variance-free) expectation.
+
+These are picked automatically by the battle engine, see `utils.routing`.
+
+## Example
+>>> get_cyclic_tally(TitForTat.state_machine, Tester.state_machine, rounds=10**9)  # As fast as rounds=50
+>>> get_expected_tally(Joss.memory_one, GenerousTitForTat.memory_one)  # The average tally of infinitely many battles
+"""
+from __future__ import annotations
+from functools import cache
+from typing import TYPE_CHECKING
+
+from utils.simulation_utils import (
+    Player,
+    Strategy,
+    Action,
+    StateMachine,
+    MemoryOne,
+    GameRecord,
+    OutcomeTally,
+)
+
+if TYPE_CHECKING:
+    from utils.profiling import SimulationStats
+
+
+Matrix = list[list[float]]
+
+
+
+@cache
+def _memory_one_state_machine(memory_one: MemoryOne) -> StateMachine:
+    return memory_one.to_state_machine()
+
+
+def get_state_machine(strategy: Strategy) -> StateMachine | None:
+    """
+    Returns the state machine that plays like `strategy`: its `state_machine`,
+    or one made from a deterministic `memory_one` description. Returns None
+    if the strategy has neither.
+    """
+    if strategy.state_machine is not None:
+        return strategy.state_machine
+    if strategy.memory_one is not None and strategy.memory_one.is_deterministic:
+        return _memory_one_state_machine(strategy.memory_one)
+    return None
+
+
+def get_cyclic_tally(machine1: StateMachine, machine2: StateMachine, *, rounds: int = 100) -> OutcomeTally:
+    """
+    Returns the outcome tally of `machine1` playing `machine2` for `rounds`
+    rounds, seen from `machine1`'s perspective, in O(n_states1 * n_states2)
+    time whatever the number of rounds.
+    """
+    state1, state2 = machine1.initial_state, machine2.initial_state
+    # The round each joint state was first seen in
+    first_seen: dict[tuple[int, int], int] = {}
+    # prefix_tallies[t] is the tally of the first t rounds, as [CC, CD, DC, DD]
+    prefix_tallies = [[0, 0, 0, 0]]
+
+    for round_num in range(rounds):
+        if (state1, state2) in first_seen:
+            break
+        first_seen[state1, state2] = round_num
+
+        move1 = machine1.actions[state1]
+        move2 = machine2.actions[state2]
+        tally = prefix_tallies[-1].copy()
+        tally[2 * move1.value + move2.value] += 1
+        prefix_tallies.append(tally)
+
+        state1 = machine1.transitions[state1][move2.value]
+        state2 = machine2.transitions[state2][move1.value]
+    else:
+        # The battle ended before the game started repeating itself
+        return OutcomeTally(*prefix_tallies[-1])
+
+    return _extrapolate_cycle(prefix_tallies, first_seen[state1, state2], rounds)
+
+
+def get_bounded_memory_tally(
+        player1: Player,
+        player2: Player,
+        *,
+        rounds: int = 100,
+        stats: SimulationStats | None = None
+) -> OutcomeTally:
+    """
+    Returns the outcome tally of `player1` battling `player2` for `rounds`
+    rounds, seen from `player1`'s perspective, for two deterministic strategies
+    that declare a `memory_depth`. Only the rounds until the last `k` rounds
+    (for the larger depth `k`) repeat themselves are played, at most `4**k + k`,
+    and only those count as played in `stats`.
+    """
+    depth = max(player1.strategy.memory_depth, player2.strategy.memory_depth)
+    record = GameRecord()
+    history, opponent_history = record.views()
+    # The round each window of the last `depth` rounds was first seen in
+    first_seen: dict[tuple[tuple[Action, ...], tuple[Action, ...]], int] = {}
+    prefix_tallies = [[0, 0, 0, 0]]
+
+    for round_num in range(rounds):
+        if round_num >= depth:
+            window = tuple(history.own_moves[round_num - depth:]), tuple(history.opponent_moves[round_num - depth:])
+            if window in first_seen:
+                if stats is not None:
+                    stats.record_battle(rounds, played_rounds=round_num)
+                return _extrapolate_cycle(prefix_tallies, first_seen[window], rounds)
+            first_seen[window] = round_num
+
+        move1 = player1.make_decision(history)
+        move2 = player2.make_decision(opponent_history)
+        record.append(move1, move2)
+        tally = prefix_tallies[-1].copy()
+        tally[2 * move1.value + move2.value] += 1
+        prefix_tallies.append(tally)
+
+    # The battle ended before the game started repeating itself
+    if stats is not None:
+        stats.record_battle(rounds)
+    return OutcomeTally(*prefix_tallies[-1])
+
+
+def _extrapolate_cycle(prefix_tallies: list[list[int]], cycle_start: int, rounds: int) -> OutcomeTally:
+    """
+    Returns the tally of `rounds` rounds of a game whose rounds from
+    `cycle_start` on repeat forever, given the tallies of the first t rounds
+    for every t up to the end of the first cycle.
+    """
+    cycle_length = len(prefix_tallies) - 1 - cycle_start
+    cycles, leftover = divmod(rounds - cycle_start, cycle_length)
+
+    start = prefix_tallies[cycle_start]
+    end = prefix_tallies[-1]
+    partial = prefix_tallies[cycle_start + leftover]
+    return OutcomeTally(*(
+        partial_count + cycles * (end_count - start_count)
+        for start_count, end_count, partial_count in zip(start, end, partial)
+    ))
+
+
+def _outcome_probabilities(coop1: float, coop2: float) -> list[float]:
+    """The probabilities of the outcomes (CC, CD, DC, DD) if the players cooperate with the given probabilities."""
+    return [coop1 * coop2, coop1 * (1 - coop2), (1 - coop1) * coop2, (1 - coop1) * (1 - coop2)]
+
+
+def _mat_mul(a: Matrix, b: Matrix) -> Matrix:
+    return [[sum(a[i][k] * b[k][j] for k in range(4)) for j in range(4)] for i in range(4)]
+
+
+def _mat_add(a: Matrix, b: Matrix) -> Matrix:
+    return [[a[i][j] + b[i][j] for j in range(4)] for i in range(4)]
+
+
+def get_expected_tally(strategy1: MemoryOne, strategy2: MemoryOne, *, rounds: int = 100) -> OutcomeTally:
+    """
+    Returns the expected outcome tally of `strategy1` playing `strategy2` for
+    `rounds` rounds, seen from `strategy1`'s perspective. The counts are floats
+    that add up to `rounds`.
+    """
+    # The outcome CD for player 1 is DC for player 2 and vice versa
+    swapped = (0, 2, 1, 3)
+    transition = [
+        _outcome_probabilities(strategy1.after[outcome], strategy2.after[swapped[outcome]])
+        for outcome in range(4)
+    ]
+    identity = [[float(i == j) for j in range(4)] for i in range(4)]
+    zero = [[0.0] * 4 for _ in range(4)]
+
+    # Computes transition^rounds and transition^0 + ... + transition^(rounds - 1)
+    # by binary exponentiation, using that for k + l steps
+    # power(k + l) = power(k) @ power(l) and total(k + l) = total(k) + power(k) @ total(l)
+    power, total = identity, zero
+    for bit in bin(rounds)[2:]:
+        power, total = _mat_mul(power, power), _mat_add(total, _mat_mul(power, total))
+        if bit == "1":
+            power, total = _mat_mul(power, transition), _mat_add(total, power)
+
+    first_round = _outcome_probabilities(strategy1.initial, strategy2.initial)
+    return OutcomeTally(*(
+        sum(first_round[i] * total[i][j] for i in range(4))
+        for j in range(4)
+    ))
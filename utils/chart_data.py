@@ -0,0 +1,87 @@
+"""
+Append-only table of species counts per generation, for drawing charts of a
+population's development without recounting every generation on every redraw.
+
+NumPy is a dependency of the app but optional for the rest of `utils`, so
+this module isn't imported by `utils/__init__.py`:
+
+>>> from utils.chart_data import CountSeries
+"""
+from __future__ import annotations
+from collections.abc import Iterable, Mapping
+from typing import TYPE_CHECKING
+
+try:
+    import numpy as np
+except ImportError as e:
+    raise ImportError("CountSeries requires numpy, install it with `pip install numpy`.") from e
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from utils.simulation_utils import Population
+    from utils.count_population import CountPopulation
+
+
+
+class CountSeries:
+    """
+    A generation × species matrix of counts, stored in a preallocated NumPy
+    array that doubles in size when full, so appending a generation costs
+    O(S) and reading the whole table is a view rather than a copy.
+
+    Columns are added automatically when a new species appears.
+
+    ## Example
+    >>> series = CountSeries()
+    >>> series.update(pop)  # Adds every generation not added yet
+    >>> st.area_chart(series.to_frame())
+    """
+    def __init__(self, columns: Iterable[str] = (), capacity: int = 64) -> None:
+        self.columns: list[str] = []
+        self._column_indices: dict[str, int] = {}
+        self._data = np.zeros((max(capacity, 1), 0), dtype=np.int64)
+        self._length = 0
+        self.add_columns(columns)
+
+    def __len__(self) -> int:
+        return self._length
+
+    @property
+    def values(self) -> np.ndarray:
+        """The counts so far, as a (generations, species) view."""
+        return self._data[:self._length]
+
+    def add_columns(self, columns: Iterable[str]) -> None:
+        new_columns = [name for name in dict.fromkeys(columns) if name not in self._column_indices]
+        if not new_columns:
+            return
+        for name in new_columns:
+            self._column_indices[name] = len(self.columns)
+            self.columns.append(name)
+        self._data = np.pad(self._data, ((0, 0), (0, len(new_columns))))
+
+    def append(self, counts: Mapping[str, int]) -> None:
+        """Adds a row of counts, with 0 for species missing from `counts`."""
+        self.add_columns(counts)
+        if self._length == len(self._data):
+            self._data = np.concatenate([self._data, np.zeros_like(self._data)])
+        row = self._data[self._length]
+        for name, count in counts.items():
+            row[self._column_indices[name]] = count
+        self._length += 1
+
+    def update(self, population: Population | CountPopulation) -> int:
+        """
+        Appends the counts of the generations of `population` that haven't been
+        added yet, and returns how many there were.
+        """
+        added = 0
+        for gen in range(self._length, population.generation + 1):
+            self.append(population.get_population_counts(gen))
+            added += 1
+        return added
+
+    def to_frame(self) -> pd.DataFrame:
+        """Returns the counts as a DataFrame with one column per species, indexed by generation."""
+        import pandas as pd  # Only needed for this method
+        return pd.DataFrame(self.values, columns=self.columns, copy=False).rename_axis("Generation")
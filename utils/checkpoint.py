@@ -0,0 +1,169 @@
+"""
+Compact checkpoints of a `Population`, so long simulations can be resumed
+after a crash or restart without pickling every `Player`.
+
+A checkpoint file consists of:
+
+- An 8 byte magic string and the length of the header (8 bytes).
+- A JSON header with the generation counter, the species names, the
+  per-generation summaries, the population's settings and the RNG state.
+- The players of the latest generation as packed arrays: species indices
+  (uint32), ages (int64) and most recent scores (float64).
+
+Files are written atomically (to a temporary file that then replaces the
+old checkpoint), and the arrays are read through a memory map.
+"""
+from __future__ import annotations
+from collections.abc import Mapping
+from array import array
+from pathlib import Path
+import json
+import mmap
+import os
+import random
+import sys
+
+from utils.simulation_utils import (
+    GenerationSummary,
+    Player,
+    Population,
+    Strategy,
+)
+
+
+MAGIC = b"PDCKPT01"
+_ALIGNMENT = 8
+
+
+
+def _padding(size: int) -> bytes:
+    return b"\0" * (-size % _ALIGNMENT)
+
+
+def save_checkpoint(population: Population, path: str | os.PathLike, *, save_rng_state: bool = True) -> None:
+    """
+    Atomically writes the state of `population` (and by default the global
+    RNG state) to a checkpoint file at `path`.
+    """
+    path = Path(path)
+    species_indices = {name: index for index, name in enumerate(population.species)}
+    players = population.players[-1]
+
+    header = json.dumps({
+        "generation": population.generation,
+        "species": population.species,
+        "summaries": [
+            [summary.counts, summary.total_ages, summary.total_scores]
+            for summary in population.summaries
+        ],
+        "retained_generations": population.retained_generations,
+        "population_size": len(players),
+        "byteorder": sys.byteorder,
+        "rng_state": random.getstate() if save_rng_state else None,
+    }).encode()
+
+    arrays = [
+        array("I", [species_indices[player.strategy_name] for player in players]),
+        array("q", [player.age for player in players]),
+        array("d", [player.most_recent_score for player in players]),
+    ]
+
+    temporary_path = path.with_name(path.name + ".tmp")
+    with open(temporary_path, "wb") as file:
+        file.write(MAGIC)
+        file.write(len(header).to_bytes(8, "little"))
+        file.write(header)
+        file.write(_padding(len(header)))
+        for packed in arrays:
+            file.write(packed.tobytes())
+            file.write(_padding(len(packed) * packed.itemsize))
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary_path, path)
+
+
+def load_checkpoint(
+        path: str | os.PathLike,
+        strategies: Mapping[str, Strategy],
+        *,
+        restore_rng_state: bool = True,
+        **kwargs
+) -> Population:
+    """
+    Loads a `Population` saved with `save_checkpoint`. `strategies` maps
+    species names to the `Strategy` they should use, e.g. `EXAMPLE_SPECIES`.
+    By default the global RNG state is restored too, so the simulation
+    continues exactly like it would have without interruption.
+
+    `**kwargs` are passed on to `Population`, e.g. a `matchup_cache`.
+    """
+    with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        data = memoryview(mapped)
+        try:
+            if data[:len(MAGIC)] != MAGIC:
+                raise ValueError(f"{path} is not a population checkpoint")
+            header_length = int.from_bytes(data[8:16], "little")
+            header = json.loads(bytes(data[16:16 + header_length]))
+
+            n = header["population_size"]
+            offset = 16 + header_length + len(_padding(header_length))
+            arrays = []
+            for typecode in "Iqd":
+                packed = array(typecode)
+                size = n * packed.itemsize
+                packed.frombytes(data[offset:offset + size])
+                if header["byteorder"] != sys.byteorder:
+                    packed.byteswap()
+                arrays.append(packed)
+                offset += size + len(_padding(size))
+        finally:
+            data.release()
+
+    species_indices, ages, scores = arrays
+    missing = set(header["species"]) - set(strategies)
+    if missing:
+        raise KeyError(f"No strategy given for species {sorted(missing)} in {path}")
+    species_strategies = [strategies[name] for name in header["species"]]
+
+    players = [
+        Player(species_strategies[index], age=age, most_recent_score=score)
+        for index, age, score in zip(species_indices, ages, scores)
+    ]
+    kwargs.setdefault("retained_generations", header["retained_generations"])
+    population = Population.restore(
+        players,
+        header["species"],
+        [GenerationSummary(*summary) for summary in header["summaries"]],
+        **kwargs,
+    )
+
+    if restore_rng_state and header["rng_state"] is not None:
+        version, internal_state, gauss_next = header["rng_state"]
+        random.setstate((version, tuple(internal_state), gauss_next))
+
+    return population
+
+
+
+class Checkpointer:
+    """
+    Saves a checkpoint of a population every `every` generations.
+
+    ## Example
+    >>> checkpointer = Checkpointer("run.ckpt", every=100)
+    >>> for _ in range(10_000):
+    ...     pop.do_generation()
+    ...     checkpointer(pop)
+    """
+    def __init__(self, path: str | os.PathLike, every: int = 10) -> None:
+        if every < 1:
+            raise ValueError(f"Expected `every` to be at least 1, but got {every}")
+        self.path = path
+        self.every = every
+
+    def __call__(self, population: Population) -> bool:
+        """Saves a checkpoint if it's time to, and returns whether it did."""
+        if population.generation % self.every != 0:
+            return False
+        save_checkpoint(population, self.path)
+        return True
@@ -0,0 +1,261 @@
+"""
+A population engine that stores how many individuals there are of each
+(species, age) rather than one `Player` object per individual. Battles and
+offspring are worked out at species level, so the cost of a generation
+depends on the number of species and ages, not on the population size.
+"""
+from __future__ import annotations
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+
+from utils.simulation_utils import (
+    Player,
+    Strategy,
+    PayoffMatrix,
+    OutcomeTally,
+    binomial,
+)
+from utils.matchup_cache import MatchupCache
+from utils.routing import get_battle_tally
+from utils.analytic import get_expected_tally
+
+
+
+def split_uniformly(n: int, k: int, /) -> list[int]:
+    """
+    Splits `n` items into `k` groups, each item choosing its group uniformly
+    at random, and returns the size of each group (a multinomial sample).
+    """
+    sizes = []
+    for i in range(k):
+        size = binomial(n, 1 / (k - i))
+        sizes.append(size)
+        n -= size
+    return sizes
+
+
+
+@dataclass
+class CountPopulation:
+    """
+    Count-based alternative to `Population` that scales to millions of
+    individuals. Each generation is stored as a dict mapping
+    (species name, age) to the number of individuals of that species and age.
+
+    Since every individual of a species plays the same way, its expected
+    score is the average of its species' expected score against every other
+    individual in the population, so battles are only played per pair of
+    species. Deterministic pairs need a single battle (or none, if the pair
+    is already in the `matchup_cache`), pairs of memory-one strategies are
+    scored exactly (see `utils.analytic.get_expected_tally`), and any other
+    pair involving a stochastic strategy is scored by averaging
+    `stochastic_samples` battles. Offspring and mutations
+    are then drawn per (species, age) cohort with binomial sampling, which
+    gives the same distribution as rounding every individual's offspring
+    probabilistically like `Population` does.
+
+    It exposes the same `generation`, `population_size`, `population_average_age`,
+    `get_population_counts`, `get_top_species` and `do_generation` surface as
+    `Population`, so the two can be used interchangeably.
+
+    ## Example
+    >>> pop = CountPopulation.from_counts({AlwaysCoop(): 1_000_000, AlwaysDefect(): 10})
+    >>> pop.do_generation(overall_food=500_000, mutation_probability=0.01, mutation_strategies=[AlwaysCoop()])
+    >>> pop.get_population_counts()
+    """
+    # One dict per generation (time series data, like `Population.players`)
+    cohorts: list[dict[tuple[str, int], int]] = field(default_factory=list)
+    # Every species that has ever been part of the population, by name
+    strategies: dict[str, Strategy] = field(default_factory=dict)
+    matchup_cache: MatchupCache = field(default_factory=MatchupCache)
+    # Battles averaged per stochastic pair of species that can't be scored exactly
+    stochastic_samples: int = 100
+
+    def __post_init__(self) -> None:
+        if self.stochastic_samples < 1:
+            raise ValueError(f"Expected `stochastic_samples` to be positive, but got {self.stochastic_samples}")
+
+    @classmethod
+    def from_counts(cls, counts: dict[Strategy, int], **kwargs) -> CountPopulation:
+        """Creates a population with `counts[strategy]` newborns of each strategy."""
+        strategies = {strategy.__class__.__name__: strategy for strategy in counts}
+        cohort = {(strategy.__class__.__name__, 0): count for strategy, count in counts.items() if count > 0}
+        return cls([cohort], strategies, **kwargs)
+
+    @classmethod
+    def from_players(cls, players: Iterable[Player], **kwargs) -> CountPopulation:
+        """Creates a population with the same species and ages as `players`."""
+        strategies = {}
+        cohort = {}
+        for player in players:
+            strategies.setdefault(player.strategy_name, player.strategy)
+            key = (player.strategy_name, player.age)
+            cohort[key] = cohort.get(key, 0) + 1
+        return cls([cohort], strategies, **kwargs)
+
+    def get_species_counts(self, gen: int = -1) -> dict[str, int]:
+        """Like `get_population_counts`, but without extinct species."""
+        counts = {}
+        for (name, _), count in self.cohorts[gen].items():
+            counts[name] = counts.get(name, 0) + count
+        return counts
+
+    def get_population_counts(self, gen: int = -1) -> dict[str, int]:
+        counts = self.get_species_counts(gen)
+        # Include all species ever seen (so we get 0 for extinct species, rather than missing)
+        return {name: counts.get(name, 0) for name in self.strategies}
+
+    def get_top_species(self, top_n: int = 3, gen: int = -1) -> dict[str, int]:
+        return dict(sorted(self.get_population_counts(gen).items(), key=lambda x: x[1], reverse=True)[:top_n])
+
+    @property
+    def generation(self) -> int:
+        return len(self.cohorts) - 1
+
+    @property
+    def population_size(self) -> int:
+        return sum(self.cohorts[-1].values())
+
+    @property
+    def population_average_age(self) -> float:
+        return sum(age * count for (_, age), count in self.cohorts[-1].items()) / self.population_size
+
+    def get_species_scores(
+            self,
+            payoff_matrix: PayoffMatrix | None = None,
+            rounds: int = 50
+    ) -> dict[str, float]:
+        """
+        Returns the expected score of an individual of each living species,
+        normalized like `Player.most_recent_score` is in `Population`.
+        """
+        counts = self.get_species_counts()
+        opponents = self.population_size - 1
+        if opponents <= 0:
+            return {name: 0.0 for name in counts}
+
+        representatives = {name: Player(self.strategies[name]) for name in counts}
+        tallies: dict[tuple[str, str], OutcomeTally] = {}
+        scores = {}
+        for name, player in representatives.items():
+            total = 0.0
+            for opponent_name, opponent in representatives.items():
+                # Nobody battles themselves
+                opponent_count = counts[opponent_name] - (opponent_name == name)
+                if opponent_count == 0:
+                    continue
+                if (name, opponent_name) not in tallies:
+                    tally = self.__get_expected_tally(player, opponent, rounds=rounds)
+                    tallies[name, opponent_name] = tally
+                    tallies[opponent_name, name] = tally.swapped()
+                total += opponent_count * tallies[name, opponent_name].get_score(payoff_matrix=payoff_matrix)[0]
+            scores[name] = total / opponents
+        return scores
+
+    def __get_expected_tally(self, player1: Player, player2: Player, *, rounds: int) -> OutcomeTally:
+        """
+        Returns the expected outcome tally of `player1` battling `player2`,
+        whose counts may be floats (see the class' documentation).
+        """
+        strategy1, strategy2 = player1.strategy, player2.strategy
+        if strategy1.deterministic and strategy2.deterministic:
+            return self.matchup_cache.get_tally(player1, player2, rounds=rounds)
+        if strategy1.memory_one is not None and strategy2.memory_one is not None:
+            return get_expected_tally(strategy1.memory_one, strategy2.memory_one, rounds=rounds)
+
+        # Fresh battles rather than the cache's samples, which may be too few to average
+        samples = [get_battle_tally(player1, player2, rounds=rounds) for _ in range(self.stochastic_samples)]
+        return OutcomeTally(
+            sum(tally.coop_coop for tally in samples) / len(samples),
+            sum(tally.coop_defect for tally in samples) / len(samples),
+            sum(tally.defect_coop for tally in samples) / len(samples),
+            sum(tally.defect_defect for tally in samples) / len(samples),
+        )
+
+    def do_generation(
+        self,
+        matchup_rate: float = 1.0,
+        payoff_matrix: PayoffMatrix | None = None,
+        rounds: int = 50,
+        overall_food: int = 1_000,
+        adjust_populations: bool = True,
+        *,
+        mutation_strategies: list[Strategy] | None = None,
+        mutation_probability: float = 0,
+        can_mutate_parent: bool = False
+    ) -> None:
+        """
+        Does one generation, with the same parameters and meaning as
+        `Population.do_generation`.
+
+        `matchup_rate` is accepted for compatibility, but has no effect: In
+        `Population` it only changes how many matchups a player's score is
+        averaged over, not the expected score itself, which is what the
+        count-based engine uses.
+        """
+        scores = self.get_species_scores(payoff_matrix=payoff_matrix, rounds=rounds)
+        if adjust_populations:
+            self.__adjust_populations(
+                scores,
+                overall_food,
+                mutation_strategies=mutation_strategies,
+                mutation_probability=mutation_probability,
+                can_mutate_parent=can_mutate_parent,
+            )
+
+    def __adjust_populations(
+            self,
+            scores: dict[str, float],
+            overall_food: int,
+            *,
+            mutation_strategies: list[Strategy] | None,
+            mutation_probability: float,
+            can_mutate_parent: bool
+    ) -> None:
+        """
+        Appends the next generation of cohorts, drawing the number of
+        offspring and mutations of each cohort from binomial distributions.
+        """
+        population_size = self.population_size
+        new_cohorts: dict[tuple[str, int], int] = {}
+
+        def add(name: str, age: int, count: int) -> None:
+            if count > 0:
+                new_cohorts[name, age] = new_cohorts.get((name, age), 0) + count
+
+        def add_mutating(name: str, age: int, count: int) -> None:
+            mutations = binomial(count, mutation_probability) if mutation_probability > 0 else 0
+            add(name, age, count - mutations)
+            if mutations > 0:
+                for strategy, mutated in zip(mutation_strategies, split_uniformly(mutations, len(mutation_strategies))):
+                    add(strategy.__class__.__name__, age, mutated)
+
+        for (name, age), count in self.cohorts[-1].items():
+            # Same formula as `Population`, see `Population.__adjust_populations`
+            expected_offspring = scores[name] * overall_food / population_size
+            if expected_offspring < 0:
+                raise ValueError(f"Expected a non-negative number of offspring, but got {expected_offspring} for {name}")
+
+            whole, fraction = divmod(expected_offspring, 1)
+            whole = int(whole)
+            rounded_up = binomial(count, fraction)  # Players that got one more offspring
+
+            if whole == 0:
+                survivors, children = rounded_up, 0
+            else:
+                survivors, children = count, count * (whole - 1) + rounded_up
+
+            if can_mutate_parent:
+                add_mutating(name, age + 1, survivors)
+            else:
+                add(name, age + 1, survivors)
+            add_mutating(name, 0, children)
+
+        for name, _ in new_cohorts:
+            if name not in self.strategies:
+                self.strategies[name] = next(
+                    strategy for strategy in mutation_strategies
+                    if strategy.__class__.__name__ == name
+                )
+
+        self.cohorts.append(new_cohorts)
@@ -0,0 +1,128 @@
+"""
+A cache of species-vs-species battle results, so that a `Population`
+only has to play each pairing of strategies once instead of once per
+pair of players.
+"""
+from __future__ import annotations
+from typing import TYPE_CHECKING
+import random
+
+from utils.simulation_utils import (
+    Player,
+    Strategy,
+    OutcomeTally,
+    PayoffMatrix,
+)
+from utils.routing import get_battle_tally
+
+if TYPE_CHECKING:
+    from utils.profiling import SimulationStats
+
+
+
+class MatchupCache:
+    """
+    Remembers the `OutcomeTally` of battles between two strategy classes,
+    keyed by (strategy class, strategy class, rounds). Tallies are stored
+    instead of scores, so changing the payoff matrix doesn't require any
+    battles to be replayed.
+
+    Deterministic strategies always produce the same game against each other,
+    so a single battle per pairing is enough. Strategies count as
+    deterministic only if they set `Strategy.deterministic = True`, and
+    battles involving any other strategy are never cached by default. Set
+    `stochastic_samples` to a positive number to instead store that many
+    battles per pairing and draw one of them at random on each lookup.
+
+    ## Example
+    >>> cache = MatchupCache()
+    >>> pop = Population([players], matchup_cache=cache)
+    >>> pop.do_generation()
+    >>> cache.misses  # Number of battles actually played
+    """
+    def __init__(self, stochastic_samples: int = 0) -> None:
+        if stochastic_samples < 0:
+            raise ValueError(f"Expected `stochastic_samples` to be non-negative, but got {stochastic_samples}")
+        self.stochastic_samples = stochastic_samples
+        self.hits = 0
+        self.misses = 0
+        self._tallies: dict[tuple[type[Strategy], type[Strategy], int], list[OutcomeTally]] = {}
+
+    def __len__(self) -> int:
+        return len(self._tallies)
+
+    def clear(self) -> None:
+        self._tallies.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def get_tally(
+            self,
+            player1: Player,
+            player2: Player,
+            *,
+            rounds: int = 100,
+            stats: SimulationStats | None = None
+    ) -> OutcomeTally:
+        """
+        Returns the outcome tally of `player1` battling `player2`, seen from
+        `player1`'s perspective, playing the battle only if it isn't cached.
+        """
+        # Strategies that don't declare themselves deterministic are assumed to be random
+        deterministic = player1.strategy.deterministic and player2.strategy.deterministic
+        samples_wanted = 1 if deterministic else self.stochastic_samples
+
+        if samples_wanted == 0:
+            self.misses += 1
+            return get_battle_tally(player1, player2, rounds=rounds, stats=stats)
+
+        key = (type(player1.strategy), type(player2.strategy), rounds)
+        samples = self._get_samples(key)
+
+        if len(samples) < samples_wanted:
+            self.misses += 1
+            tally = self._play(player1, player2, rounds=rounds, sample=len(samples), stats=stats)
+            self._add_sample(key, tally)
+            # The same battle seen from the other side is just as valid a sample
+            reverse_key = (key[1], key[0], rounds)
+            if reverse_key != key:
+                self._add_sample(reverse_key, tally.swapped())
+            return tally
+
+        self.hits += 1
+        return samples[0] if deterministic else random.choice(samples)
+
+    # The methods below are where subclasses can store tallies elsewhere, see `utils.persistent_cache`
+
+    def _get_samples(self, key: tuple[type[Strategy], type[Strategy], int]) -> list[OutcomeTally]:
+        return self._tallies.setdefault(key, [])
+
+    def _add_sample(self, key: tuple[type[Strategy], type[Strategy], int], tally: OutcomeTally) -> None:
+        self._get_samples(key).append(tally)
+
+    def _play(
+            self,
+            player1: Player,
+            player2: Player,
+            *,
+            rounds: int,
+            sample: int,
+            stats: SimulationStats | None
+    ) -> OutcomeTally:
+        """Plays the battle for the `sample`th stored tally of this pairing."""
+        return get_battle_tally(player1, player2, rounds=rounds, stats=stats)
+
+    def battle(
+            self,
+            player1: Player,
+            player2: Player,
+            *,
+            rounds: int = 100,
+            payoff_matrix: PayoffMatrix | None = None,
+            stats: SimulationStats | None = None
+    ) -> tuple[float, float]:
+        """
+        Drop-in replacement for `battle(player1, player2, ...)` that looks
+        the result up in the cache when possible.
+        """
+        return self.get_tally(player1, player2, rounds=rounds, stats=stats).get_score(payoff_matrix=payoff_matrix)
@@ -0,0 +1,62 @@
+"""
+Chooses which pairs of players battle in a generation, doing work only for
+the matchups that actually happen rather than for all (N choose 2) pairs.
+
+Players are referred to by their index in the generation.
+"""
+from __future__ import annotations
+from collections.abc import Iterator
+import math
+import random
+
+
+
+def sample_pairs(population_size: int, matchup_rate: float, rows: range | None = None) -> Iterator[tuple[int, int]]:
+    """
+    Yields each pair `(i, j)` with `i < j` with probability `matchup_rate`,
+    in lexicographic order. Only pairs whose first index is in `rows` (by
+    default all of them) are considered, see `utils.parallel.split_rows`.
+
+    Instead of drawing a random number per pair, the gap to the next chosen
+    pair is drawn from a geometric distribution, so this takes
+    O(len(rows) + number of chosen pairs) time.
+    """
+    if rows is None:
+        rows = range(population_size - 1)
+
+    if matchup_rate >= 1:
+        for i in rows:
+            for j in range(i + 1, population_size):
+                yield i, j
+        return
+    if matchup_rate <= 0 or not rows:
+        return
+
+    log_miss_rate = math.log(1 - matchup_rate)
+    i, j = rows.start, rows.start  # The pair before the next candidate
+    while True:
+        # 1 - random.random() is in (0, 1], so its logarithm is finite
+        j += 1 + int(math.log(1 - random.random()) / log_miss_rate)
+        while j >= population_size:
+            # Carry the gap over to the next row, which starts at (i + 1, i + 2)
+            i += 1
+            j += i + 1 - population_size
+            if i >= rows.stop:
+                return
+        yield i, j
+
+
+def sample_opponents(population_size: int, opponents: int) -> Iterator[tuple[int, int]]:
+    """
+    Yields `opponents` pairs `(i, j)` for every player `i`, where the `j`s are
+    distinct players other than `i`, chosen at random. A player therefore
+    battles `2 * opponents` times on average (the pairs it picks, and the
+    ones it is picked in), in O(population_size * opponents) time.
+    """
+    if not 0 <= opponents < max(population_size, 1):
+        raise ValueError(f"Expected between 0 and {population_size - 1} opponents per player, but got {opponents}")
+
+    for i in range(population_size):
+        for j in random.sample(range(population_size - 1), opponents):
+            # Skip over the player itself
+            yield i, j if j < i else j + 1
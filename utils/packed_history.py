@@ -0,0 +1,167 @@
+"""
+Compact storage for very long games. Moves are packed into a bytearray with
+one bit per move (COOP = 0, DEFECT = 1), instead of a list with one pointer
+per move, so a game of a million rounds takes about 250 KB instead of 16 MB.
+Counts and outcome tallies of packed games are computed with popcounts.
+"""
+from __future__ import annotations
+from collections.abc import Iterable, Sequence
+
+from utils.simulation_utils import (
+    Action,
+    GameRecord,
+    History,
+    OutcomeTally,
+)
+
+
+_ACTIONS = (Action.COOP, Action.DEFECT)  # Indexed by bit
+
+
+
+def popcount(data: bytes | bytearray, /) -> int:
+    """Returns the number of set bits in `data`."""
+    return int.from_bytes(data, "little").bit_count()
+
+
+
+class PackedMoves(Sequence[Action]):
+    """
+    A sequence of `Action`s stored as bits. Supports everything strategies
+    usually do with `History.own_moves` and `History.opponent_moves`, i.e.
+    `len`, indexing (also negative), slicing, iteration, `count` and `append`.
+    """
+    __slots__ = ("bits", "length")
+
+    def __init__(self, moves: Iterable[Action] = ()) -> None:
+        self.bits = bytearray()
+        self.length = 0
+        for move in moves:
+            self.append(move)
+
+    @classmethod
+    def from_bytes(cls, bits: bytes | bytearray, length: int) -> PackedMoves:
+        """Wraps the first `length` bits of `bits`, e.g. as returned by `to_bytes`."""
+        if not 0 <= length <= 8 * len(bits):
+            raise ValueError(f"Can't read {length} moves from {len(bits)} bytes")
+        moves = cls()
+        moves.bits = bytearray(bits[:(length + 7) // 8])
+        moves.length = length
+        if length % 8:
+            moves.bits[-1] &= (1 << length % 8) - 1  # Clear the padding, so popcounts are correct
+        return moves
+
+    def to_bytes(self) -> bytes:
+        return bytes(self.bits)
+
+    def append(self, move: Action) -> None:
+        i = self.length
+        if i % 8 == 0:
+            self.bits.append(0)
+        if move.value:
+            self.bits[i >> 3] |= 1 << (i & 7)
+        self.length = i + 1
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return PackedMoves(self[i] for i in range(*index.indices(self.length)))
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError("PackedMoves index out of range")
+        return _ACTIONS[(self.bits[index >> 3] >> (index & 7)) & 1]
+
+    def __iter__(self):
+        bits = self.bits
+        for i in range(self.length):
+            yield _ACTIONS[(bits[i >> 3] >> (i & 7)) & 1]
+
+    def count(self, move: Action) -> int:
+        defections = popcount(self.bits)
+        return defections if move is Action.DEFECT else self.length - defections
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, PackedMoves):
+            return self.length == other.length and self.bits == other.bits
+        if isinstance(other, Sequence):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"PackedMoves({list(self)})"
+
+
+
+class PackedGameRecord(GameRecord):
+    """
+    A `GameRecord` whose moves are stored as `PackedMoves`. Use it for very
+    long games, e.g. `player.get_battle_history(opponent, rounds=10**6, record_type=PackedGameRecord)`,
+    or to archive many games with `to_bytes` and `from_bytes`.
+    """
+    __slots__ = ()
+
+    def __init__(
+            self,
+            first_moves: Iterable[Action] | None = None,
+            second_moves: Iterable[Action] | None = None
+    ) -> None:
+        super().__init__()
+        self.moves = (PackedMoves(), PackedMoves())
+        for first_move, second_move in zip(first_moves or [], second_moves or []):
+            self.append(first_move, second_move)
+
+    def to_bytes(self) -> bytes:
+        """Serializes the game as its length (8 bytes) followed by both players' bits."""
+        first_moves, second_moves = self.moves
+        return len(self).to_bytes(8, "little") + first_moves.to_bytes() + second_moves.to_bytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes | bytearray) -> PackedGameRecord:
+        """
+        Loads a game saved with `to_bytes`. The tallies are computed with
+        popcounts rather than by replaying the game move by move.
+        """
+        length = int.from_bytes(data[:8], "little")
+        size = (length + 7) // 8
+        first_moves = PackedMoves.from_bytes(data[8:8 + size], length)
+        second_moves = PackedMoves.from_bytes(data[8 + size:8 + 2*size], length)
+
+        record = cls()
+        record.moves = (first_moves, second_moves)
+        tally = get_packed_outcome_tally(first_moves, second_moves)
+        record.outcome_counts = [tally.coop_coop, tally.coop_defect, tally.defect_coop, tally.defect_defect]
+        record.defections = [tally.defect_coop + tally.defect_defect, tally.coop_defect + tally.defect_defect]
+        record.streaks = [_get_streak(first_moves), _get_streak(second_moves)]
+        return record
+
+
+
+def _get_streak(moves: PackedMoves) -> int:
+    """Returns how many moves in a row at the end are the same as the last move."""
+    streak = 0
+    for i in range(len(moves) - 1, -1, -1):
+        if moves[i] is not moves[-1]:
+            break
+        streak += 1
+    return streak
+
+
+def get_packed_outcome_tally(first_moves: PackedMoves, second_moves: PackedMoves) -> OutcomeTally:
+    """Returns the outcome tally of two packed move sequences using popcounts."""
+    if len(first_moves) != len(second_moves):
+        raise ValueError(f"Expected moves of equal length, but got {len(first_moves)} and {len(second_moves)}")
+    first_bits = int.from_bytes(first_moves.bits, "little")
+    second_bits = int.from_bytes(second_moves.bits, "little")
+    defect_defect = (first_bits & second_bits).bit_count()
+    defect_coop = first_bits.bit_count() - defect_defect
+    coop_defect = second_bits.bit_count() - defect_defect
+    coop_coop = len(first_moves) - defect_coop - coop_defect - defect_defect
+    return OutcomeTally(coop_coop, coop_defect, defect_coop, defect_defect)
+
+
+def load_history(data: bytes | bytearray) -> History:
+    """Loads a game saved with `PackedGameRecord.to_bytes`, from the first player's perspective."""
+    return History.from_record(PackedGameRecord.from_bytes(data), 0)
@@ -0,0 +1,168 @@
+"""
+Plays a generation's matchups on several cores. The upper triangle of the
+matchup matrix is split into chunks of whole rows, and each chunk is played
+in a worker process with its own random number generator stream, seeded
+from the generation's seed and the chunk's index. Since the chunks only
+depend on the population size and `chunk_size`, the results are the same
+for a given seed, whatever the number of workers.
+
+Each worker routes its matchups like a serial generation does (see
+`utils.routing`), so `vectorized` and `expected_payoffs` apply the same way,
+and the statistics it records are added to the caller's `SimulationStats`.
+"""
+from __future__ import annotations
+from typing import TYPE_CHECKING
+import random
+
+from utils.simulation_utils import (
+    Player,
+    Strategy,
+    PayoffMatrix,
+)
+from utils.matchup_cache import MatchupCache
+from utils.matchups import sample_pairs
+from utils.profiling import SimulationStats
+from utils.routing import route_matchups
+from utils.settings import get_settings
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+
+
+# Roughly how many (possible) matchups each worker task gets
+CHUNK_SIZE = 20_000
+
+
+
+def split_rows(population_size: int, chunk_size: int = CHUNK_SIZE) -> list[range]:
+    """
+    Splits the rows of the upper triangle of the matchup matrix, where row
+    `i` holds the matchups of player `i` against players `i+1, ..., N-1`,
+    into ranges of consecutive rows with about `chunk_size` matchups each.
+    """
+    chunks = []
+    start = 0
+    matchups = 0
+    for row in range(population_size - 1):
+        matchups += population_size - 1 - row
+        if matchups >= chunk_size:
+            chunks.append(range(start, row + 1))
+            start, matchups = row + 1, 0
+    if start < population_size - 1:
+        chunks.append(range(start, population_size - 1))
+    return chunks
+
+
+def _play_chunk(
+        strategies: list[Strategy],
+        species: list[int],
+        rows: range,
+        matchup_rate: float,
+        rounds: int,
+        payoff_matrix: PayoffMatrix,
+        seed: str,
+        stochastic_samples: int | None,
+        vectorized: bool,
+        expected_payoffs: bool,
+        profiled: bool
+) -> tuple[list[float], SimulationStats | None]:
+    """
+    Plays the matchups of `rows` (see `split_rows`), where player `i` uses
+    `strategies[species[i]]`, and returns the sum of each player's scores,
+    along with the chunk's statistics if it's `profiled`. Runs in a worker
+    process, so it seeds the process' global RNG, which is also the one
+    the strategies use.
+    """
+    random.seed(seed)
+    players = [Player(strategies[index]) for index in species]
+    stats = SimulationStats() if profiled else None
+    pairs = list(sample_pairs(len(players), matchup_rate, rows))
+    matchups = [(players[i], players[j]) for i, j in pairs]
+    matchup_scores = route_matchups(
+        matchups,
+        rounds=rounds,
+        payoff_matrix=payoff_matrix,
+        cache=None if stochastic_samples is None else MatchupCache(stochastic_samples),
+        vectorized=vectorized,
+        expected_payoffs=expected_payoffs,
+        stats=stats,
+    )
+
+    scores = [0.0] * len(players)
+    for (i, j), (score1, score2) in zip(pairs, matchup_scores):
+        scores[i] += score1
+        scores[j] += score2
+    return scores, stats
+
+
+def get_parallel_scores(
+        players: list[Player],
+        executor: Executor | None,
+        *,
+        matchup_rate: float = 1.0,
+        payoff_matrix: PayoffMatrix | None = None,
+        rounds: int = 50,
+        seed: int | str = 0,
+        cache: MatchupCache | None = None,
+        vectorized: bool = False,
+        expected_payoffs: bool = False,
+        stats: SimulationStats | None = None,
+        chunk_size: int = CHUNK_SIZE
+) -> list[float]:
+    """
+    Battles every pair of `players` with probability `matchup_rate` and
+    returns the sum of each player's scores, in the same order as `players`.
+
+    The chunks are sent to `executor`, which should run them in separate
+    processes, such as a `concurrent.futures.ProcessPoolExecutor` (in threads,
+    the chunks would reseed each other's RNG). If `executor` is None, the
+    chunks are played in this process, which gives the same results.
+
+    If a `cache` is given, each chunk uses its own `MatchupCache` with the
+    same `stochastic_samples`, since caches can't be shared between processes.
+    `vectorized` and `expected_payoffs` have the same meaning as in
+    `Population.do_generation`, and the battles played by the chunks are
+    added to `stats` if given.
+    """
+    if payoff_matrix is None:
+        # Resolved here so that the workers don't read their own config file
+        payoff_matrix = get_settings().payoff_matrix
+    strategy_indices: dict[Strategy, int] = {}
+    for player in players:
+        strategy_indices.setdefault(player.strategy, len(strategy_indices))
+    strategies = list(strategy_indices)
+    species = [strategy_indices[player.strategy] for player in players]
+    stochastic_samples = None if cache is None else cache.stochastic_samples
+
+    chunks = split_rows(len(players), chunk_size)
+    args = [
+        [strategies] * len(chunks),
+        [species] * len(chunks),
+        chunks,
+        [matchup_rate] * len(chunks),
+        [rounds] * len(chunks),
+        [payoff_matrix] * len(chunks),
+        [f"{seed}:{chunk}" for chunk in range(len(chunks))],
+        [stochastic_samples] * len(chunks),
+        [vectorized] * len(chunks),
+        [expected_payoffs] * len(chunks),
+        [stats is not None] * len(chunks),
+    ]
+
+    if executor is None:
+        state = random.getstate()
+        try:
+            results = list(map(_play_chunk, *args))
+        finally:
+            random.setstate(state)
+    else:
+        results = list(executor.map(_play_chunk, *args))
+
+    # Reduce in chunk order, so the floating point sums are reproducible
+    scores = [0.0] * len(players)
+    for chunk_scores, chunk_stats in results:
+        for i, score in enumerate(chunk_scores):
+            scores[i] += score
+        if stats is not None:
+            stats.merge(chunk_stats)
+    return scores
@@ -0,0 +1,172 @@
+"""
+A `MatchupCache` that also keeps its tallies in an SQLite file, so that a
+new script run or app session starts with every pairing it has seen before.
+
+Tallies are stored under a hash of the source code of both strategy
+classes, so editing a strategy automatically stops its old results from
+being used. Battles between deterministic strategies don't depend on the
+seed and are shared between seeds, while the samples of stochastic
+battles (see `MatchupCache.stochastic_samples`) are played with an RNG
+seeded from `seed`, the pairing and the sample's index, so a given seed
+always stores the same samples.
+
+Strategies whose source can't be read (e.g. classes defined in a REPL)
+are cached in memory only, like in a plain `MatchupCache`.
+
+## Example
+>>> with PersistentMatchupCache(".cache/tallies.sqlite") as cache:
+...     pop = Population([players], matchup_cache=cache)
+...     pop.do_generation()
+>>> cache.misses  # 0 the second time the script runs
+"""
+from __future__ import annotations
+from functools import cache
+from pathlib import Path
+from typing import TYPE_CHECKING
+import hashlib
+import inspect
+import os
+import random
+import threading
+
+from utils.simulation_utils import (
+    Player,
+    Strategy,
+    OutcomeTally,
+)
+from utils.matchup_cache import MatchupCache
+
+if TYPE_CHECKING:
+    from utils.profiling import SimulationStats
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tallies (
+    strategy1 TEXT NOT NULL,
+    strategy2 TEXT NOT NULL,
+    rounds INTEGER NOT NULL,
+    seed TEXT NOT NULL,
+    sample INTEGER NOT NULL,
+    coop_coop,
+    coop_defect,
+    defect_coop,
+    defect_defect,
+    PRIMARY KEY (strategy1, strategy2, rounds, seed, sample)
+)
+"""
+
+
+
+@cache
+def get_strategy_digest(strategy_class: type[Strategy]) -> str | None:
+    """
+    Returns a hash of the source code of `strategy_class` and of the classes
+    it inherits from (up to, but not including, `Strategy`), or None if the
+    source isn't available.
+    """
+    digest = hashlib.sha256()
+    for cls in strategy_class.__mro__:
+        if cls is Strategy or not issubclass(cls, Strategy):
+            continue
+        try:
+            source = inspect.getsource(cls)
+        except (OSError, TypeError):
+            return None
+        digest.update(f"{cls.__module__}.{cls.__qualname__}\n{source}".encode())
+    return digest.hexdigest()
+
+
+
+class PersistentMatchupCache(MatchupCache):
+    """
+    A `MatchupCache` whose tallies are also stored in the SQLite database at
+    `path` (see the module's documentation). It can be shared between
+    threads, and several processes can use the same file.
+    """
+    def __init__(self, path: str | os.PathLike, stochastic_samples: int = 0, *, seed: int | str = 0) -> None:
+        import sqlite3  # Imported here to keep importing utils fast
+
+        super().__init__(stochastic_samples)
+        self.path = Path(path)
+        self.seed = seed
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute(_SCHEMA)
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def __enter__(self) -> PersistentMatchupCache:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def clear(self) -> None:
+        """Forgets every tally, including those stored in the file."""
+        super().clear()
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM tallies")
+
+    def __get_row_key(self, key: tuple[type[Strategy], type[Strategy], int]) -> tuple[str, str, int, str] | None:
+        """Returns the (strategy1, strategy2, rounds, seed) columns of `key`, or None if it can't be stored."""
+        strategy1, strategy2, rounds = key
+        digest1, digest2 = get_strategy_digest(strategy1), get_strategy_digest(strategy2)
+        if digest1 is None or digest2 is None:
+            return None
+        seed = "" if strategy1.deterministic and strategy2.deterministic else str(self.seed)
+        return digest1, digest2, rounds, seed
+
+    def _get_samples(self, key: tuple[type[Strategy], type[Strategy], int]) -> list[OutcomeTally]:
+        if key in self._tallies:
+            return self._tallies[key]
+        row_key = self.__get_row_key(key)
+        if row_key is None:
+            return super()._get_samples(key)
+
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT coop_coop, coop_defect, defect_coop, defect_defect FROM tallies"
+                " WHERE strategy1 = ? AND strategy2 = ? AND rounds = ? AND seed = ? ORDER BY sample",
+                row_key,
+            ).fetchall()
+        samples = [OutcomeTally(*row) for row in rows]
+        if row_key[3]:
+            # Stochastic pairing: other runs may have stored more samples than this cache keeps
+            samples = samples[:self.stochastic_samples]
+        return self._tallies.setdefault(key, samples)
+
+    def _add_sample(self, key: tuple[type[Strategy], type[Strategy], int], tally: OutcomeTally) -> None:
+        sample = len(self._get_samples(key))
+        super()._add_sample(key, tally)
+        row_key = self.__get_row_key(key)
+        if row_key is None:
+            return
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR IGNORE INTO tallies VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (*row_key, sample, tally.coop_coop, tally.coop_defect, tally.defect_coop, tally.defect_defect),
+            )
+
+    def _play(
+            self,
+            player1: Player,
+            player2: Player,
+            *,
+            rounds: int,
+            sample: int,
+            stats: SimulationStats | None
+    ) -> OutcomeTally:
+        row_key = self.__get_row_key((type(player1.strategy), type(player2.strategy), rounds))
+        if row_key is None or not row_key[3]:
+            return super()._play(player1, player2, rounds=rounds, sample=sample, stats=stats)
+
+        # Seeded from the pairing and sample, so that a given seed always stores the same samples
+        state = random.getstate()
+        random.seed(":".join(map(str, (*row_key, sample))))
+        try:
+            return super()._play(player1, player2, rounds=rounds, sample=sample, stats=stats)
+        finally:
+            random.setstate(state)
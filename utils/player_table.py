@@ -0,0 +1,172 @@
+"""
+Structure-of-arrays storage for a generation of players: one array of
+species indices, one of ages and one of most recent scores, instead of one
+Python object per player. This takes about 20 bytes per player, and
+statistics over the whole generation are loops over flat arrays.
+
+Individual players are still available as `PlayerHandle`s, which behave
+like `Player`s but read and write their attributes in the table, so a
+`PlayerTable` can be used anywhere a list of players is, e.g. as a
+generation of a `Population`.
+
+Tables are opt-in: a `Population` only stores its generations as tables if
+it's given one as its first generation. It then builds every next generation
+directly as a table, and computes its per-species statistics from the arrays.
+
+## Example
+>>> table = PlayerTable.from_players(players)
+>>> table[0].age += 1  # Changes the age stored in the table
+>>> table.get_population_counts()
+>>> pop = Population([table])
+"""
+from __future__ import annotations
+from collections.abc import Iterable, Iterator, Sequence
+from array import array
+from typing import overload
+
+from utils.simulation_utils import (
+    Player,
+    Strategy,
+)
+
+
+
+class PlayerHandle(Player):
+    """
+    A `Player` whose strategy, age and score are stored at `index` in `table`.
+    Handles to the same player compare equal, so a player keeps its identity
+    however many times it's looked up.
+    """
+    __slots__ = ("table", "index")
+
+    def __init__(self, table: PlayerTable, index: int) -> None:
+        self.table = table
+        self.index = index
+
+    @property
+    def strategy(self) -> Strategy:
+        return self.table.strategies[self.table.species[self.index]]
+
+    @strategy.setter
+    def strategy(self, strategy: Strategy) -> None:
+        self.table.species[self.index] = self.table.get_species_index(strategy)
+
+    @property
+    def age(self) -> int:
+        return self.table.ages[self.index]
+
+    @age.setter
+    def age(self, age: int) -> None:
+        self.table.ages[self.index] = age
+
+    @property
+    def most_recent_score(self) -> float:
+        return self.table.scores[self.index]
+
+    @most_recent_score.setter
+    def most_recent_score(self, score: float) -> None:
+        self.table.scores[self.index] = score
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, PlayerHandle):
+            return NotImplemented
+        return self.table is other.table and self.index == other.index
+
+    def __hash__(self) -> int:
+        return hash((id(self.table), self.index))
+
+
+
+class PlayerTable(Sequence[PlayerHandle]):
+    """
+    A generation of players stored as parallel arrays, where player `i` uses
+    `strategies[species[i]]`, is `ages[i]` generations old and scored
+    `scores[i]`.
+    """
+    def __init__(self, strategies: Iterable[Strategy] = ()) -> None:
+        self.strategies: list[Strategy] = []
+        self._species_indices: dict[Strategy, int] = {}
+        self.species = array("I")
+        self.ages = array("q")
+        self.scores = array("d")
+        for strategy in strategies:
+            self.get_species_index(strategy)
+
+    @classmethod
+    def from_players(cls, players: Iterable[Player]) -> PlayerTable:
+        table = cls()
+        table.extend(players)
+        return table
+
+    def to_players(self) -> list[Player]:
+        """Returns independent `Player` objects with the same attributes."""
+        return [
+            Player(self.strategies[index], age=age, most_recent_score=score)
+            for index, age, score in zip(self.species, self.ages, self.scores)
+        ]
+
+    def get_species_index(self, strategy: Strategy) -> int:
+        """Returns the index of `strategy` in `strategies`, adding it if needed."""
+        index = self._species_indices.get(strategy)
+        if index is None:
+            index = self._species_indices[strategy] = len(self.strategies)
+            self.strategies.append(strategy)
+        return index
+
+    def append(self, strategy: Strategy, *, age: int = 0, most_recent_score: float = 0) -> PlayerHandle:
+        self.species.append(self.get_species_index(strategy))
+        self.ages.append(age)
+        self.scores.append(most_recent_score)
+        return PlayerHandle(self, len(self.species) - 1)
+
+    def extend(self, players: Iterable[Player]) -> None:
+        """Appends the strategy, age and score of each of `players`."""
+        for player in players:
+            self.append(player.strategy, age=player.age, most_recent_score=player.most_recent_score)
+
+    def __len__(self) -> int:
+        return len(self.species)
+
+    @overload
+    def __getitem__(self, index: int) -> PlayerHandle: ...
+    @overload
+    def __getitem__(self, index: slice) -> list[PlayerHandle]: ...
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [PlayerHandle(self, i) for i in range(len(self))[index]]
+        if not -len(self) <= index < len(self):
+            raise IndexError(f"Player index {index} out of range for a table of {len(self)} players")
+        return PlayerHandle(self, index % len(self))
+
+    def __iter__(self) -> Iterator[PlayerHandle]:
+        return (PlayerHandle(self, i) for i in range(len(self)))
+
+    def __get_species_totals(self, values: Sequence[float]) -> list[float]:
+        totals = [0] * len(self.strategies)
+        for index, value in zip(self.species, values):
+            totals[index] += value
+        return totals
+
+    def get_species_counts(self) -> list[int]:
+        """Returns the number of players of each species, in the order of `strategies`."""
+        counts = [0] * len(self.strategies)
+        for index in self.species:
+            counts[index] += 1
+        return counts
+
+    def get_population_counts(self) -> dict[str, int]:
+        counts: dict[str, int] = {}
+        for strategy, count in zip(self.strategies, self.get_species_counts()):
+            name = strategy.__class__.__name__
+            counts[name] = counts.get(name, 0) + count
+        return counts
+
+    def get_species_total_ages(self) -> list[int]:
+        return self.__get_species_totals(self.ages)
+
+    def get_species_total_scores(self) -> list[float]:
+        return self.__get_species_totals(self.scores)
+
+    @property
+    def average_age(self) -> float:
+        return sum(self.ages) / len(self)
@@ -0,0 +1,94 @@
+"""
+Optional instrumentation of the simulation. Pass a `SimulationStats` object
+to a `Population` (or to `battle`) to record where the time goes. When no
+stats object is given, battles run the exact same loop as before, so there
+is no overhead when profiling is disabled.
+"""
+from __future__ import annotations
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+import time
+
+
+
+@dataclass
+class StrategyStats:
+    """Cumulative cost of one strategy's `decide` calls."""
+    decide_calls: int = 0
+    decide_seconds: float = 0.0
+
+    @property
+    def seconds_per_call(self) -> float:
+        return self.decide_seconds / self.decide_calls if self.decide_calls else 0.0
+
+
+
+@dataclass
+class SimulationStats:
+    """
+    Cumulative statistics of a simulation:
+
+    - `phase_seconds`: wall time spent in each phase of `Population.do_generation`,
+      i.e. "battles" and "reproduction".
+    - `generations`, `battles` and `rounds`: how many generations, battles and
+      rounds were actually simulated (battles found in a `MatchupCache` don't count).
+    - `scored_rounds`: how many rounds the simulated battles lasted. This is more
+      than `rounds` when battles are scored without playing every round, e.g.
+      from the cycle a game falls into or from expected payoffs (see `utils.routing`).
+    - `strategies`: the number of `decide` calls and the time spent in them, per
+      strategy class name.
+
+    Battles played in worker processes (see `utils.parallel`) are merged into
+    these statistics, and battles played by the vectorized engine don't call `decide`.
+
+    ## Example
+    >>> stats = SimulationStats()
+    >>> pop = Population([players], stats=stats)
+    >>> pop.do_generation()
+    >>> stats.strategies["Majority"].decide_seconds
+    """
+    phase_seconds: dict[str, float] = field(default_factory=dict)
+    generations: int = 0
+    battles: int = 0
+    rounds: int = 0
+    scored_rounds: int = 0
+    strategies: dict[str, StrategyStats] = field(default_factory=dict)
+
+    @contextmanager
+    def time_phase(self, phase: str) -> Iterator[None]:
+        """Adds the wall time spent inside the `with` block to `phase`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phase_seconds[phase] = self.phase_seconds.get(phase, 0.0) + time.perf_counter() - start
+
+    def record_battle(self, rounds: int, *, played_rounds: int | None = None) -> None:
+        """Records a battle of `rounds` rounds, of which `played_rounds` (by default all) were played."""
+        self.battles += 1
+        self.rounds += rounds if played_rounds is None else played_rounds
+        self.scored_rounds += rounds
+
+    def record_decisions(self, strategy_name: str, calls: int, seconds: float) -> None:
+        strategy_stats = self.strategies.get(strategy_name)
+        if strategy_stats is None:
+            strategy_stats = self.strategies[strategy_name] = StrategyStats()
+        strategy_stats.decide_calls += calls
+        strategy_stats.decide_seconds += seconds
+
+    def merge(self, other: SimulationStats) -> None:
+        """Adds the statistics recorded in `other`, e.g. by a worker process."""
+        for phase, seconds in other.phase_seconds.items():
+            self.phase_seconds[phase] = self.phase_seconds.get(phase, 0.0) + seconds
+        self.generations += other.generations
+        self.battles += other.battles
+        self.rounds += other.rounds
+        self.scored_rounds += other.scored_rounds
+        for name, strategy_stats in other.strategies.items():
+            self.record_decisions(name, strategy_stats.decide_calls, strategy_stats.decide_seconds)
+
+    def reset(self) -> None:
+        self.phase_seconds.clear()
+        self.generations = self.battles = self.rounds = self.scored_rounds = 0
+        self.strategies.clear()
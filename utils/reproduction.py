@@ -0,0 +1,123 @@
+"""
+Batched reproduction step for `Population`. The number of offspring of
+every player is drawn at once from an array of the generation's scores
+(with numpy if it's installed), and instead of every child being created
+by its parent and drawing its own random number to decide whether it
+mutates, the number of children and mutations are drawn per species with
+binomial and multinomial sampling, and the children are created in bulk.
+
+This gives the same distribution over next generations as
+`Player.get_offspring`, with far fewer random draws and Python-level steps
+when players have many offspring.
+"""
+from __future__ import annotations
+from collections.abc import Sequence
+import random
+
+from utils.simulation_utils import (
+    Player,
+    Strategy,
+    binomial,
+)
+from utils.count_population import split_uniformly
+from utils.player_table import PlayerTable
+
+
+
+def _draw_mutations(count: int, mutation_strategies: Sequence[Strategy], mutation_probability: float) -> list[Strategy]:
+    """
+    Returns the new strategy of each of the individuals among `count` that
+    mutate, each mutating with `mutation_probability` into one of
+    `mutation_strategies` chosen uniformly at random.
+    """
+    if count == 0 or mutation_probability <= 0:
+        return []
+    mutations = binomial(count, mutation_probability)
+    if mutations == 0:
+        return []
+    return [
+        strategy
+        for strategy, mutated in zip(mutation_strategies, split_uniformly(mutations, len(mutation_strategies)))
+        for _ in range(mutated)
+    ]
+
+
+def get_offspring_counts(scores: Sequence[float], overall_food: float) -> list[int]:
+    """
+    Returns the number of offspring of each of the players with `scores`,
+    `score * overall_food / len(scores)` rounded probabilistically like
+    `round_probabilistically` does, drawn for the whole generation at once.
+    """
+    if len(scores) == 0:
+        return []
+    scale = overall_food / len(scores)
+    try:
+        import numpy as np  # Imported here since numpy is optional
+    except ImportError:
+        uniform = random.random
+        return [int(q) + (uniform() < r) for q, r in (divmod(score * scale, 1) for score in scores)]
+
+    expected = np.asarray(scores, dtype=float) * scale
+    counts = np.floor(expected)
+    # Seeded from `random`, so that `random.seed` still makes the draws reproducible
+    rng = np.random.default_rng(random.getrandbits(64))
+    counts += rng.random(len(expected)) < expected - counts
+    return counts.astype(np.int64).tolist()
+
+
+def reproduce(
+        players: Sequence[Player],
+        overall_food: int,
+        *,
+        mutation_strategies: Sequence[Strategy] | None = None,
+        mutation_probability: float = 0,
+        can_mutate_parent: bool = False
+) -> list[Player] | PlayerTable:
+    """
+    Returns the next generation of `players`, with the same offspring rule as
+    `Population.do_generation` and mutations as in `Player.get_offspring`.
+    Surviving players come first, grouped by species, followed by the
+    newborns. If `players` is a `PlayerTable`, so is the next generation,
+    and it's built without creating a `Player` per individual.
+    """
+    if isinstance(players, PlayerTable):
+        scores = players.scores
+        parents = [(players.strategies[index], age) for index, age in zip(players.species, players.ages)]
+        new_generation = PlayerTable(players.strategies)
+        add = new_generation.append
+    else:
+        scores = [player.most_recent_score for player in players]
+        parents = [(player.strategy, player.age) for player in players]
+        new_generation = []
+
+        def add(strategy: Strategy, *, age: int = 0) -> None:
+            new_generation.append(Player(strategy, age=age))
+
+    survivor_ages: dict[Strategy, list[int]] = {}
+    children: dict[Strategy, int] = {}
+
+    # Same formula as `Population.__adjust_populations`, for the whole generation at once
+    for (strategy, age), offspring in zip(parents, get_offspring_counts(scores, overall_food)):
+        if offspring < 0:
+            raise ValueError(f"Expected a non-negative number of offspring, but got {offspring} for {strategy.__class__.__name__}")
+        if offspring > 0:
+            survivor_ages.setdefault(strategy, []).append(age + 1)
+            children[strategy] = children.get(strategy, 0) + offspring - 1
+
+    for strategy, ages in survivor_ages.items():
+        strategies = [strategy] * len(ages)
+        if can_mutate_parent:
+            mutations = _draw_mutations(len(ages), mutation_strategies, mutation_probability)
+            for index, new_strategy in zip(random.sample(range(len(ages)), len(mutations)), mutations):
+                strategies[index] = new_strategy
+        for new_strategy, age in zip(strategies, ages):
+            add(new_strategy, age=age)
+
+    for strategy, count in children.items():
+        mutations = _draw_mutations(count, mutation_strategies, mutation_probability)
+        for _ in range(count - len(mutations)):
+            add(strategy)
+        for new_strategy in mutations:
+            add(new_strategy)
+
+    return new_generation
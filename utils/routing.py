@@ -0,0 +1,149 @@
+"""
+Picks the cheapest correct way to play each matchup, based on what the two
+strategies declare about themselves (see the class attributes of `Strategy`):
+
+- `CACHED`: Both strategies are deterministic and there's a `MatchupCache`,
+  so the result is looked up.
+- `VECTORIZED`: Both have a state machine and the NumPy engine was asked for,
+  so the matchup is played in a batch with the others (see `utils.vectorized`).
+- `CYCLIC`: Both have a state machine, so the battle is scored by finding the
+  cycle the game falls into, whatever the number of rounds (see `utils.analytic`).
+- `BOUNDED_MEMORY`: Both are deterministic and declare a `memory_depth`, so
+  `decide` is only called until the window of the last rounds repeats, and
+  the rest of the battle is extrapolated from the cycle (see `utils.analytic`).
+- `EXPECTED`: Both are memory-one strategies and expected payoffs were asked
+  for, so the exact expected scores are computed (see `utils.analytic`).
+- `CACHED` again: There's a `MatchupCache` that keeps samples of stochastic
+  battles, so one of them is drawn.
+- `PLAIN`: Otherwise, `decide` is called round by round.
+
+A strategy has a state machine if it declares a `state_machine`, or a
+deterministic `memory_one` description (which can be turned into one).
+"""
+from __future__ import annotations
+from collections.abc import Sequence
+from enum import Enum
+from typing import TYPE_CHECKING
+
+from utils.simulation_utils import (
+    Player,
+    Strategy,
+    OutcomeTally,
+    PayoffMatrix,
+)
+from utils.analytic import get_state_machine, get_cyclic_tally, get_bounded_memory_tally, get_expected_tally
+
+if TYPE_CHECKING:
+    from utils.matchup_cache import MatchupCache
+    from utils.profiling import SimulationStats
+
+
+
+class BattlePath(Enum):
+    CACHED = "cached"
+    VECTORIZED = "vectorized"
+    CYCLIC = "cyclic"
+    BOUNDED_MEMORY = "bounded_memory"
+    EXPECTED = "expected"
+    PLAIN = "plain"
+
+
+def _has_bounded_memory(strategy: Strategy) -> bool:
+    return strategy.deterministic and strategy.memory_depth is not None
+
+
+def choose_battle_path(
+        strategy1: Strategy,
+        strategy2: Strategy,
+        *,
+        cache: MatchupCache | None = None,
+        vectorized: bool = False,
+        expected_payoffs: bool = False
+) -> BattlePath:
+    """Returns the cheapest way to play `strategy1` against `strategy2` (see the module's documentation)."""
+    if cache is not None and strategy1.deterministic and strategy2.deterministic:
+        return BattlePath.CACHED
+    if get_state_machine(strategy1) is not None and get_state_machine(strategy2) is not None:
+        return BattlePath.VECTORIZED if vectorized else BattlePath.CYCLIC
+    if _has_bounded_memory(strategy1) and _has_bounded_memory(strategy2):
+        return BattlePath.BOUNDED_MEMORY
+    if expected_payoffs and strategy1.memory_one is not None and strategy2.memory_one is not None:
+        return BattlePath.EXPECTED
+    if cache is not None and cache.stochastic_samples > 0:
+        return BattlePath.CACHED
+    return BattlePath.PLAIN
+
+
+def get_battle_tally(
+        player1: Player,
+        player2: Player,
+        *,
+        rounds: int = 100,
+        stats: SimulationStats | None = None
+) -> OutcomeTally:
+    """
+    Returns the outcome tally of `player1` battling `player2`, seen from
+    `player1`'s perspective, scoring it from the cycle the game falls into
+    if both strategies have a state machine or a bounded memory, and playing
+    every round otherwise.
+    """
+    machine1 = get_state_machine(player1.strategy)
+    machine2 = get_state_machine(player2.strategy)
+    cyclic = machine1 is not None and machine2 is not None
+    bounded_memory = _has_bounded_memory(player1.strategy) and _has_bounded_memory(player2.strategy)
+    if not cyclic and not bounded_memory:
+        return player1.get_battle_history(player2, rounds=rounds, stats=stats).get_outcome_tally()
+
+    if cyclic:
+        if stats is not None:
+            # Scored from the state machines, without playing any round
+            stats.record_battle(rounds, played_rounds=0)
+        return get_cyclic_tally(machine1, machine2, rounds=rounds)
+    return get_bounded_memory_tally(player1, player2, rounds=rounds, stats=stats)
+
+
+def route_matchups(
+        matchups: Sequence[tuple[Player, Player]],
+        *,
+        rounds: int = 100,
+        payoff_matrix: PayoffMatrix | None = None,
+        cache: MatchupCache | None = None,
+        vectorized: bool = False,
+        expected_payoffs: bool = False,
+        stats: SimulationStats | None = None
+) -> list[tuple[float, float]]:
+    """
+    Returns the scores of every matchup, like `[battle(p1, p2, ...) for p1, p2 in matchups]`,
+    playing each one the cheapest way `choose_battle_path` allows.
+    """
+    scores: list[tuple[float, float] | None] = [None] * len(matchups)
+    batched = []
+
+    for i, (player1, player2) in enumerate(matchups):
+        path = choose_battle_path(
+            player1.strategy,
+            player2.strategy,
+            cache=cache,
+            vectorized=vectorized,
+            expected_payoffs=expected_payoffs,
+        )
+        if path is BattlePath.CACHED:
+            scores[i] = cache.battle(player1, player2, rounds=rounds, payoff_matrix=payoff_matrix, stats=stats)
+        elif path is BattlePath.VECTORIZED:
+            batched.append(i)
+        elif path is BattlePath.EXPECTED:
+            if stats is not None:
+                stats.record_battle(rounds, played_rounds=0)
+            tally = get_expected_tally(player1.strategy.memory_one, player2.strategy.memory_one, rounds=rounds)
+            scores[i] = tally.get_score(payoff_matrix=payoff_matrix)
+        else:
+            # CYCLIC, BOUNDED_MEMORY and PLAIN, since `get_battle_tally` tells them apart
+            scores[i] = get_battle_tally(player1, player2, rounds=rounds, stats=stats).get_score(payoff_matrix=payoff_matrix)
+
+    if batched:
+        from utils.vectorized import battle_many  # Imported here since numpy is optional
+        batch_scores = battle_many([matchups[i] for i in batched], rounds=rounds, payoff_matrix=payoff_matrix, stats=stats)
+        for i, score in zip(batched, batch_scores):
+            scores[i] = score
+
+    return scores
@@ -0,0 +1,83 @@
+"""
+Settings read from `config.ini`, loaded the first time they're needed
+rather than when `utils` is imported, and cached afterwards.
+
+The file is looked up in this order:
+
+1. The path given to `configure(path)`.
+2. The path in the `PRISONERS_DILEMMA_CONFIG` environment variable.
+3. `config.ini` in the current working directory, if it exists.
+4. The `config.ini` at the root of the repository.
+
+## Example
+>>> get_settings().payoff_matrix
+>>> configure("experiments/harsh.ini")  # Later lookups use this file
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from functools import cache
+from pathlib import Path
+from typing import TYPE_CHECKING
+import configparser
+import os
+
+if TYPE_CHECKING:
+    from utils.simulation_utils import PayoffMatrix
+
+
+ENVIRONMENT_VARIABLE = "PRISONERS_DILEMMA_CONFIG"
+DEFAULT_CONFIG_PATH = Path(__file__).resolve().parent.parent / "config.ini"
+
+_configured_path: Path | None = None
+
+
+
+@dataclass(frozen=True)
+class Settings:
+    payoff_matrix: PayoffMatrix
+    starting_population: int
+
+    @classmethod
+    def from_file(cls, path: str | os.PathLike) -> Settings:
+        from utils.simulation_utils import PayoffMatrix  # Imported here to avoid a circular import
+
+        config = configparser.ConfigParser()
+        if not config.read(path):
+            raise FileNotFoundError(f"Couldn't read the config file {path}")
+        return cls(
+            payoff_matrix=PayoffMatrix(
+                config.getint("PayoffMatrix", "CoopCoop"),
+                config.getint("PayoffMatrix", "CoopDefect"),
+                config.getint("PayoffMatrix", "DefectCoop"),
+                config.getint("PayoffMatrix", "DefectDefect"),
+            ),
+            starting_population=config.getint("SimulationParameters", "StartingPopulation"),
+        )
+
+
+
+def get_config_path() -> Path:
+    """Returns the path of the config file that `get_settings` reads (see the module's documentation)."""
+    if _configured_path is not None:
+        return _configured_path
+    if os.environ.get(ENVIRONMENT_VARIABLE):
+        return Path(os.environ[ENVIRONMENT_VARIABLE])
+    if Path("config.ini").exists():
+        return Path("config.ini")
+    return DEFAULT_CONFIG_PATH
+
+
+@cache
+def get_settings() -> Settings:
+    """Returns the settings, reading the config file the first time."""
+    return Settings.from_file(get_config_path())
+
+
+def configure(path: str | os.PathLike | None = None) -> None:
+    """
+    Makes `get_settings` read `path` from now on (or go back to the default
+    lookup if None), and forgets the settings read so far.
+    """
+    global _configured_path
+    _configured_path = None if path is None else Path(path)
+    get_settings.cache_clear()
@@ -5,13 +5,25 @@ Action and History. It is intended to only be imported by other files
 in the project to ensure a clean API.
 """
 from __future__ import annotations
-from collections.abc import MutableSequence
+from collections.abc import Callable, MutableSequence
 from dataclasses import dataclass, field
 from abc import ABC, abstractmethod
-import itertools as it
 from enum import Enum
+from typing import TYPE_CHECKING
+from contextlib import nullcontext
 import configparser
+import math
 import random
+import time
+
+from utils.matchups import sample_pairs, sample_opponents
+from utils.settings import get_settings
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+    from utils.matchup_cache import MatchupCache
+    from utils.player_table import PlayerTable
+    from utils.profiling import SimulationStats
 
 
 
@@ -26,6 +38,77 @@ def round_probabilistically(x: float, /) -> int:
 
 
 
+def binomial(n: int, p: float, /) -> int:
+    """
+    Returns the number of successes among `n` independent trials that each
+    succeed with probability `p`. This is `random.binomialvariate` on Python
+    3.12+, and an exact port of it on older versions (see `_binomial_fallback`).
+    """
+    if not 0 <= p <= 1:
+        raise ValueError(f"Expected a probability between 0 and 1, but got {p}")
+    if hasattr(random, "binomialvariate"):
+        return random.binomialvariate(n, p)
+    return _binomial_fallback(n, p)
+
+
+def _binomial_fallback(n: int, p: float, /) -> int:
+    """
+    Port of `random.binomialvariate` from Python 3.12, so older versions
+    draw from the exact same distribution (and, given the same seed, get
+    the same samples). Runs of failures are skipped geometrically when few
+    successes are expected, and the BTRS transformed rejection method by
+    Hörmann is used otherwise.
+    """
+    if p == 0 or n == 0:
+        return 0
+    if p == 1:
+        return n
+    if n == 1:
+        return int(random.random() < p)
+    if p > 0.5:
+        return n - _binomial_fallback(n, 1 - p)
+
+    if n * p < 10:
+        successes = trials = 0
+        c = math.log2(1 - p)
+        if not c:
+            return successes
+        while True:
+            trials += math.floor(math.log2(random.random()) / c) + 1
+            if trials > n:
+                return successes
+            successes += 1
+
+    spq = math.sqrt(n * p * (1 - p))  # Standard deviation of the distribution
+    b = 1.15 + 2.53 * spq
+    a = -0.0873 + 0.0248 * b + 0.01 * p
+    c = n * p + 0.5
+    vr = 0.92 - 4.2 / b
+    setup_complete = False
+
+    while True:
+        u = random.random() - 0.5
+        us = 0.5 - abs(u)
+        k = math.floor((2 * a / us + b) * u + c)
+        if k < 0 or k > n:
+            continue
+
+        # The "squeeze" accepts most samples without evaluating the acceptance condition
+        v = random.random()
+        if us >= 0.07 and v <= vr:
+            return k
+
+        if not setup_complete:
+            alpha = (2.83 + 5.1 / b) * spq
+            lpq = math.log(p / (1 - p))
+            m = math.floor((n + 1) * p)  # Mode of the distribution
+            h = math.lgamma(m + 1) + math.lgamma(n - m + 1)
+            setup_complete = True
+        v *= alpha / (a / (us * us) + b)
+        if math.log(v) <= h - math.lgamma(k + 1) - math.lgamma(n - k + 1) + (k - m) * lpq:
+            return k
+
+
 def flatten(list_of_lists: list[list]) -> list:
     """
     Flattens a list of lists into a single list.
@@ -137,52 +220,209 @@ class PayoffMatrix:
         }
 
 
-PAYOFF_MATRIX = PayoffMatrix.from_config()
+def __getattr__(name: str):
+    # `PAYOFF_MATRIX` and `STARTING_POPULATION` are read from the config file
+    # the first time they're used rather than on import (see `utils.settings`)
+    if name == "PAYOFF_MATRIX":
+        return get_settings().payoff_matrix
+    if name == "STARTING_POPULATION":
+        return get_settings().starting_population
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 
-def _read_starting_population(filename="config.ini") -> int:
-    """Reads the starting population from the config file."""
-    config = configparser.ConfigParser()
-    config.read(filename)
-    return config.getint("SimulationParameters", "StartingPopulation")
+@dataclass(frozen=True)
+class OutcomeTally:
+    """
+    Counts how many rounds of a game ended in each of the four outcomes,
+    seen from the first player's perspective. Unlike a score, a tally
+    doesn't depend on the payoff matrix, so it can be stored once and
+    scored later with whatever payoff matrix is in use.
 
-STARTING_POPULATION = _read_starting_population()
+    The counts of a played battle are whole numbers, but expected tallies
+    (see `utils.analytic.get_expected_tally`) and averages of several battles
+    have fractional counts, so they're typed as floats.
+
+    ## Example
+    >>> tally = OutcomeTally(coop_coop=98, coop_defect=1, defect_coop=1)
+    >>> tally.get_score(PayoffMatrix(3, 0, 5, 1))
+    (2.99, 2.99)
+    """
+    coop_coop: float = 0
+    coop_defect: float = 0
+    defect_coop: float = 0
+    defect_defect: float = 0
+
+    @property
+    def rounds(self) -> float:
+        return self.coop_coop + self.coop_defect + self.defect_coop + self.defect_defect
+
+    def swapped(self) -> OutcomeTally:
+        """Returns the same tally seen from the second player's perspective."""
+        return OutcomeTally(self.coop_coop, self.defect_coop, self.coop_defect, self.defect_defect)
+
+    def get_score(self, payoff_matrix: PayoffMatrix | None = None) -> tuple[float, float]:
+        """
+        Returns a tuple of (own_score, opponent_score) normalized by the number
+        of rounds, using the configured payoff matrix if none is given.
+        """
+        if payoff_matrix is None:
+            payoff_matrix = get_settings().payoff_matrix
+        own_score = (
+              self.coop_coop     * payoff_matrix.coop_coop
+            + self.coop_defect   * payoff_matrix.coop_defect
+            + self.defect_coop   * payoff_matrix.defect_coop
+            + self.defect_defect * payoff_matrix.defect_defect
+        )
+        opponent_score = (
+              self.coop_coop     * payoff_matrix.coop_coop
+            + self.coop_defect   * payoff_matrix.defect_coop
+            + self.defect_coop   * payoff_matrix.coop_defect
+            + self.defect_defect * payoff_matrix.defect_defect
+        )
+        return own_score / self.rounds, opponent_score / self.rounds
+
+
+
+class GameRecord:
+    """
+    The moves of both players in a game, stored once for the whole game.
+    The players read it through their own `History` view (see `views`), which
+    shares the record's storage, so nothing has to be copied or swapped
+    when it's the other player's turn to decide.
+
+    Besides the moves themselves, the record keeps running tallies that are
+    updated on every `append`, so a `History` can answer e.g. how often the
+    opponent has defected in constant time instead of rescanning the game.
+    Everything is indexed by player, i.e. 0 for the first and 1 for the second.
+    """
+    __slots__ = ("moves", "defections", "streaks", "outcome_counts")
+
+    def __init__(
+            self,
+            first_moves: MutableSequence[Action] | None = None,
+            second_moves: MutableSequence[Action] | None = None
+    ) -> None:
+        self.moves: tuple[MutableSequence[Action], MutableSequence[Action]] = ([], [])
+        self.defections = [0, 0]
+        self.streaks = [0, 0]
+        # Indexed by 2*first_move.value + second_move.value, i.e. CC, CD, DC, DD
+        self.outcome_counts = [0, 0, 0, 0]
+        for first_move, second_move in zip(first_moves or [], second_moves or []):
+            self.append(first_move, second_move)
+        # Keep the caller's sequences (if any), so they can still be shared
+        self.moves = (
+            first_moves if first_moves is not None else self.moves[0],
+            second_moves if second_moves is not None else self.moves[1],
+        )
+
+    def __len__(self) -> int:
+        return len(self.moves[0])
+
+    def append(self, first_move: Action, second_move: Action) -> None:
+        first_moves, second_moves = self.moves
+        streaks = self.streaks
+        streaks[0] = streaks[0] + 1 if first_moves and first_moves[-1] is first_move else 1
+        streaks[1] = streaks[1] + 1 if second_moves and second_moves[-1] is second_move else 1
+        self.defections[0] += first_move.value
+        self.defections[1] += second_move.value
+        self.outcome_counts[2*first_move.value + second_move.value] += 1
+        first_moves.append(first_move)
+        second_moves.append(second_move)
+
+    def views(self) -> tuple[History, History]:
+        """Returns the game as seen by the first and the second player, respectively."""
+        return History.from_record(self, 0), History.from_record(self, 1)
 
 
 
-@dataclass
 class History:
-    own_moves: MutableSequence[Action] = field(default_factory=list)  # Weird due to mutability
-    opponent_moves: MutableSequence[Action] = field(default_factory=list)
-    
+    """
+    The moves of a game so far, seen from one player's perspective.
+
+    A `History` is a view on a `GameRecord`: Creating one with `History(...)`
+    starts a new record, while `~history` returns the opponent's view on the
+    same record, which takes constant time and stays up to date as moves
+    are appended through either view.
+
+    Besides `own_moves` and `opponent_moves`, it exposes the record's running
+    tallies, so strategies can avoid rescanning the game:
+
+    - `own_defections` and `opponent_defections`: number of defections so far.
+    - `own_streak` and `opponent_streak`: how many moves in a row at the end of
+      the game are the same as the last move (0 if no moves have been made).
+    - `get_outcome_tally()`: how many rounds ended in each of the four outcomes.
+
+    The tallies are computed once from the moves passed to the constructor,
+    so edit the game through `append` rather than the move lists directly.
+    """
+    __slots__ = ("record", "side", "own_moves", "opponent_moves")
+
+    def __init__(
+            self,
+            own_moves: MutableSequence[Action] | None = None,
+            opponent_moves: MutableSequence[Action] | None = None
+    ) -> None:
+        self.record = GameRecord(own_moves, opponent_moves)
+        self.side = 0
+        self.own_moves, self.opponent_moves = self.record.moves
+
+    @classmethod
+    def from_record(cls, record: GameRecord, side: int) -> History:
+        """Returns the view of player `side` (0 or 1) on `record`."""
+        history = cls.__new__(cls)
+        history.record = record
+        history.side = side
+        history.own_moves, history.opponent_moves = record.moves[side], record.moves[1 - side]
+        return history
+
+    @property
+    def own_defections(self) -> int:
+        return self.record.defections[self.side]
+
+    @property
+    def opponent_defections(self) -> int:
+        return self.record.defections[1 - self.side]
+
+    @property
+    def own_streak(self) -> int:
+        return self.record.streaks[self.side]
+
+    @property
+    def opponent_streak(self) -> int:
+        return self.record.streaks[1 - self.side]
+
     def append(self, own_move: Action, opponent_move: Action) -> None:
-        self.own_moves.append(own_move)
-        self.opponent_moves.append(opponent_move)
+        if self.side == 0:
+            self.record.append(own_move, opponent_move)
+        else:
+            self.record.append(opponent_move, own_move)
     
     def __len__(self):
         return len(self.own_moves)
 
     def __iter__(self):
         return zip(self.own_moves, self.opponent_moves)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, History):
+            return NotImplemented
+        return self.own_moves == other.own_moves and self.opponent_moves == other.opponent_moves
     
     def __invert__(self):
-        """Returns a new History object with the moves swapped,
-        so that the opponent's moves are now our moves and vice versa."""
-        return History(self.opponent_moves, self.own_moves)
+        """Returns the opponent's view of the same game, so that the
+        opponent's moves are now our moves and vice versa."""
+        return History.from_record(self.record, 1 - self.side)
     
-    def get_score(self, payoff_matrix: PayoffMatrix = PAYOFF_MATRIX) -> tuple[float, float]:
+    def get_score(self, payoff_matrix: PayoffMatrix | None = None) -> tuple[float, float]:
         """Returns a tuple of (own_score, opponent_score) from a History object."""
-        own_score = 0
-        opponent_score = 0
-        for own_move, opponent_move in self:
-            
-            own_increase, opponent_increase = payoff_matrix.get_reward(own_move, opponent_move)
-
-            own_score += own_increase
-            opponent_score += opponent_increase
+        # Normalized score for useful comparison invariant of rounds
+        return self.get_outcome_tally().get_score(payoff_matrix=payoff_matrix)
 
-        return own_score / len(self), opponent_score / len(self)  # Normalize score for useful comparison invariant of rounds
+    def get_outcome_tally(self) -> OutcomeTally:
+        """Returns how many rounds ended in each of the four outcomes."""
+        tally = OutcomeTally(*self.record.outcome_counts)
+        return tally if self.side == 0 else tally.swapped()
 
     def __repr__(self) -> str:
         return f"History(own_moves={self.own_moves}, opponent_moves={self.opponent_moves})"
@@ -209,7 +449,109 @@ class History:
 
 
 
+@dataclass(frozen=True)
+class StateMachine:
+    """
+    A deterministic strategy written as a finite-state machine. In a given
+    state the player plays `actions[state]`, and after the round it moves to
+    `transitions[state][opponent_move.value]`, i.e. index 0 if the opponent
+    cooperated and 1 if they defected. The game starts in `initial_state`.
+
+    Since the player's own moves are determined by its states, this is
+    enough to express strategies that look at both players' past moves,
+    as long as they only need to remember a bounded amount of it.
+
+    ## Example
+    >>> # Tit for Tat: state 0 cooperates, state 1 defects,
+    >>> # and the next state is simply the opponent's last move.
+    >>> StateMachine(
+    ...     actions=(Action.COOP, Action.DEFECT),
+    ...     transitions=((0, 1), (0, 1)),
+    ... )
+    """
+    actions: tuple[Action, ...]
+    transitions: tuple[tuple[int, int], ...]
+    initial_state: int = 0
+
+    def __post_init__(self) -> None:
+        if len(self.actions) != len(self.transitions):
+            raise ValueError(f"Expected one transition pair per state, but got {len(self.actions)} actions and {len(self.transitions)} transitions")
+        for state in (self.initial_state, *flatten(self.transitions)):
+            if not 0 <= state < self.n_states:
+                raise ValueError(f"Invalid state {state} in a state machine with {self.n_states} states")
+
+    @property
+    def n_states(self) -> int:
+        return len(self.actions)
+
+
+
+@dataclass(frozen=True)
+class MemoryOne:
+    """
+    A strategy that only looks at the last round, written as probabilities of
+    cooperating. `initial` is the probability of cooperating in the first round,
+    and `after[i]` the probability of cooperating after a round with outcome `i`,
+    in the order (CC, CD, DC, DD) and seen from the player's own perspective
+    (so CD means the player cooperated and the opponent defected).
+
+    ## Example
+    >>> # Tit for Tat: cooperates whenever the opponent cooperated last round
+    >>> MemoryOne(initial=1, after=(1, 0, 1, 0))
+    """
+    initial: float
+    after: tuple[float, float, float, float]
+
+    def __post_init__(self) -> None:
+        if len(self.after) != 4:
+            raise ValueError(f"Expected 4 probabilities (CC, CD, DC, DD) in `after`, but got {len(self.after)}")
+        for probability in (self.initial, *self.after):
+            if not 0 <= probability <= 1:
+                raise ValueError(f"Expected probabilities between 0 and 1, but got {probability}")
+
+    @property
+    def is_deterministic(self) -> bool:
+        return all(probability in (0, 1) for probability in (self.initial, *self.after))
+
+    def to_state_machine(self) -> StateMachine:
+        """
+        Returns the equivalent `StateMachine` of a deterministic memory-one
+        strategy, whose state is the outcome of the last round (shifted by one),
+        with state 0 for the first round.
+        """
+        if not self.is_deterministic:
+            raise ValueError(f"Only deterministic memory-one strategies have a state machine, but got {self}")
+        actions = [Action(not self.initial), *(Action(not probability) for probability in self.after)]
+        return StateMachine(
+            actions=tuple(actions),
+            # The next outcome is (own move, opponent move) = (action, COOP or DEFECT)
+            transitions=tuple((1 + 2 * action.value, 2 + 2 * action.value) for action in actions),
+        )
+
+
+
 class Strategy(ABC):
+    # Whether `decide` always returns the same action given the same history.
+    # Species must opt in by setting this to True: otherwise they may use
+    # randomness, so a single battle result is never reused as if it were the
+    # only possible outcome.
+    deterministic: bool = False
+    # Optional finite-state machine that plays exactly like `decide`, which
+    # lets battles be played in bulk (see `utils.vectorized`).
+    state_machine: StateMachine | None = None
+    # Optional cooperation probabilities of a strategy that only looks at the
+    # last round, which let battles be scored exactly (see `utils.analytic`).
+    memory_one: MemoryOne | None = None
+    # How many of the last rounds `decide` looks at once that many rounds
+    # have been played, or None if it may look at the whole history (e.g. to
+    # count the opponent's defections). Battles between deterministic
+    # strategies with a bounded memory stop calling `decide` once the game
+    # repeats itself (see `utils.analytic.get_bounded_memory_tally`).
+    memory_depth: int | None = None
+
+    # The battle engine uses the declarations above to pick the cheapest way
+    # to play each matchup, see `utils.routing`.
+
     @abstractmethod
     def decide(self, history: History) -> Action:
         pass
@@ -217,12 +559,18 @@ class Strategy(ABC):
 
 
 class Player:
+    # No per-instance `__dict__`, since populations can hold millions of players
+    __slots__ = ("strategy", "most_recent_score", "age")
+
     def __init__(self, strategy: Strategy, *, most_recent_score: int = 0, age: int = 0) -> None:
-        self.strategy_name = strategy.__class__.__name__
         self.strategy = strategy
         self.most_recent_score = most_recent_score
         self.age = age
 
+    @property
+    def strategy_name(self) -> str:
+        return self.strategy.__class__.__name__
+
     def make_decision(self, history) -> Action:
         return self.strategy.decide(history)
     
@@ -272,31 +620,92 @@ class Player:
         Changes the player's strategy in-place to the new strategy.
         """
         self.strategy = new_strategy
-        self.strategy_name = new_strategy.__class__.__name__
 
-    def battle(self, opponent: Player, *, rounds: int = 100, payoff_matrix: PayoffMatrix = PAYOFF_MATRIX) -> tuple[int, int]:
+    def battle(
+            self,
+            opponent: Player,
+            *,
+            rounds: int = 100,
+            payoff_matrix: PayoffMatrix | None = None,
+            stats: SimulationStats | None = None
+    ) -> tuple[int, int]:
         """
         Battles two `Player`s against each other for `rounds` rounds,
         returning the scores for each player (normalized by the number of rounds
         so more rounds doesn't equate to higher scores).
+
+        Battles between strategies that can be written as state machines are
+        scored without playing every round (see `utils.routing`).
+        """
+        from utils.routing import get_battle_tally  # Imported here to avoid a circular import
+        return get_battle_tally(self, opponent, rounds=rounds, stats=stats).get_score(payoff_matrix=payoff_matrix)
+
+    def get_battle_history(
+            self,
+            opponent: Player,
+            *,
+            rounds: int = 100,
+            record_type: type[GameRecord] = GameRecord,
+            stats: SimulationStats | None = None
+    ) -> History:
         """
-        history = History()
+        Plays `rounds` rounds against `opponent` and returns the resulting
+        `History` from this player's perspective.
+
+        The game is stored in a `record_type`, e.g. `PackedGameRecord` from
+        `utils.packed_history` to store very long games compactly.
+
+        If `stats` are given, the battle and the time spent in each player's
+        `decide` are recorded in them (see `utils.profiling`).
+        """
+        record = record_type()
+        # One view each, because for the opponent, our moves are their moves etc.
+        history, opponent_history = record.views()
+
+        if stats is not None:
+            self.__play_profiled(opponent, record, history, opponent_history, rounds, stats)
+            return history
 
         for _ in range(rounds):
             decision1 = self.make_decision(history)
-            decision2 = opponent.make_decision(~history)  # Inverted history, because for the opponent, our moves are their moves etc.
+            decision2 = opponent.make_decision(opponent_history)
 
             # assert decision1 in (Action.COOP, Action.DEFECT), f"WHAT, {self} made this move: {decision1} against {opponent}, who made {decision2}.\n{history}"
             # assert decision2 in (Action.COOP, Action.DEFECT), f"WHAT, {opponent} made this move: {decision2} against {self}, who made {decision1}.\n{history}"
 
-            history.append(
-                own_move=decision1,
-                opponent_move=decision2
-            )
+            record.append(decision1, decision2)
 
         assert len(history) == rounds
-                
-        return history.get_score(payoff_matrix=payoff_matrix)
+
+        return history
+
+    def __play_profiled(
+            self,
+            opponent: Player,
+            record: GameRecord,
+            history: History,
+            opponent_history: History,
+            rounds: int,
+            stats: SimulationStats
+    ) -> None:
+        """Same as the loop in `get_battle_history`, but timing every decision."""
+        clock = time.perf_counter
+        seconds1 = seconds2 = 0.0
+
+        for _ in range(rounds):
+            start = clock()
+            decision1 = self.make_decision(history)
+            middle = clock()
+            decision2 = opponent.make_decision(opponent_history)
+            end = clock()
+
+            seconds1 += middle - start
+            seconds2 += end - middle
+            record.append(decision1, decision2)
+
+        stats.record_battle(rounds)
+        stats.record_decisions(self.strategy_name, rounds, seconds1)
+        stats.record_decisions(opponent.strategy_name, rounds, seconds2)
         
     def __repr__(self) -> str:
         return f"<Player object at {hex(id(self))} using {self.strategy_name}>"
@@ -308,7 +717,8 @@ def battle(
         player2: Player,
         *,
         rounds: int = 100,
-        payoff_matrix: PayoffMatrix = PAYOFF_MATRIX
+        payoff_matrix: PayoffMatrix | None = None,
+        stats: SimulationStats | None = None
     ) -> tuple[int, int]:
     """
     Battles two `Player`s against each other for `rounds` rounds,
@@ -318,7 +728,32 @@ def battle(
     This function is just syntactic sugar for `player1.battle(player2)`,
     so it appears symmetric, i.e. `battle(player1, player2)`.
     """
-    return player1.battle(player2, rounds=rounds, payoff_matrix=payoff_matrix)
+    return player1.battle(player2, rounds=rounds, payoff_matrix=payoff_matrix, stats=stats)
+
+
+
+@dataclass
+class GenerationSummary:
+    """
+    Per-species statistics of one generation of a `Population`. Each list is
+    indexed by species, in the order of `Population.species`, and may be
+    shorter than it if species appeared in later generations (those count as 0).
+
+    The scores are only filled in once the generation has battled.
+    """
+    counts: list[int] = field(default_factory=list)
+    total_ages: list[int] = field(default_factory=list)
+    total_scores: list[float] = field(default_factory=list)
+
+
+
+class StopReason(Enum):
+    """Why `Population.run` stopped."""
+    GENERATIONS = "generations"  # The requested number of generations was done
+    FIXED_POINT = "fixed point"  # No future generation can differ (except in age)
+    CONVERGED = "converged"      # The species' shares stayed within epsilon over the window
+    EXTINCT = "extinct"          # The population died out
+    TIME_BUDGET = "time budget"  # The wall-clock budget ran out
 
 
 
@@ -358,23 +793,142 @@ class Population:
     This is a simple example that demonstrates the prisoner's dilemma and the tragedy of
     the commons.
     """
-    # Double list due to time series data (we want to keep all generations)
+    # Double list due to time series data (we want to keep all generations).
+    # A generation may also be a `PlayerTable` (see `utils.player_table`)
     players: list[list[Player]] = field(default_factory=list)
+    # Optional cache of species-vs-species battle results (see `MatchupCache`)
+    matchup_cache: MatchupCache | None = None
+    # If set, only the last `retained_generations` generations are kept in `players`,
+    # older ones are only kept as their `GenerationSummary` (see `get_players`)
+    retained_generations: int | None = None
+    # Optional instrumentation of where the time goes (see `utils.profiling`)
+    stats: SimulationStats | None = None
+    # Every species that has been part of the population, in order of appearance,
+    # and a `GenerationSummary` per generation, kept up to date as generations
+    # are created, so statistics don't require going through every player
+    species: list[str] = field(default_factory=list, init=False)
+    summaries: list[GenerationSummary] = field(default_factory=list, init=False, repr=False)
+    _species_indices: dict[str, int] = field(default_factory=dict, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        if self.retained_generations is not None and self.retained_generations < 1:
+            raise ValueError(f"Expected `retained_generations` to be at least 1, but got {self.retained_generations}")
+        for players in self.players:
+            self.summaries.append(self.__summarize(players))
+        self.__forget_old_generations()
+
+    @classmethod
+    def restore(
+            cls,
+            players: list[Player],
+            species: list[str],
+            summaries: list[GenerationSummary],
+            **kwargs
+    ) -> Population:
+        """
+        Recreates a population from the players of its latest generation
+        and the `species` and `summaries` of all of its generations, e.g.
+        when loading a checkpoint (see `utils.checkpoint`).
+        """
+        population = cls([players], **kwargs)
+        population.species = list(species)
+        population.summaries = list(summaries)
+        population._species_indices = {name: index for index, name in enumerate(species)}
+        return population
+
+    def __forget_old_generations(self) -> None:
+        """Drops the players of generations older than `retained_generations`."""
+        if self.retained_generations is not None and len(self.players) > self.retained_generations:
+            del self.players[:-self.retained_generations]
+
+    def get_players(self, gen: int = -1) -> list[Player]:
+        """
+        Returns the players of generation `gen`. Unlike `players[gen]`, this
+        also works when old generations have been dropped (see `retained_generations`),
+        in which case an IndexError is raised for generations that are no longer kept.
+        """
+        if gen < 0:
+            gen += self.generation + 1
+        index = gen - (self.generation + 1 - len(self.players))
+        if not 0 <= index < len(self.players):
+            raise IndexError(f"Generation {gen} is not retained (only the last {len(self.players)} generations are)")
+        return self.players[index]
+
+    def __summarize(self, players: list[Player]) -> GenerationSummary:
+        """Counts the players of a new generation by species."""
+        from utils.player_table import PlayerTable  # Imported here to avoid a circular import
+        if isinstance(players, PlayerTable):
+            # Totals of the table's arrays, rather than a loop over handles
+            rows = [
+                (strategy.__class__.__name__, count, total_age)
+                for strategy, count, total_age in zip(players.strategies, players.get_species_counts(), players.get_species_total_ages())
+                if count > 0
+            ]
+        else:
+            rows = ((player.strategy_name, 1, player.age) for player in players)
+
+        summary = GenerationSummary()
+        for name, count, total_age in rows:
+            index = self._species_indices.get(name)
+            if index is None:
+                index = self._species_indices[name] = len(self.species)
+                self.species.append(name)
+            if index >= len(summary.counts):
+                missing = index + 1 - len(summary.counts)
+                summary.counts.extend([0] * missing)
+                summary.total_ages.extend([0] * missing)
+            summary.counts[index] += count
+            summary.total_ages[index] += total_age
+        return summary
+
+    def __summarize_scores(self) -> None:
+        """Adds the scores of the current generation to its summary."""
+        from utils.player_table import PlayerTable  # Imported here to avoid a circular import
+        summary = self.summaries[-1]
+        summary.total_scores = [0.0] * len(summary.counts)
+        players = self.players[-1]
+        if isinstance(players, PlayerTable):
+            for strategy, total_score in zip(players.strategies, players.get_species_total_scores()):
+                index = self._species_indices.get(strategy.__class__.__name__)
+                if index is not None:
+                    summary.total_scores[index] += total_score
+            return
+        for player in players:
+            summary.total_scores[self._species_indices[player.strategy_name]] += player.most_recent_score
 
     def get_population_counts(self, gen: int = -1) -> dict[str, int]:
+        counts = self.summaries[gen].counts
+        return {
+            # Include all species ever seen (so we get 0 for extinct species, rather than missing)
+            name: counts[index] if index < len(counts) else 0
+            for index, name in enumerate(self.species)
+        }
+
+    def __get_species_means(self, totals: list[float], gen: int) -> dict[str, float]:
+        counts = self.summaries[gen].counts
         return {
-            player.strategy_name: [
-                strat.strategy_name for strat in self.players[gen]
-            ].count(player.strategy_name)
-            for player in flatten(self.players)  # Include all generations (so we get 0 for extinct species, rather than missing)
+            self.species[index]: total / counts[index]
+            for index, total in enumerate(totals)
+            if counts[index] > 0
         }
+
+    def get_species_mean_ages(self, gen: int = -1) -> dict[str, float]:
+        """Returns the average age of each living species in generation `gen`."""
+        return self.__get_species_means(self.summaries[gen].total_ages, gen)
+
+    def get_species_mean_scores(self, gen: int = -1) -> dict[str, float]:
+        """
+        Returns the average `most_recent_score` of each living species in
+        generation `gen`, or an empty dict if the generation hasn't battled yet.
+        """
+        return self.__get_species_means(self.summaries[gen].total_scores, gen)
     
     def get_top_species(self, top_n: int = 3, gen: int = -1) -> dict[str, int]:
         return dict(sorted(self.get_population_counts(gen).items(), key=lambda x: x[1], reverse=True)[:top_n])
     
     @property
     def generation(self) -> int:
-        return len(self.players) - 1
+        return len(self.summaries) - 1
     
     @property
     def population_size(self) -> int:
@@ -382,16 +936,22 @@ class Population:
     
     @property
     def population_average_age(self) -> float:
-        return sum(player.age for player in self.players[-1]) / self.population_size
+        return sum(self.summaries[-1].total_ages) / self.population_size
 
 
     def do_generation(
         self,
         matchup_rate: float = 1.0,
-        payoff_matrix: PayoffMatrix = PAYOFF_MATRIX,
+        payoff_matrix: PayoffMatrix | None = None,
         rounds: int = 50,
         overall_food: int = 1_000,
         adjust_populations: bool = True,
+        vectorized: bool = False,
+        expected_payoffs: bool = False,
+        opponents: int | None = None,
+        batched_reproduction: bool = False,
+        executor: Executor | None = None,
+        seed: int | None = None,
         **kwargs
     ) -> None:
         """
@@ -401,7 +961,13 @@ class Population:
           So if `matchup_rate` is 1.0, all (N choose 2) matchups happen, where
           N is the population size. While if `matchup_rate` is 0.5, around half
           of the matchups occur, and every player is expected to meet (N-1)/2 others.
-          Reduce this variable to speed up a generation.
+          Reduce this variable to speed up a generation: only the matchups that
+          happen cost time (see `utils.matchups`).
+
+        - Alternatively, if `opponents` is given, each player picks that many
+          opponents at random instead (and is picked by as many on average),
+          and `matchup_rate` is ignored. Every player then battles about the same
+          number of times, which suits very large populations.
 
         - The `payoff_matrix` is used to determine the rewards for each player
           in each matchup. By default, it uses the one in `config.ini`.
@@ -419,28 +985,249 @@ class Population:
           "get more out of it" than a whole population of defectors (that might only get 1
           on average) and thus only a population size of 1 times the food.
 
+        - If the population has a `matchup_cache`, battles between two species
+          that have already met (with the same number of `rounds`) are looked up
+          rather than played again.
+
+        - If `vectorized` is True, all the generation's battles are played at once
+          with the NumPy engine in `utils.vectorized` (requires numpy). Strategies
+          without a `state_machine` still battle one pair at a time.
+
+        - Each matchup is played the cheapest way the two strategies allow (see
+          `utils.routing`): looked up in the `matchup_cache`, scored analytically
+          if both can be written as state machines, or played round by round.
+
+        - If `expected_payoffs` is True, battles between two strategies with a
+          `memory_one` description are given their exact expected scores (see
+          `utils.analytic`) instead of the scores of a single random game. This
+          removes the noise that stochastic species like `Joss` add to fitness.
+
+        - If an `executor` (such as a `concurrent.futures.ProcessPoolExecutor`) is
+          given, the matchups are split into chunks that are played in parallel,
+          see `utils.parallel`. Each chunk gets its own RNG stream derived from
+          `seed` and the generation number, so for a given `seed` the scores are
+          the same whatever the number of workers. If `seed` is None, it is drawn
+          from the global RNG. The workers honour `vectorized` and `expected_payoffs`,
+          and add what they play to the population's `stats`, but they can't
+          share the `matchup_cache` (each chunk starts with an empty one) and
+          don't support `opponents`.
+
+        - If `batched_reproduction` is True, the next generation is drawn per species
+          with binomial sampling and created in bulk (see `utils.reproduction`),
+          which has the same statistics as letting every player reproduce on its own.
+
         - `**kwargs` are passed to the `Player.get_offspring` method. As of
           writing, you can therefore supply `mutation_strategies` and `mutation_probability`,
           but keep in touch with the documentation of the `Player.get_offspring` method.
         """
         # Step 1. Battle everyone against everyone (each matchup with probability `matchup_rate`)
-        expected_matchups = (self.population_size - 1) * matchup_rate
+        if opponents is None:
+            expected_matchups = (self.population_size - 1) * matchup_rate
+        elif executor is not None:
+            raise ValueError("Choosing a number of `opponents` per player isn't supported with an `executor`")
+        else:
+            expected_matchups = 2 * opponents
 
-        for match_num, (player1, player2) in enumerate(it.combinations(self.players[-1], 2), start=1):
-            
-            if random.random() > matchup_rate:
-                continue
-            
-            score1, score2 = battle(player1, player2, rounds=rounds, payoff_matrix=payoff_matrix)
-            
-            player1.most_recent_score += score1 / expected_matchups
-            player2.most_recent_score += score2 / expected_matchups
+        with self.__time_phase("battles"):
+            self.__battle(expected_matchups, matchup_rate, payoff_matrix, rounds, vectorized, expected_payoffs, opponents, executor, seed)
 
-        assert match_num == self.population_size * (self.population_size - 1) // 2, f"Why wasn't there (N choose 2) battles? N={self.population_size}, {match_num=}"
+        self.__summarize_scores()
         
         # Step 2. Adjust population sizes
         if adjust_populations:
-            self.__adjust_populations(overall_food, **kwargs)
+            with self.__time_phase("reproduction"):
+                self.__adjust_populations(overall_food, batched_reproduction, **kwargs)
+
+        if self.stats is not None:
+            self.stats.generations += 1
+
+    def run(
+        self,
+        generations: int | None = None,
+        *,
+        epsilon: float | None = None,
+        window: int = 50,
+        time_budget: float | None = None,
+        stop_at_fixed_point: bool = True,
+        callback: Callable[[Population], object] | None = None,
+        **generation_kwargs
+    ) -> StopReason:
+        """
+        Does generations until one of the stopping criteria is met, and returns
+        which one it was:
+
+        - `generations`: That many generations were done (no limit if None).
+        - `stop_at_fixed_point`: The population is made of a single deterministic
+          species, can't mutate, and every player gets exactly one offspring, so
+          every future generation would be the same (except for ages).
+        - `epsilon`: The share of the population of every species stayed within
+          `epsilon` over the last `window` generations.
+        - `time_budget`: More than that many seconds have passed. This is checked
+          between generations, so the last one can go over the budget.
+        - The population died out, so no more generations can be done.
+
+        `generation_kwargs` are passed to `do_generation`, and `callback` (e.g. a
+        `Checkpointer`) is called with the population after every generation.
+
+        ## Example
+        >>> pop.run(1_000, epsilon=0.01, window=100, time_budget=60, overall_food=500)
+        <StopReason.CONVERGED: 'converged'>
+        """
+        import inspect  # Imported here to keep importing this module fast
+
+        # Fills in the defaults of `do_generation`, and fails early on unknown arguments
+        arguments = inspect.signature(self.do_generation).bind(**generation_kwargs)
+        arguments.apply_defaults()
+        settings = {**arguments.arguments, **arguments.arguments["kwargs"]}
+        if not settings["adjust_populations"]:
+            raise ValueError("Running requires `adjust_populations`, since otherwise no generations are added")
+
+        deadline = None if time_budget is None else time.monotonic() + time_budget
+        start_generation = self.generation
+
+        while True:
+            if self.population_size == 0:
+                return StopReason.EXTINCT
+            if generations is not None and self.generation - start_generation >= generations:
+                return StopReason.GENERATIONS
+            if deadline is not None and time.monotonic() >= deadline:
+                return StopReason.TIME_BUDGET
+            if stop_at_fixed_point and self.__is_fixed_point(settings):
+                return StopReason.FIXED_POINT
+            if epsilon is not None and self.__has_converged(epsilon, window):
+                return StopReason.CONVERGED
+
+            self.do_generation(**generation_kwargs)
+            if callback is not None:
+                callback(self)
+
+    def __is_fixed_point(self, settings: dict) -> bool:
+        if settings.get("mutation_probability", 0) > 0 and settings.get("mutation_strategies"):
+            return False
+        if settings["matchup_rate"] < 1 or settings["opponents"] is not None:
+            return False
+        score = self.__get_monomorphic_score(settings["payoff_matrix"], settings["rounds"])
+        if score is None:
+            return False
+        # Same formula as in `__adjust_populations`, where 1 means surviving without offspring
+        expected_offspring = score * settings["overall_food"] / self.population_size
+        return math.isclose(expected_offspring, 1, rel_tol=1e-12)
+
+    def __has_converged(self, epsilon: float, window: int) -> bool:
+        if self.generation < window:
+            return False
+        shares = []
+        for gen in range(self.generation - window, self.generation + 1):
+            counts = self.get_population_counts(gen)
+            size = sum(counts.values())
+            shares.append({name: count / size for name, count in counts.items()} if size else {})
+        return all(
+            max(share.get(name, 0) for share in shares) - min(share.get(name, 0) for share in shares) <= epsilon
+            for name in self.species
+        )
+
+    def __time_phase(self, phase: str):
+        return nullcontext() if self.stats is None else self.stats.time_phase(phase)
+
+    def __battle(
+            self,
+            expected_matchups: float,
+            matchup_rate: float,
+            payoff_matrix: PayoffMatrix,
+            rounds: int,
+            vectorized: bool,
+            expected_payoffs: bool,
+            opponents: int | None,
+            executor: Executor | None,
+            seed: int | None
+    ) -> None:
+        """
+        Plays the generation's matchups, in parallel if an `executor` is
+        given, and adds the normalized scores to each player's `most_recent_score`.
+        """
+        if matchup_rate >= 1 and opponents is None:
+            score = self.__get_monomorphic_score(payoff_matrix, rounds)
+            if score is not None:
+                # Every player battles N-1 copies of itself, normalized by N-1 matchups
+                for player in self.players[-1]:
+                    player.most_recent_score += score
+                return
+
+        if executor is not None:
+            from utils.parallel import get_parallel_scores  # Imported here to avoid a circular import
+            if seed is None:
+                seed = random.getrandbits(64)
+            total_scores = get_parallel_scores(
+                self.players[-1],
+                executor,
+                matchup_rate=matchup_rate,
+                payoff_matrix=payoff_matrix,
+                rounds=rounds,
+                seed=f"{seed}:{self.generation}",
+                cache=self.matchup_cache,
+                vectorized=vectorized,
+                expected_payoffs=expected_payoffs,
+                stats=self.stats,
+            )
+            for player, score in zip(self.players[-1], total_scores):
+                player.most_recent_score += score / expected_matchups
+        else:
+            self.__play_matchups(expected_matchups, matchup_rate, payoff_matrix, rounds, vectorized, expected_payoffs, opponents)
+
+    def __get_monomorphic_score(self, payoff_matrix: PayoffMatrix, rounds: int) -> float | None:
+        """
+        If the current generation is made of a single deterministic species
+        (and at least two players), returns the score each player gets against
+        every other one, computed from a single battle. Returns None otherwise.
+        """
+        players = self.players[-1]
+        if len(players) < 2 or sum(count > 0 for count in self.summaries[-1].counts) != 1:
+            return None
+        player1, player2 = players[0], players[1]
+        if not player1.strategy.deterministic:
+            return None
+
+        if self.matchup_cache is not None:
+            return self.matchup_cache.battle(player1, player2, rounds=rounds, payoff_matrix=payoff_matrix, stats=self.stats)[0]
+        from utils.routing import get_battle_tally  # Imported here to avoid a circular import
+        return get_battle_tally(player1, player2, rounds=rounds, stats=self.stats).get_score(payoff_matrix=payoff_matrix)[0]
+
+    def __play_matchups(
+            self,
+            expected_matchups: float,
+            matchup_rate: float,
+            payoff_matrix: PayoffMatrix,
+            rounds: int,
+            vectorized: bool,
+            expected_payoffs: bool,
+            opponents: int | None
+    ) -> None:
+        """
+        Plays the generation's matchups in this process and adds the
+        normalized scores to each player's `most_recent_score`.
+        """
+        from utils.routing import route_matchups  # Imported here to avoid a circular import
+
+        players = self.players[-1]
+        if opponents is None:
+            pairs = sample_pairs(self.population_size, matchup_rate)
+        else:
+            pairs = sample_opponents(self.population_size, opponents)
+        matchups = [(players[i], players[j]) for i, j in pairs]
+
+        scores = route_matchups(
+            matchups,
+            rounds=rounds,
+            payoff_matrix=payoff_matrix,
+            cache=self.matchup_cache,
+            vectorized=vectorized,
+            expected_payoffs=expected_payoffs,
+            stats=self.stats,
+        )
+
+        for (player1, player2), (score1, score2) in zip(matchups, scores):
+            player1.most_recent_score += score1 / expected_matchups
+            player2.most_recent_score += score2 / expected_matchups
 
 
     def summary() -> str:
@@ -464,7 +1251,7 @@ class Population:
         # return f"The  place is {best[0]} with avg. score of {best[1]}, while the worst is {worst[0]}, who only got {worst[1]}. The average score was {avg_score:.1f} among {total_participants} participants."
 
 
-    def __adjust_populations(self, overall_food: int, **kwargs) -> None:
+    def __adjust_populations(self, overall_food: int, batched_reproduction: bool = False, **kwargs) -> None:
         """
         Adjusts the population size based on the scores of the players.
 
@@ -477,7 +1264,27 @@ class Population:
         writing, you can therefore supply `mutation_strategies` and `mutation_probability`,
         but keep in touch with the documentation of the `Player.get_offspring` method.
         """
-        new_generation = []
+        if batched_reproduction:
+            from utils.reproduction import reproduce  # Imported here to avoid a circular import
+            new_generation = reproduce(self.players[-1], overall_food, **kwargs)
+        else:
+            new_generation = self.__get_offspring(overall_food, **kwargs)
+
+        self.players.append(new_generation)
+        self.summaries.append(self.__summarize(new_generation))
+        self.__forget_old_generations()
+
+    def __get_offspring(self, overall_food: int, **kwargs) -> list[Player] | PlayerTable:
+        """
+        Lets every player of the current generation reproduce on its own. The
+        new generation is a `PlayerTable` if the current one is.
+        """
+        from utils.player_table import PlayerTable  # Imported here to avoid a circular import
+        if isinstance(self.players[-1], PlayerTable):
+            # Keep storing generations as arrays if they were given that way
+            new_generation = PlayerTable(self.players[-1].strategies)
+        else:
+            new_generation = []
         
         for player in self.players[-1]:
             # Normalize scores and use them to calculate offspring.
@@ -492,7 +1299,7 @@ class Population:
                                                                                                                  #       population => ZeroDivisionError
             new_generation.extend(player.get_offspring(offspring, **kwargs))
 
-        self.players.append(new_generation)
+        return new_generation
 
 
 
@@ -0,0 +1,241 @@
+"""
+Structured populations, where players sit on the nodes of a graph (such as
+a 2-D lattice) and only battle their neighbours, instead of everyone being
+able to meet everyone. The cost of a generation therefore grows with the
+number of edges rather than with the square of the population size.
+
+Each generation, every player battles each of its neighbours once, and then
+every site is taken over by the offspring of a player chosen among the site
+and its neighbours, with probability proportional to their scores. If the
+site's own player is chosen, it survives (and ages) instead.
+"""
+from __future__ import annotations
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass, field
+import random
+
+from utils.simulation_utils import (
+    Player,
+    Strategy,
+    PayoffMatrix,
+    battle,
+)
+from utils.matchup_cache import MatchupCache
+
+
+
+@dataclass(frozen=True)
+class Graph:
+    """
+    An undirected graph stored as CSR (compressed sparse row) adjacency: the
+    neighbours of node `i` are `indices[indptr[i]:indptr[i + 1]]`.
+
+    ## Example
+    >>> Graph.lattice(100, 100)  # A 100×100 torus where each site has 4 neighbours
+    >>> Graph.from_edges(3, [(0, 1), (1, 2)])  # A path of 3 nodes
+    """
+    indptr: tuple[int, ...]
+    indices: tuple[int, ...]
+
+    def __post_init__(self) -> None:
+        if not self.indptr or self.indptr[0] != 0 or self.indptr[-1] != len(self.indices):
+            raise ValueError(f"Expected `indptr` to start at 0 and end at {len(self.indices)}, but got {self.indptr[:1]} and {self.indptr[-1:]}")
+        for node in self.indices:
+            if not 0 <= node < self.n_nodes:
+                raise ValueError(f"Invalid node {node} in a graph with {self.n_nodes} nodes")
+
+    @classmethod
+    def from_edges(cls, n_nodes: int, edges: Iterable[tuple[int, int]]) -> Graph:
+        """Creates a graph from a list of undirected edges, ignoring self-loops and duplicates."""
+        neighbours: list[dict[int, None]] = [{} for _ in range(n_nodes)]
+        for i, j in edges:
+            if not (0 <= i < n_nodes and 0 <= j < n_nodes):
+                raise ValueError(f"Invalid edge {(i, j)} in a graph with {n_nodes} nodes")
+            if i != j:
+                neighbours[i][j] = None
+                neighbours[j][i] = None
+
+        indptr = [0]
+        indices = []
+        for node_neighbours in neighbours:
+            indices.extend(node_neighbours)
+            indptr.append(len(indices))
+        return cls(tuple(indptr), tuple(indices))
+
+    @classmethod
+    def lattice(cls, width: int, height: int, *, moore: bool = False, periodic: bool = True) -> Graph:
+        """
+        Creates a `width`×`height` grid where node `y * width + x` is the site
+        at (x, y). Sites have 4 neighbours (up, down, left, right), or 8 if
+        `moore` is True (diagonals too). If `periodic` is True, the grid wraps
+        around at the edges, so every site has the same number of neighbours.
+        """
+        offsets = [(0, -1), (-1, 0), (1, 0), (0, 1)]
+        if moore:
+            offsets += [(-1, -1), (1, -1), (-1, 1), (1, 1)]
+
+        edges = []
+        for y in range(height):
+            for x in range(width):
+                for dx, dy in offsets:
+                    nx, ny = x + dx, y + dy
+                    if periodic:
+                        nx, ny = nx % width, ny % height
+                    elif not (0 <= nx < width and 0 <= ny < height):
+                        continue
+                    edges.append((y * width + x, ny * width + nx))
+        return cls.from_edges(width * height, edges)
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.indptr) - 1
+
+    @property
+    def n_edges(self) -> int:
+        return len(self.indices) // 2
+
+    def neighbours(self, node: int) -> Sequence[int]:
+        return self.indices[self.indptr[node]:self.indptr[node + 1]]
+
+    def degree(self, node: int) -> int:
+        return self.indptr[node + 1] - self.indptr[node]
+
+    def edges(self) -> Iterable[tuple[int, int]]:
+        """Yields every edge once, as `(i, j)` with `i < j`."""
+        for i in range(self.n_nodes):
+            for j in self.neighbours(i):
+                if i < j:
+                    yield i, j
+
+
+
+@dataclass
+class StructuredPopulation:
+    """
+    A population with one `Player` per node of `graph`, so its size stays fixed.
+
+    It exposes the same `generation`, `population_size`, `population_average_age`,
+    `get_population_counts`, `get_top_species` and `do_generation` surface as
+    `Population`, so the two can be used interchangeably.
+
+    ## Example
+    >>> graph = Graph.lattice(50, 50)
+    >>> pop = StructuredPopulation.random(graph, [TitForTat(), AlwaysDefect()])
+    >>> pop.do_generation(mutation_probability=0.01, mutation_strategies=[TitForTat(), AlwaysDefect()])
+    >>> pop.get_population_counts()
+    """
+    graph: Graph
+    # The player at each node of the graph, in the current generation
+    sites: list[Player]
+    matchup_cache: MatchupCache | None = None
+    # The population counts of every generation (time series data, like `Population.players`)
+    counts: list[dict[str, int]] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        if len(self.sites) != self.graph.n_nodes:
+            raise ValueError(f"Expected one player per node ({self.graph.n_nodes}), but got {len(self.sites)}")
+        self.counts = []
+        self.__count()
+
+    @classmethod
+    def random(cls, graph: Graph, strategies: Sequence[Strategy], **kwargs) -> StructuredPopulation:
+        """Creates a population where each site gets one of `strategies` uniformly at random."""
+        return cls(graph, [Player(random.choice(strategies)) for _ in range(graph.n_nodes)], **kwargs)
+
+    def __count(self) -> None:
+        counts = dict.fromkeys(self.counts[-1], 0) if self.counts else {}
+        for player in self.sites:
+            counts[player.strategy_name] = counts.get(player.strategy_name, 0) + 1
+        self.counts.append(counts)
+
+    def get_population_counts(self, gen: int = -1) -> dict[str, int]:
+        return self.counts[gen].copy()
+
+    def get_top_species(self, top_n: int = 3, gen: int = -1) -> dict[str, int]:
+        return dict(sorted(self.get_population_counts(gen).items(), key=lambda x: x[1], reverse=True)[:top_n])
+
+    @property
+    def generation(self) -> int:
+        return len(self.counts) - 1
+
+    @property
+    def population_size(self) -> int:
+        return len(self.sites)
+
+    @property
+    def population_average_age(self) -> float:
+        return sum(player.age for player in self.sites) / self.population_size
+
+    def do_generation(
+        self,
+        matchup_rate: float = 1.0,
+        payoff_matrix: PayoffMatrix | None = None,
+        rounds: int = 50,
+        overall_food: int = 1_000,
+        adjust_populations: bool = True,
+        *,
+        mutation_strategies: list[Strategy] | None = None,
+        mutation_probability: float = 0,
+        can_mutate_parent: bool = False
+    ) -> None:
+        """
+        Does one generation: every pair of neighbours battles once, and every
+        site is then taken over by the offspring of a player in its
+        neighbourhood (see the module's documentation).
+
+        The other parameters mean the same as in `Population.do_generation`,
+        except that `matchup_rate` and `overall_food` are accepted for
+        compatibility, but have no effect, since every neighbour is battled
+        and the population size is fixed by the graph.
+
+        Since scores are selection weights, a payoff matrix that makes any
+        player's score negative raises a ValueError.
+        """
+        fight = battle if self.matchup_cache is None else self.matchup_cache.battle
+
+        for player in self.sites:
+            player.most_recent_score = 0
+        for i, j in self.graph.edges():
+            score1, score2 = fight(self.sites[i], self.sites[j], rounds=rounds, payoff_matrix=payoff_matrix)
+            # Normalized like in `Population`, by the number of matchups
+            self.sites[i].most_recent_score += score1 / self.graph.degree(i)
+            self.sites[j].most_recent_score += score2 / self.graph.degree(j)
+
+        if adjust_populations:
+            self.__adjust_populations(
+                mutation_strategies=mutation_strategies,
+                mutation_probability=mutation_probability,
+                can_mutate_parent=can_mutate_parent,
+            )
+
+    def __adjust_populations(
+            self,
+            *,
+            mutation_strategies: list[Strategy] | None,
+            mutation_probability: float,
+            can_mutate_parent: bool
+    ) -> None:
+        """Replaces every site at once, based on the scores of the current generation."""
+        for player in self.sites:
+            # Scores are used as selection weights, which `random.choices` doesn't check
+            if player.most_recent_score < 0:
+                raise ValueError(f"Expected non-negative scores to pick parents by, but got {player.most_recent_score} for {player}")
+        new_sites = []
+        for node, player in enumerate(self.sites):
+            candidates = [player, *(self.sites[neighbour] for neighbour in self.graph.neighbours(node))]
+            weights = [candidate.most_recent_score for candidate in candidates]
+            # If nobody scored anything, everyone is equally likely
+            parent, = random.choices(candidates, weights if sum(weights) > 0 else None)
+
+            if parent is player:
+                new_player = Player(player.strategy, age=player.age + 1)
+                may_mutate = can_mutate_parent
+            else:
+                new_player = Player(parent.strategy)
+                may_mutate = True
+            if may_mutate and random.random() < mutation_probability:
+                new_player.change_strategy(random.choice(mutation_strategies))
+            new_sites.append(new_player)
+
+        self.sites = new_sites
+        self.__count()
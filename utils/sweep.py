@@ -0,0 +1,274 @@
+"""
+Runs a population simulation for many parameter combinations ("configs")
+and replicate seeds, optionally across a process pool, streaming one JSON
+row per (config, replicate, generation) to a JSON Lines file.
+
+Sweeps are resumable: runs whose rows are already in the output file are
+skipped, so an interrupted sweep can simply be started again.
+
+## Example
+>>> from concurrent.futures import ProcessPoolExecutor
+>>> from catalogue import EXAMPLE_SPECIES
+>>> configs = grid(overall_food=[100, 200], mutation_probability=[0, 0.01])
+>>> with ProcessPoolExecutor() as executor:
+...     run_sweep(configs, "sweep.jsonl", species=EXAMPLE_SPECIES, replicates=5, generations=200, executor=executor)
+"""
+from __future__ import annotations
+from collections.abc import Callable, Iterable, Mapping, Sequence
+from dataclasses import dataclass, asdict, fields, replace
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+import hashlib
+import itertools as it
+import json
+import os
+import random
+
+from utils.simulation_utils import (
+    Player,
+    Population,
+    PayoffMatrix,
+    Strategy,
+)
+from utils.matchup_cache import MatchupCache
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+
+
+
+@dataclass(frozen=True)
+class SweepConfig:
+    """
+    One combination of simulation parameters. `payoff_matrix` holds the
+    (CoopCoop, CoopDefect, DefectCoop, DefectDefect) rewards, and
+    `starting_population` the number of players of each species, by name,
+    which are also the species that players can mutate into.
+    """
+    payoff_matrix: tuple[int, int, int, int] = (3, 0, 5, 1)
+    overall_food: int = 1_000
+    mutation_probability: float = 0.0
+    matchup_rate: float = 1.0
+    rounds: int = 50
+    can_mutate_parent: bool = False
+    starting_population: tuple[tuple[str, int], ...] = ()
+
+    @property
+    def config_id(self) -> str:
+        """A short, stable identifier of the config, used to resume sweeps."""
+        return hashlib.sha1(json.dumps(asdict(self), sort_keys=True).encode()).hexdigest()[:12]
+
+
+
+def get_sweep_id(species: Mapping[str, Strategy], *, generations: int, seed: int) -> str:
+    """
+    A short identifier of the sweep-wide parameters that aren't part of a
+    config, so that a sweep is only resumed with the same ones.
+    """
+    parameters = {
+        "species": {name: f"{type(strategy).__module__}.{type(strategy).__qualname__}" for name, strategy in species.items()},
+        "generations": generations,
+        "seed": seed,
+    }
+    return hashlib.sha1(json.dumps(parameters, sort_keys=True).encode()).hexdigest()[:12]
+
+
+def _normalize(parameters: dict[str, Any]) -> dict[str, Any]:
+    """Lets `starting_population` be given as a dict and `payoff_matrix` as a list."""
+    if isinstance(parameters.get("starting_population"), Mapping):
+        parameters["starting_population"] = tuple(parameters["starting_population"].items())
+    if "payoff_matrix" in parameters:
+        parameters["payoff_matrix"] = tuple(parameters["payoff_matrix"])
+    return parameters
+
+
+def grid(base: SweepConfig = SweepConfig(), **values: Sequence[Any]) -> list[SweepConfig]:
+    """
+    Returns a config for every combination of the given parameter values,
+    with the remaining parameters taken from `base`.
+
+    >>> grid(overall_food=[100, 200], mutation_probability=[0, 0.01])  # 4 configs
+    """
+    names = list(values)
+    return [
+        replace(base, **_normalize(dict(zip(names, combination))))
+        for combination in it.product(*values.values())
+    ]
+
+
+def random_sample(
+        n: int,
+        base: SweepConfig = SweepConfig(),
+        *,
+        seed: int = 0,
+        **distributions: Sequence[Any] | Callable[[random.Random], Any]
+) -> list[SweepConfig]:
+    """
+    Returns `n` configs with each given parameter drawn at random, either
+    uniformly from a sequence of options or by calling a function with a
+    `random.Random` instance seeded with `seed`.
+
+    >>> random_sample(10, overall_food=[100, 200], mutation_probability=lambda rng: rng.uniform(0, 0.1))
+    """
+    rng = random.Random(seed)
+    return [
+        replace(base, **_normalize({
+            name: distribution(rng) if callable(distribution) else rng.choice(distribution)
+            for name, distribution in distributions.items()
+        }))
+        for _ in range(n)
+    ]
+
+
+
+def run_replicate(
+        config: SweepConfig,
+        replicate: int,
+        *,
+        species: Mapping[str, Strategy],
+        generations: int,
+        seed: int = 0
+) -> list[dict[str, Any]]:
+    """
+    Simulates one replicate of `config` for `generations` generations and
+    returns a result row per generation (including generation 0). The run
+    stops early if the population dies out. The last row has `"last": True`.
+    The random state is restored afterwards.
+    """
+    state = random.getstate()
+    random.seed(f"{seed}:{config.config_id}:{replicate}")
+    try:
+        return _simulate_replicate(config, replicate, species=species, generations=generations, seed=seed)
+    finally:
+        random.setstate(state)
+
+
+def _simulate_replicate(
+        config: SweepConfig,
+        replicate: int,
+        *,
+        species: Mapping[str, Strategy],
+        generations: int,
+        seed: int
+) -> list[dict[str, Any]]:
+    strategies = [species[name] for name, _ in config.starting_population]
+    population = Population(
+        [[Player(species[name]) for name, count in config.starting_population for _ in range(count)]],
+        matchup_cache=MatchupCache(),
+        retained_generations=1,
+    )
+    parameters = {field.name: getattr(config, field.name) for field in fields(config)}
+    sweep_id = get_sweep_id(species, generations=generations, seed=seed)
+
+    def row() -> dict[str, Any]:
+        return {
+            "sweep_id": sweep_id,
+            "config_id": config.config_id,
+            "replicate": replicate,
+            "generation": population.generation,
+            "population_size": population.population_size,
+            "average_age": population.population_average_age if population.population_size else 0.0,
+            "counts": population.get_population_counts(),
+            **parameters,
+            "last": False,
+        }
+
+    rows = [row()]
+    while population.generation < generations and population.population_size > 0:
+        population.do_generation(
+            matchup_rate=config.matchup_rate,
+            payoff_matrix=PayoffMatrix(*config.payoff_matrix),
+            rounds=config.rounds,
+            overall_food=config.overall_food,
+            mutation_probability=config.mutation_probability,
+            mutation_strategies=strategies,
+            can_mutate_parent=config.can_mutate_parent,
+        )
+        rows.append(row())
+    rows[-1]["last"] = True
+    return rows
+
+
+def read_results(path: str | os.PathLike) -> list[dict[str, Any]]:
+    """
+    Returns the rows of the runs that completed in a sweep's output file,
+    ignoring rows of runs that were interrupted.
+    """
+    path = Path(path)
+    if not path.exists():
+        return []
+
+    rows = []
+    for line in path.read_text().splitlines():
+        try:
+            rows.append(json.loads(line))
+        except json.JSONDecodeError:
+            pass  # A line cut short by a crash
+    completed = {(row["config_id"], row["replicate"]) for row in rows if row["last"]}
+    return [row for row in rows if (row["config_id"], row["replicate"]) in completed]
+
+
+def run_sweep(
+        configs: Iterable[SweepConfig],
+        path: str | os.PathLike,
+        *,
+        species: Mapping[str, Strategy],
+        replicates: int = 1,
+        generations: int = 100,
+        seed: int = 0,
+        executor: Executor | None = None
+) -> int:
+    """
+    Runs `replicates` replicates of every config for `generations` generations
+    and appends their rows to the JSON Lines file at `path` as each run
+    completes. Runs that already completed in `path` are skipped, and rows
+    of interrupted runs are dropped. Returns the number of runs done.
+
+    Raises a ValueError if `path` holds results for other `species`,
+    `generations` or `seed`, since they can't be resumed.
+
+    Runs are sent to `executor` (e.g. a `ProcessPoolExecutor`) if one is given,
+    and done one after the other in this process otherwise. Each run is seeded
+    from `seed`, its config and its replicate number, so results don't depend
+    on the order the runs are done in.
+    """
+    path = Path(path)
+    done_rows = read_results(path)
+    sweep_id = get_sweep_id(species, generations=generations, seed=seed)
+    if any(row.get("sweep_id") != sweep_id for row in done_rows):
+        raise ValueError(
+            f"{path} holds results of a sweep with other species, generations or seed "
+            f"(expected generations={generations}, seed={seed}), write them to another file"
+        )
+    done = {(row["config_id"], row["replicate"]) for row in done_rows}
+
+    # Rewrite the file without the rows of interrupted runs
+    temporary_path = path.with_name(path.name + ".tmp")
+    with open(temporary_path, "w") as file:
+        file.writelines(json.dumps(row) + "\n" for row in done_rows)
+    os.replace(temporary_path, path)
+
+    runs = [
+        (config, replicate)
+        for config in dict.fromkeys(configs)
+        for replicate in range(replicates)
+        if (config.config_id, replicate) not in done
+    ]
+    kwargs = dict(species=species, generations=generations, seed=seed)
+
+    with open(path, "a") as file:
+        def write(rows: list[dict[str, Any]]) -> None:
+            file.write("".join(json.dumps(row) + "\n" for row in rows))
+            file.flush()
+
+        if executor is None:
+            for config, replicate in runs:
+                write(run_replicate(config, replicate, **kwargs))
+        else:
+            from concurrent.futures import as_completed  # Imported here to keep importing utils fast
+
+            futures = [executor.submit(run_replicate, config, replicate, **kwargs) for config, replicate in runs]
+            for future in as_completed(futures):
+                write(future.result())
+
+    return len(runs)
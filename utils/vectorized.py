@@ -0,0 +1,129 @@
+"""
+Batched battle engine that plays thousands of battles at once with NumPy.
+
+Strategies that have a `state_machine` (see `StateMachine`) are stepped
+round by round as arrays of states, one entry per battle, instead of calling
+`decide` twice per round per battle. Everything else falls back to the
+regular `battle` function.
+
+NumPy is an optional dependency, so this module isn't imported by
+`utils/__init__.py`. Import it directly:
+
+>>> from utils.vectorized import battle_many
+"""
+from __future__ import annotations
+from collections.abc import Sequence
+from typing import TYPE_CHECKING
+
+try:
+    import numpy as np
+except ImportError as e:
+    raise ImportError("The vectorized battle engine requires numpy, install it with `pip install numpy`.") from e
+
+from utils.simulation_utils import (
+    Player,
+    StateMachine,
+    PayoffMatrix,
+    battle,
+)
+from utils.analytic import get_state_machine
+from utils.settings import get_settings
+
+if TYPE_CHECKING:
+    from utils.profiling import SimulationStats
+
+
+
+def play_state_machines(
+        machines1: Sequence[StateMachine],
+        machines2: Sequence[StateMachine],
+        *,
+        rounds: int = 100
+) -> np.ndarray:
+    """
+    Plays `machines1[i]` against `machines2[i]` for `rounds` rounds for
+    every `i` at once, returning an integer array of shape (len(machines1), 4)
+    whose columns are the outcome tallies (CC, CD, DC, DD) of each battle,
+    seen from the perspective of `machines1`.
+    """
+    if len(machines1) != len(machines2):
+        raise ValueError(f"Expected as many opponents as players, but got {len(machines1)} and {len(machines2)}")
+
+    # Stack all distinct machines into one big table, with the states of
+    # each machine shifted by an offset so they don't overlap
+    offsets: dict[StateMachine, int] = {}
+    actions: list[bool] = []
+    transitions: list[tuple[int, int]] = []
+    for machine in (*machines1, *machines2):
+        if machine not in offsets:
+            offset = offsets[machine] = len(actions)
+            actions.extend(action.value for action in machine.actions)
+            transitions.extend((offset + on_coop, offset + on_defect) for on_coop, on_defect in machine.transitions)
+
+    action_table = np.array(actions, dtype=np.int64)
+    transition_table = np.array(transitions, dtype=np.int64).reshape(-1, 2)
+
+    states1 = np.array([offsets[machine] + machine.initial_state for machine in machines1], dtype=np.int64)
+    states2 = np.array([offsets[machine] + machine.initial_state for machine in machines2], dtype=np.int64)
+
+    defections1 = np.zeros(len(machines1), dtype=np.int64)
+    defections2 = np.zeros(len(machines1), dtype=np.int64)
+    mutual_defections = np.zeros(len(machines1), dtype=np.int64)
+
+    for _ in range(rounds):
+        moves1 = action_table[states1]
+        moves2 = action_table[states2]
+        defections1 += moves1
+        defections2 += moves2
+        mutual_defections += moves1 & moves2
+        states1 = transition_table[states1, moves2]
+        states2 = transition_table[states2, moves1]
+
+    return np.stack([
+        rounds - defections1 - defections2 + mutual_defections,  # CC
+        defections2 - mutual_defections,                         # CD
+        defections1 - mutual_defections,                         # DC
+        mutual_defections,                                       # DD
+    ], axis=1)
+
+
+def battle_many(
+        matchups: Sequence[tuple[Player, Player]],
+        *,
+        rounds: int = 100,
+        payoff_matrix: PayoffMatrix | None = None,
+        stats: SimulationStats | None = None
+) -> list[tuple[float, float]]:
+    """
+    Returns the same scores as `[battle(p1, p2, ...) for p1, p2 in matchups]`,
+    but plays every matchup where both strategies have a state machine (see
+    `utils.analytic.get_state_machine`) in one batch. The remaining matchups are played one at a time.
+    """
+    scores: list[tuple[float, float] | None] = [None] * len(matchups)
+    batched = []
+    for i, (player1, player2) in enumerate(matchups):
+        if get_state_machine(player1.strategy) is not None and get_state_machine(player2.strategy) is not None:
+            batched.append(i)
+        else:
+            scores[i] = battle(player1, player2, rounds=rounds, payoff_matrix=payoff_matrix, stats=stats)
+
+    if batched:
+        tallies = play_state_machines(
+            [get_state_machine(matchups[i][0].strategy) for i in batched],
+            [get_state_machine(matchups[i][1].strategy) for i in batched],
+            rounds=rounds,
+        )
+        if stats is not None:
+            stats.battles += len(batched)
+            stats.rounds += len(batched) * rounds
+            stats.scored_rounds += len(batched) * rounds
+        if payoff_matrix is None:
+            payoff_matrix = get_settings().payoff_matrix
+        own_rewards = np.array([payoff_matrix.coop_coop, payoff_matrix.coop_defect, payoff_matrix.defect_coop, payoff_matrix.defect_defect])
+        opponent_rewards = own_rewards[[0, 2, 1, 3]]
+        own_scores = (tallies @ own_rewards / rounds).tolist()
+        opponent_scores = (tallies @ opponent_rewards / rounds).tolist()
+        for i, own_score, opponent_score in zip(batched, own_scores, opponent_scores):
+            scores[i] = (own_score, opponent_score)
+
+    return scores
@@ -0,0 +1,101 @@
+"""
+Runs a simulation in a background thread, so a user interface (such as the
+Streamlit app) can stay responsive, show progress while generations are
+computed, and pause, resume or cancel the run without losing its state.
+"""
+from __future__ import annotations
+from typing import Any
+import threading
+
+from utils.simulation_utils import Population
+from utils.count_population import CountPopulation
+
+
+
+class SimulationWorker:
+    """
+    Calls `population.do_generation(**generation_kwargs)` in a background
+    thread, either a given number of times or until it's cancelled.
+
+    Every generation is done while holding `lock`, so other threads can read
+    a consistent population by holding it too. `generation_kwargs` may be
+    replaced at any time, and the change applies from the next generation,
+    e.g. to introduce a famine mid-run.
+
+    ## Example
+    >>> worker = SimulationWorker(pop, {"overall_food": 100})
+    >>> worker.start()  # Runs until cancelled
+    >>> worker.pause()
+    >>> worker.resume()
+    >>> worker.cancel()  # The population keeps all generations done so far
+    """
+    def __init__(
+            self,
+            population: Population | CountPopulation,
+            generation_kwargs: dict[str, Any] | None = None,
+            *,
+            lock: threading.Lock | None = None
+    ) -> None:
+        self.population = population
+        self.generation_kwargs = generation_kwargs or {}
+        self.lock = lock or threading.Lock()
+        self.generations_done = 0
+        self.generations_wanted: int | None = None
+        # The exception that stopped the worker, if any
+        self.error: BaseException | None = None
+        self._thread: threading.Thread | None = None
+        self._unpaused = threading.Event()
+        self._cancelled = threading.Event()
+
+    @property
+    def is_running(self) -> bool:
+        """Whether the worker has been started and hasn't finished or been cancelled."""
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def is_paused(self) -> bool:
+        return self.is_running and not self._unpaused.is_set()
+
+    def start(self, generations: int | None = None) -> None:
+        """Starts doing `generations` generations, or generations until cancelled if None."""
+        if self.is_running:
+            raise RuntimeError("The simulation is already running")
+        if generations is not None and generations < 0:
+            raise ValueError(f"Expected a non-negative number of generations, but got {generations}")
+        self.generations_done = 0
+        self.generations_wanted = generations
+        self.error = None
+        self._cancelled.clear()
+        self._unpaused.set()
+        self._thread = threading.Thread(target=self._run, name="SimulationWorker", daemon=True)
+        self._thread.start()
+
+    def pause(self) -> None:
+        """Pauses after the current generation."""
+        self._unpaused.clear()
+
+    def resume(self) -> None:
+        self._unpaused.set()
+
+    def cancel(self, timeout: float | None = None) -> None:
+        """Stops after the current generation and waits for the thread to finish."""
+        self._cancelled.set()
+        self._unpaused.set()  # Wake it up if it's paused, so it can stop
+        self.join(timeout)
+
+    def join(self, timeout: float | None = None) -> None:
+        """Waits for the worker to finish its generations (or to be cancelled)."""
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        try:
+            while self.generations_wanted is None or self.generations_done < self.generations_wanted:
+                self._unpaused.wait()
+                if self._cancelled.is_set():
+                    break
+                with self.lock:
+                    self.population.do_generation(**self.generation_kwargs)
+                self.generations_done += 1
+        except Exception as e:
+            self.error = e